@@ -0,0 +1,449 @@
+"""Accelerated city simulator and telemetry replay harness.
+
+Drives a running server through its real endpoints: bin sensors report fill
+levels over PUT /api/bins/{id}, trucks get routes from /api/route/optimize
+and stream GPS pings, and a WebSocket client measures how long each reading
+takes to come back as a delta frame. Simulated time runs --speed times faster
+than wall time, and the server clock is set to the same speed for the run so
+sensor silence, rollups, ETAs and overflow predictions follow simulated time.
+With several server workers the clock cannot be set per run; start the server
+with CLOCK_SPEED matching --speed instead.
+
+    cd backend
+    RATE_LIMIT_SCALE=1000 python main.py                  # the node under test
+    python -m benchmarks.city_simulator --bins 2000 --trucks 20 --speed 120 --hours 8
+    python -m benchmarks.city_simulator --record day.ndjson --hours 24
+    python -m benchmarks.city_simulator --replay day.ndjson --speed 600
+
+Telemetry files are NDJSON: a {"kind": "bins"} header with the bin
+definitions, then timed "reading", "route" and "ping" events.
+"""
+import argparse
+import asyncio
+import heapq
+import json
+import math
+import random
+import sys
+import threading
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from http.client import HTTPConnection
+from time import perf_counter
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from utils.geo import METRES_PER_DEGREE_LAT, haversine_m
+
+# Percentage points per hour a bin fills, before per-bin variation
+FILL_RATES = {"commercial": 3.0, "street": 2.0, "residential": 1.5, "park": 1.0}
+FAULT_MODES = ("stuck", "noisy", "jump")
+TRUCK_DWELL_SECONDS = 120
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+def fill_status(fill_level: float) -> str:
+    if fill_level >= 90:
+        return "critical"
+    if fill_level >= 75:
+        return "warning"
+    return "normal"
+
+class ApiClient:
+    """Blocking keep-alive HTTP connections, one per thread, driven from asyncio"""
+
+    def __init__(self, base_url: str, concurrency: int):
+        url = urlparse(base_url)
+        self.host, self.port = url.hostname, url.port or 80
+        self.executor = ThreadPoolExecutor(max_workers=concurrency)
+        self.local = threading.local()
+        self.token: Optional[str] = None
+
+    def _request(self, method: str, path: str, body: Optional[bytes], content_type: str) -> Tuple[int, bytes]:
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = self.local.conn = HTTPConnection(self.host, self.port, timeout=60)
+        headers = {"Content-Type": content_type}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            return response.status, response.read()
+        except OSError:
+            conn.close()
+            self.local.conn = None
+            raise
+
+    async def request(self, method: str, path: str, payload=None, body: Optional[bytes] = None,
+                      content_type: str = "application/json") -> Tuple[int, Optional[object]]:
+        if payload is not None:
+            body = json.dumps(payload).encode()
+        loop = asyncio.get_running_loop()
+        status, data = await loop.run_in_executor(self.executor, self._request, method, path, body, content_type)
+        try:
+            return status, json.loads(data) if data else None
+        except ValueError:
+            return status, None
+
+class Harness:
+    """Paces events against wall time, sends them and collects the figures"""
+
+    def __init__(self, args):
+        self.client = ApiClient(args.url, args.concurrency)
+        self.ws_url = args.url.replace("http", "ws", 1).rstrip("/") + "/ws"
+        self.speed = args.speed
+        self.key_to_id: Dict[str, str] = {}
+        self.id_to_key: Dict[str, str] = {}
+        self.record = open(args.record, "w") if args.record else None
+        self.slots = asyncio.Semaphore(args.concurrency)
+        self.tasks = set()
+        self.wall_start = 0.0
+        self.admin_token: Optional[str] = None
+        # Figures
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Counter] = defaultdict(Counter)
+        self.slip: List[float] = []
+        self.pending_readings: Dict[str, float] = {}  # bin id -> send time of the oldest unseen reading
+        self.e2e_lag: List[float] = []
+        self.frames = 0
+        self.frame_bytes = 0
+        self.vehicle_updates = 0
+
+    async def setup(self, bins: List[Dict], admin_email: str, admin_password: str):
+        credentials = {"email": admin_email, "password": admin_password}
+        status, body = await self.client.request("POST", "/api/auth/login", credentials)
+        if status == 401:
+            await self.client.request("POST", "/api/initialize-demo-data")
+            status, body = await self.client.request("POST", "/api/auth/login", credentials)
+        if status != 200:
+            raise SystemExit(f"Admin login failed ({status}): {body}")
+        self.client.token = self.admin_token = body["token"]
+
+        ndjson = "".join(json.dumps({k: v for k, v in b.items() if k != "key"}) + "\n" for b in bins).encode()
+        status, body = await self.client.request("POST", "/api/bins/bulk?format=ndjson", body=ndjson)
+        if status != 200 or body["failed"]:
+            raise SystemExit(f"Bin import failed ({status}): {body}")
+        for b, bin_id in zip(bins, body["bin_ids"]):
+            self.key_to_id[b["key"]] = bin_id
+            self.id_to_key[bin_id] = b["key"]
+        if self.record:
+            self.record.write(json.dumps({"kind": "bins", "bins": bins}) + "\n")
+        status, body = await self.client.request("PUT", "/api/admin/clock", {"speed": self.speed})
+        if status != 200:
+            print(f"Server clock not accelerated ({status}): {body}", file=sys.stderr)
+        self.client.token = None  # telemetry is sent the way field devices send it
+
+    async def watch(self):
+        import websockets
+        async with websockets.connect(self.ws_url, max_size=None) as ws:
+            async for raw in ws:
+                received = perf_counter()
+                message = json.loads(raw)
+                if message.get("type") != "delta":
+                    continue
+                self.frames += 1
+                self.frame_bytes += len(raw)
+                self.vehicle_updates += len(message.get("vehicles", []))
+                for change in message["changes"]:
+                    sent = self.pending_readings.pop(change["data"]["id"], None)
+                    if sent is not None and change["change"] == "bin_updated":
+                        self.e2e_lag.append((received - sent) * 1000)
+
+    def start(self):
+        self.wall_start = perf_counter()
+
+    async def pace(self, t: float):
+        delay = self.wall_start + t / self.speed - perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        else:
+            self.slip.append(-delay * 1000)
+
+    async def _timed(self, kind: str, method: str, path: str, payload) -> Tuple[int, object]:
+        start = perf_counter()
+        try:
+            status, body = await self.client.request(method, path, payload)
+        except OSError:
+            status, body = 0, None
+        self.latencies[kind].append((perf_counter() - start) * 1000)
+        self.statuses[kind][status] += 1
+        return status, body
+
+    async def _send(self, t: float, event: Dict):
+        async with self.slots:
+            kind = event["kind"]
+            if kind == "reading":
+                bin_id = self.key_to_id[event["bin"]]
+                self.pending_readings.setdefault(bin_id, perf_counter())
+                await self._timed(kind, "PUT", f"/api/bins/{bin_id}",
+                                  {"fill_level": event["fill_level"], "status": event["status"]})
+            elif kind == "ping":
+                ping = {"latitude": event["latitude"], "longitude": event["longitude"]}
+                await self._timed(kind, "POST", f"/api/vehicles/{event['vehicle']}/pings", {"pings": [ping]})
+            elif kind == "route":
+                bin_ids = [self.key_to_id[k] for k in event["bins"]]
+                await self._timed(kind, "PUT", f"/api/vehicles/{event['vehicle']}/route", {"bin_ids": bin_ids})
+
+    def submit(self, t: float, event: Dict):
+        if self.record:
+            self.record.write(json.dumps({"t": round(t, 3), **event}) + "\n")
+        task = asyncio.create_task(self._send(t, event))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def plan_routes(self, trucks: int) -> List[Tuple[str, List[str]]]:
+        """Ask the server for today's route and split it between trucks"""
+        status, body = await self._timed("optimize", "GET", "/api/route/optimize", None)
+        if status != 200:
+            return []
+        keys = [self.id_to_key[b] for b in body["bin_ids"] if b in self.id_to_key]
+        size = math.ceil(len(keys) / trucks) if keys else 0
+        return [(f"sim-truck-{n + 1}", keys[i:i + size]) for n, i in enumerate(range(0, len(keys), size or 1))]
+
+    async def finish(self):
+        if self.tasks:
+            await asyncio.gather(*self.tasks)
+        await asyncio.sleep(1.0)  # let the last delta frames arrive
+        # Back to wall speed from the simulated time, so no stored timestamp lies in the future
+        self.client.token = self.admin_token
+        await self.client.request("PUT", "/api/admin/clock", {"speed": 1.0})
+        self.client.token = None
+        if self.record:
+            self.record.close()
+
+    def report(self, simulated_seconds: float) -> Dict:
+        wall = perf_counter() - self.wall_start
+        requests = sum(sum(c.values()) for c in self.statuses.values())
+        summary = {
+            "simulated_seconds": round(simulated_seconds, 1),
+            "wall_seconds": round(wall, 2),
+            "acceleration": round(simulated_seconds / wall, 1) if wall else None,
+            "requests": requests,
+            "requests_per_second": round(requests / wall, 1) if wall else None,
+            "endpoints": {
+                kind: {
+                    "count": len(values),
+                    "statuses": dict(self.statuses[kind]),
+                    "p50_ms": percentile(values, 50),
+                    "p95_ms": percentile(values, 95),
+                    "p99_ms": percentile(values, 99),
+                }
+                for kind, values in self.latencies.items()
+            },
+            "e2e_lag_ms": {
+                "samples": len(self.e2e_lag),
+                "p50": percentile(self.e2e_lag, 50),
+                "p95": percentile(self.e2e_lag, 95),
+                "p99": percentile(self.e2e_lag, 99),
+                "max": max(self.e2e_lag) if self.e2e_lag else None,
+            },
+            "schedule_slip_ms": {"late_events": len(self.slip), "p95": percentile(self.slip, 95),
+                                 "max": max(self.slip) if self.slip else None},
+            "websocket": {"frames": self.frames, "frames_per_second": round(self.frames / wall, 1) if wall else None,
+                          "average_frame_bytes": round(self.frame_bytes / self.frames) if self.frames else None,
+                          "vehicle_updates": self.vehicle_updates},
+        }
+        for section in (summary["endpoints"].values(), [summary["e2e_lag_ms"], summary["schedule_slip_ms"]]):
+            for figures in section:
+                for key, value in figures.items():
+                    if isinstance(value, float):
+                        figures[key] = round(value, 1)
+        return summary
+
+class CitySimulator:
+    """Discrete-event model of bins filling, sensors reporting and trucks collecting"""
+
+    def __init__(self, args):
+        self.rng = random.Random(args.seed)
+        self.args = args
+        self.bins: List[Dict] = []
+        self.state: Dict[str, Dict] = {}
+        radius_deg = args.radius_km * 1000 / METRES_PER_DEGREE_LAT
+        lng_scale = math.cos(math.radians(args.lat))
+        for i in range(args.bins):
+            key = f"b{i}"
+            angle, distance = self.rng.uniform(0, 2 * math.pi), radius_deg * math.sqrt(self.rng.random())
+            location_type = self.rng.choice(list(FILL_RATES))
+            self.bins.append({
+                "key": key,
+                "name": f"Sim-{i:05d}",
+                "latitude": round(args.lat + distance * math.sin(angle), 6),
+                "longitude": round(args.lng + distance * math.cos(angle) / lng_scale, 6),
+                "capacity": self.rng.choice([120, 240, 660, 1100]),
+                "location_type": location_type,
+            })
+            self.state[key] = {
+                "fill": self.rng.uniform(0, 80),
+                "rate": FILL_RATES[location_type] * self.rng.lognormvariate(0, 0.4),
+                "updated": 0.0,
+                "fault": self.rng.choice(FAULT_MODES) if self.rng.random() < args.faulty else None,
+                "stuck_at": None,
+            }
+        self.positions = {b["key"]: (b["latitude"], b["longitude"]) for b in self.bins}
+
+    def _fill_at(self, key: str, t: float) -> float:
+        state = self.state[key]
+        state["fill"] = min(100.0, state["fill"] + state["rate"] * (t - state["updated"]) / 3600)
+        state["updated"] = t
+        return state["fill"]
+
+    def _reading(self, key: str, t: float) -> Dict:
+        state = self.state[key]
+        value = self._fill_at(key, t)
+        if state["fault"] == "stuck":
+            state["stuck_at"] = state["stuck_at"] if state["stuck_at"] is not None else value
+            value = state["stuck_at"]
+        elif state["fault"] == "noisy":
+            value = min(100.0, max(0.0, value + self.rng.gauss(0, 20)))
+        elif state["fault"] == "jump" and self.rng.random() < 0.05:
+            value = 100.0
+        return {"kind": "reading", "bin": key, "fill_level": round(value, 1), "status": fill_status(value)}
+
+    async def run(self, harness: Harness):
+        args = self.args
+        duration = args.hours * 3600
+        interval = args.report_minutes * 60
+        queue: List[Tuple[float, int, str, object]] = []
+        counter = 0
+
+        def schedule(t: float, kind: str, data):
+            nonlocal counter
+            counter += 1
+            heapq.heappush(queue, (t, counter, kind, data))
+
+        for b in self.bins:
+            schedule(self.rng.uniform(0, interval), "reading", b["key"])
+        # Each shift is planned once every sensor has reported at least once
+        for shift in range(math.ceil(duration / (args.shift_hours * 3600))):
+            schedule(shift * args.shift_hours * 3600 + interval * 1.2, "dispatch", None)
+
+        harness.start()
+        t = 0.0
+        while queue and queue[0][0] <= duration:
+            t, _, kind, data = heapq.heappop(queue)
+            await harness.pace(t)
+            if kind == "reading":
+                harness.submit(t, self._reading(data, t))
+                schedule(t + interval * self.rng.uniform(0.8, 1.2), "reading", data)
+            elif kind == "dispatch":
+                for vehicle, keys in await harness.plan_routes(args.trucks):
+                    harness.submit(t, {"kind": "route", "vehicle": vehicle, "bins": keys})
+                    truck = {"vehicle": vehicle, "stops": keys, "index": 0, "position": self.positions[keys[0]]}
+                    schedule(t + 1, "truck", truck)
+            elif kind == "truck":
+                next_t = self._move_truck(truck=data, t=t, harness=harness)
+                if next_t is not None:
+                    schedule(next_t, "truck", data)
+        return t
+
+    def _move_truck(self, truck: Dict, t: float, harness: Harness) -> Optional[float]:
+        """Advance a truck by one ping interval; returns when it moves next"""
+        args = self.args
+        if truck["index"] >= len(truck["stops"]):
+            return None
+        key = truck["stops"][truck["index"]]
+        target = self.positions[key]
+        lat, lng = truck["position"]
+        remaining = haversine_m(lat, lng, *target)
+        step = args.truck_kmh / 3.6 * args.ping_seconds
+        if remaining <= step:
+            truck["position"] = target
+            truck["index"] += 1
+            self._fill_at(key, t)
+            self.state[key]["fill"] = 0.0  # emptied; the sensor reports it on its next reading
+            next_t = t + remaining / (args.truck_kmh / 3.6) + TRUCK_DWELL_SECONDS
+        else:
+            f = step / remaining
+            truck["position"] = (lat + (target[0] - lat) * f, lng + (target[1] - lng) * f)
+            next_t = t + args.ping_seconds
+        harness.submit(t, {"kind": "ping", "vehicle": truck["vehicle"],
+                           "latitude": round(truck["position"][0], 7), "longitude": round(truck["position"][1], 7)})
+        return next_t
+
+async def replay(path: str, harness: Harness, admin_email: str, admin_password: str) -> float:
+    """Send a recorded telemetry file at the harness speed"""
+    with open(path) as f:
+        header = json.loads(f.readline())
+        if header.get("kind") != "bins":
+            raise SystemExit("Telemetry file must start with a bins header")
+        await harness.setup(header["bins"], admin_email, admin_password)
+        watcher = asyncio.create_task(harness.watch())
+        harness.start()
+        t = 0.0
+        for line in f:
+            event = json.loads(line)
+            t = event.pop("t")
+            await harness.pace(t)
+            harness.submit(t, event)
+    await harness.finish()
+    watcher.cancel()
+    return t
+
+async def simulate(args, harness: Harness) -> float:
+    simulator = CitySimulator(args)
+    await harness.setup(simulator.bins, args.admin_email, args.admin_password)
+    watcher = asyncio.create_task(harness.watch())
+    await asyncio.sleep(0.5)  # connect before the first event
+    simulated = await simulator.run(harness)
+    await harness.finish()
+    watcher.cancel()
+    return simulated
+
+def print_report(summary: Dict):
+    print(f"Simulated {summary['simulated_seconds']:.0f} s in {summary['wall_seconds']:.1f} s "
+          f"({summary['acceleration']}x), {summary['requests']} requests ({summary['requests_per_second']}/s)")
+    print(f"{'endpoint':<10}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}  statuses")
+    for kind, figures in summary["endpoints"].items():
+        print(f"{kind:<10}{figures['count']:>8}{figures['p50_ms'] or 0:>10.1f}{figures['p95_ms'] or 0:>10.1f}"
+              f"{figures['p99_ms'] or 0:>10.1f}  {figures['statuses']}")
+    lag, slip, ws = summary["e2e_lag_ms"], summary["schedule_slip_ms"], summary["websocket"]
+    print(f"reading -> delta frame lag: p50 {lag['p50']} ms, p95 {lag['p95']} ms, p99 {lag['p99']} ms, "
+          f"max {lag['max']} ms ({lag['samples']} samples)")
+    print(f"websocket: {ws['frames']} frames ({ws['frames_per_second']}/s, ~{ws['average_frame_bytes']} bytes), "
+          f"{ws['vehicle_updates']} vehicle updates")
+    print(f"harness fell behind schedule on {slip['late_events']} events (p95 {slip['p95']} ms, max {slip['max']} ms)")
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Simulate a city or replay telemetry against a running server")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--speed", type=float, default=60.0, help="Simulated seconds per wall-clock second")
+    parser.add_argument("--replay", help="Replay a recorded telemetry file instead of simulating")
+    parser.add_argument("--record", help="Write the generated events to a telemetry file")
+    parser.add_argument("--bins", type=int, default=1000)
+    parser.add_argument("--trucks", type=int, default=10)
+    parser.add_argument("--hours", type=float, default=2.0, help="Simulated duration")
+    parser.add_argument("--shift-hours", type=float, default=8.0, help="Routes are planned at the start of each shift")
+    parser.add_argument("--report-minutes", type=float, default=15.0, help="Sensor reporting interval")
+    parser.add_argument("--ping-seconds", type=float, default=15.0, help="Truck GPS ping interval")
+    parser.add_argument("--truck-kmh", type=float, default=25.0)
+    parser.add_argument("--faulty", type=float, default=0.02, help="Share of bins with a faulty sensor")
+    parser.add_argument("--lat", type=float, default=40.75)
+    parser.add_argument("--lng", type=float, default=-73.98)
+    parser.add_argument("--radius-km", type=float, default=5.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, default=32, help="Requests in flight at once")
+    parser.add_argument("--admin-email", default="admin@swachhgrid.com")
+    parser.add_argument("--admin-password", default="admin123")
+    parser.add_argument("--json-out", help="Also write the figures as JSON")
+    args = parser.parse_args(argv)
+
+    harness = Harness(args)
+    if args.replay:
+        simulated = asyncio.run(replay(args.replay, harness, args.admin_email, args.admin_password))
+    else:
+        simulated = asyncio.run(simulate(args, harness))
+
+    summary = harness.report(simulated)
+    print_report(summary)
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump(summary, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
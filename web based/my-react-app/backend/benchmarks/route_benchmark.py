@@ -0,0 +1,265 @@
+"""Route optimizer benchmark and regression check.
+
+Runs every solver in utils.route_optimizer.SOLVERS over seeded synthetic and
+classic instances, records solve time, tour length and gap to the best known
+tour, appends the run to a JSON-lines history and compares it with a
+baseline. Exits with status 1 when a solver got slower or worse than the
+baseline allows.
+
+Times are the best of several repeats and are compared in units of a fixed
+calibration workload timed in the same run, so a baseline recorded on a
+faster or busier machine still compares like with like.
+
+    cd backend
+    python -m benchmarks.route_benchmark                  # run and check
+    python -m benchmarks.route_benchmark --update-baseline
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+from datetime import datetime
+from time import perf_counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+from utils.route_optimizer import SOLVERS
+from utils.planner import split_by_sweep
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PATH = os.path.join(HERE, "baseline.json")
+HISTORY_PATH = os.path.join(HERE, "history.jsonl")
+
+# Planar instance units are metres; near the equator one degree is this many metres
+METRES_PER_DEGREE = 111320.0
+
+Point = Tuple[float, float]
+
+# TSPLIB berlin52, optimal closed tour 7542 (EUC_2D, rounded distances)
+BERLIN52 = [
+    (565, 575), (25, 185), (345, 750), (945, 685), (845, 655), (880, 660), (25, 230), (525, 1000),
+    (580, 1175), (650, 1130), (1605, 620), (1220, 580), (1465, 200), (1530, 5), (845, 680), (725, 370),
+    (145, 665), (415, 635), (510, 875), (560, 365), (300, 465), (520, 585), (480, 415), (835, 625),
+    (975, 580), (1215, 245), (1320, 315), (1250, 400), (660, 180), (410, 250), (420, 555), (575, 665),
+    (1150, 1160), (700, 580), (685, 595), (685, 610), (770, 610), (795, 645), (720, 635), (760, 650),
+    (475, 960), (95, 260), (875, 920), (700, 500), (555, 815), (830, 485), (1170, 65), (830, 610),
+    (605, 625), (595, 360), (1340, 725), (1740, 245),
+]
+
+def uniform_points(n: int, seed: int, size: float = 5000.0) -> List[Point]:
+    rng = random.Random(seed)
+    return [(rng.uniform(0, size), rng.uniform(0, size)) for _ in range(n)]
+
+def clustered_points(n: int, seed: int, clusters: int = 8, size: float = 8000.0) -> List[Point]:
+    rng = random.Random(seed)
+    centres = [(rng.uniform(0, size), rng.uniform(0, size)) for _ in range(clusters)]
+    points = []
+    for _ in range(n):
+        cx, cy = rng.choice(centres)
+        points.append((rng.gauss(cx, size / 40), rng.gauss(cy, size / 40)))
+    return points
+
+def circle_points(n: int, radius: float = 1000.0) -> List[Point]:
+    # Shuffled so the solver cannot just follow input order
+    points = [(radius * math.cos(2 * math.pi * i / n), radius * math.sin(2 * math.pi * i / n)) for i in range(n)]
+    random.Random(n).shuffle(points)
+    return points
+
+def grid_points(side: int, spacing: float = 100.0) -> List[Point]:
+    points = [(i * spacing, j * spacing) for i in range(side) for j in range(side)]
+    random.Random(side).shuffle(points)
+    return points
+
+# name -> (kind, points, best known closed tour length or None, rounded distances)
+def build_instances() -> Dict[str, Tuple[str, List[Point], Optional[float], bool]]:
+    return {
+        "berlin52": ("tsp", BERLIN52, 7542.0, True),
+        "circle-100": ("tsp", circle_points(100), 100 * 2 * 1000.0 * math.sin(math.pi / 100), False),
+        "grid-10x10": ("tsp", grid_points(10), 100 * 100.0, False),
+        "uniform-50": ("tsp", uniform_points(50, seed=1), None, False),
+        "uniform-200": ("tsp", uniform_points(200, seed=2), None, False),
+        "uniform-1000": ("tsp", uniform_points(1000, seed=3), None, False),
+        "clustered-500": ("tsp", clustered_points(500, seed=4), None, False),
+        "vrp-uniform-400": ("vrp", uniform_points(400, seed=5, size=10000.0), None, False),
+    }
+
+def to_bins(points: List[Point]) -> List[Dict]:
+    return [
+        {"id": str(i), "latitude": y / METRES_PER_DEGREE, "longitude": x / METRES_PER_DEGREE}
+        for i, (x, y) in enumerate(points)
+    ]
+
+def tour_length(points: List[Point], order: List[str], closed: bool, rounded: bool) -> float:
+    """Planar length of a visiting order, measured independently of the solver"""
+    indices = [int(i) for i in order]
+    pairs = list(zip(indices, indices[1:]))
+    if closed and len(indices) > 1:
+        pairs.append((indices[-1], indices[0]))
+    total = 0.0
+    for a, b in pairs:
+        d = math.dist(points[a], points[b])
+        total += round(d) if rounded else d
+    return total
+
+def _reference_distance(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Haversine distance, a frozen copy of the solvers' inner loop.
+
+    Calibration must not call the code under test, or a regression there
+    would slow the time unit by the same factor and cancel out.
+    """
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = math.sin((phi2 - phi1) / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lng2 - lng1) / 2) ** 2
+    return 2 * 6371 * math.asin(math.sqrt(a))
+
+def calibrate(repeats: int) -> float:
+    """Best time in ms of a fixed workload like the solvers' inner loop, as this machine's time unit"""
+    rng = random.Random(0)
+    pairs = [(rng.uniform(-60, 60), rng.uniform(-180, 180), rng.uniform(-60, 60), rng.uniform(-180, 180))
+             for _ in range(20000)]
+    best_ms = float("inf")
+    for _ in range(repeats):
+        start = perf_counter()
+        for lat1, lng1, lat2, lng2 in pairs:
+            _reference_distance(lat1, lng1, lat2, lng2)
+        best_ms = min(best_ms, (perf_counter() - start) * 1000)
+    return best_ms
+
+def run_instance(solver: Callable, kind: str, points: List[Point], rounded: bool, max_stops: int,
+                 repeats: int) -> Tuple[float, float]:
+    """Return (best solve time in ms, tour length)"""
+    bins = to_bins(points)
+    best_ms, length = float("inf"), 0.0
+    for _ in range(repeats):
+        start = perf_counter()
+        if kind == "tsp":
+            solutions = [solver(list(bins))]
+        else:
+            solutions = [solver(group) for group in split_by_sweep(list(bins), max_stops)]
+        best_ms = min(best_ms, (perf_counter() - start) * 1000)
+        # TSP instances are scored as closed tours, VRP routes as the open paths trucks drive
+        length = sum(tour_length(points, s.bin_ids, closed=(kind == "tsp"), rounded=rounded) for s in solutions)
+    return best_ms, length
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=HERE, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def load_json(path: str) -> Optional[Dict]:
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def best_recorded(history_path: str) -> Dict[str, float]:
+    """Shortest tour ever recorded per instance, used as best known for synthetic ones"""
+    best: Dict[str, float] = {}
+    if os.path.exists(history_path):
+        with open(history_path) as f:
+            for line in f:
+                for result in json.loads(line)["results"]:
+                    name = result["instance"]
+                    best[name] = min(best.get(name, float("inf")), result["tour_length"])
+    return best
+
+def run_benchmarks(solvers: List[str], max_stops: int, history_path: str, repeats: int) -> Dict:
+    recorded = best_recorded(history_path)
+    calibration_ms = calibrate(repeats)
+    results = []
+    for name, (kind, points, optimum, rounded) in build_instances().items():
+        for solver_name in solvers:
+            time_ms, length = run_instance(SOLVERS[solver_name], kind, points, rounded, max_stops, repeats)
+            results.append({
+                "instance": name,
+                "kind": kind,
+                "size": len(points),
+                "solver": solver_name,
+                "time_ms": round(time_ms, 3),
+                "tour_length": round(length, 2),
+                "optimal": optimum is not None,
+                "best_known": round(optimum if optimum is not None else min(recorded.get(name, length), length), 2),
+            })
+
+    # Synthetic instances: the best known also includes other solvers in this run
+    for result in results:
+        if not result["optimal"]:
+            peers = [r["tour_length"] for r in results if r["instance"] == result["instance"]]
+            result["best_known"] = min([result["best_known"]] + peers)
+        result["gap_percent"] = round((result["tour_length"] / result["best_known"] - 1) * 100, 2)
+
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "calibration_ms": round(calibration_ms, 3),
+        "results": results,
+    }
+
+def find_regressions(run: Dict, baseline: Dict, time_tolerance: float, quality_tolerance: float) -> List[str]:
+    expected = {(r["instance"], r["solver"]): r for r in baseline["results"]}
+    # Baseline times converted to this run's machine speed
+    speed = run["calibration_ms"] / baseline["calibration_ms"] if baseline.get("calibration_ms") else None
+    regressions = []
+    for result in run["results"]:
+        base = expected.get((result["instance"], result["solver"]))
+        if base is None:
+            continue
+        label = f"{result['solver']} on {result['instance']}"
+        # A few ms of slack keeps timer noise on tiny instances from failing the check
+        if speed is not None and result["time_ms"] > base["time_ms"] * speed * time_tolerance + 5:
+            regressions.append(
+                f"{label}: {result['time_ms']:.1f} ms vs baseline {base['time_ms'] * speed:.1f} ms (machine-adjusted)"
+            )
+        if result["tour_length"] > base["tour_length"] * (1 + quality_tolerance):
+            regressions.append(f"{label}: tour {result['tour_length']:.1f} vs baseline {base['tour_length']:.1f}")
+    return regressions
+
+def print_table(run: Dict):
+    print(f"{'instance':<18}{'solver':<20}{'n':>6}{'time ms':>12}{'length':>14}{'gap %':>9}")
+    for r in run["results"]:
+        print(f"{r['instance']:<18}{r['solver']:<20}{r['size']:>6}{r['time_ms']:>12.2f}{r['tour_length']:>14.1f}{r['gap_percent']:>9.2f}")
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the route optimizer and check for regressions")
+    parser.add_argument("--solver", action="append", choices=sorted(SOLVERS), help="Solver to run (default: all)")
+    parser.add_argument("--max-stops", type=int, default=20, help="Stops per vehicle for VRP instances")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--history", default=HISTORY_PATH)
+    parser.add_argument("--repeats", type=int, default=3, help="Runs per instance; the fastest counts")
+    parser.add_argument("--time-tolerance", type=float, default=2.0, help="Allowed slowdown factor")
+    parser.add_argument("--quality-tolerance", type=float, default=0.01, help="Allowed relative tour length increase")
+    parser.add_argument("--update-baseline", action="store_true", help="Save this run as the new baseline")
+    args = parser.parse_args(argv)
+
+    run = run_benchmarks(args.solver or sorted(SOLVERS), args.max_stops, args.history, args.repeats)
+    print_table(run)
+    print(f"calibration {run['calibration_ms']:.2f} ms")
+
+    with open(args.history, "a") as f:
+        f.write(json.dumps(run) + "\n")
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(run, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    baseline = load_json(args.baseline)
+    if baseline is None:
+        print("No baseline found; run with --update-baseline to create one")
+        return 0
+
+    if not baseline.get("calibration_ms"):
+        print("Baseline has no calibration; only tour lengths are checked until it is updated")
+    regressions = find_regressions(run, baseline, args.time_tolerance, args.quality_tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
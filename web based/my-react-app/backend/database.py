@@ -1,14 +1,83 @@
 import uuid
 import hashlib
+import json
+from collections import deque
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from itertools import islice
+from typing import Dict, List, Optional, Set
 import random
 import math
+import os
+
+from utils.clock import clock
+from utils.tracing import traced
+from utils.shared_state import shared
+from utils.geo import GridIndex, haversine_m, zone_for
+from utils.rollups import RollupStore
+from utils.tiles import TileIndex
+from utils.anomaly import AnomalyDetector, FLAG_ALERTS
+from utils.urgency import COLLECTION_THRESHOLD, FILL_RATE_HOURS, FillRateEstimator, UrgencyIndex
+from utils.user_index import UserIndex, decode_cursor, encode_cursor
+from utils.versioned_heap import VersionedHeap
 
 # In-memory database simulation
 bins_db: Dict[str, Dict] = {}
 alerts_db: Dict[str, Dict] = {}
 users_db: Dict[str, Dict] = {}
+sessions_db: Dict[str, str] = {}  # token -> user id
+users_by_email: Dict[str, str] = {}  # email -> user id
+# Prefix search over user names and emails
+user_index = UserIndex()
+bin_id_counter = 0  # last number handed out by _next_bin_id
+
+# Hourly/daily analytics counters, maintained as telemetry, collections and alerts arrive
+analytics_rollups = RollupStore()
+# A fill level drop larger than this between readings, to a nearly empty bin, counts as a collection
+COLLECTION_DROP_THRESHOLD = 20.0
+# Per-bin fill sensor statistics; flagged bins raise alerts and are only routed when they read high
+sensor_monitor = AnomalyDetector(COLLECTION_DROP_THRESHOLD)
+
+# Change feed: every bin/alert mutation gets the next sequence number and is kept
+# in a bounded ring so reconnecting clients can replay just the gap
+CHANGE_LOG_SIZE = int(os.getenv("CHANGE_LOG_SIZE", "10000"))
+change_log: deque = deque(maxlen=CHANGE_LOG_SIZE)
+change_seq = 0
+# Live pushes are conflated: the latest change per entity since the last tick is
+# sent as one 'delta' message, so push cost follows distinct entities, not updates
+CHANGE_TICK_SECONDS = float(os.getenv("CHANGE_TICK_MS", "250")) / 1000
+pending_changes: Dict[tuple, Dict] = {}  # (entity kind, id) -> latest change
+pending_vehicles: Dict[str, Dict] = {}  # vehicle id -> latest pushed status
+
+# Map marker clusters and heatmap cells for every zoom level
+tile_index = TileIndex()
+# Bins by predicted overflow, the collection candidate set and dashboard counts
+urgency_index = UrgencyIndex(COLLECTION_THRESHOLD)
+# Per-bin fill rates; every reading recomputes the bin's predicted full time from them
+fill_rates = FillRateEstimator(FILL_RATE_HOURS)
+reports_db: Dict[str, Dict] = {}
+incidents_db: Dict[str, Dict] = {}
+
+# Reports of the same type within this distance and time window join one incident
+REPORT_MERGE_RADIUS_M = float(os.getenv("REPORT_MERGE_RADIUS_M", "50"))
+REPORT_MERGE_WINDOW_HOURS = float(os.getenv("REPORT_MERGE_WINDOW_HOURS", "6"))
+PRIORITY_RANK = {"low": 0, "medium": 1, "high": 2, "urgent": 3}
+
+# Spatial index over open incidents, used to find duplicates on ingest
+incident_index = GridIndex(REPORT_MERGE_RADIUS_M)
+# Open incidents in triage order: priority, then report count, then age
+triage_queue = VersionedHeap()
+
+route_plans_db: Dict[str, Dict] = {}  # shift date -> latest plan
+route_plan_version = 0
+planner_runs: Dict[str, datetime] = {}  # shift date -> when the nightly run was claimed
+
+vehicles_db: Dict[str, Dict] = {}
+VEHICLE_PING_BUFFER = int(os.getenv("VEHICLE_PING_BUFFER", "300"))  # pings kept per vehicle
+COLLECTION_RADIUS_M = float(os.getenv("COLLECTION_RADIUS_M", "25"))
+STOP_LOOKAHEAD = 3  # upcoming stops checked against each ping
+DEFAULT_SPEED_KMH = 30.0  # same average speed the route optimizer assumes
+STOP_SERVICE_MINUTES = 5.0
+ETA_PUSH_THRESHOLD_SECONDS = 60.0
 
 def generate_demo_bins():
     """Generate demo waste bins data"""
@@ -45,9 +114,9 @@ def generate_demo_bins():
         # Calculate predicted full time
         if fill_level < 90:
             hours_to_full = random.uniform(2, 48)
-            predicted_full_time = datetime.now() + timedelta(hours=hours_to_full)
+            predicted_full_time = clock.now() + timedelta(hours=hours_to_full)
         else:
-            predicted_full_time = datetime.now() + timedelta(hours=1)
+            predicted_full_time = clock.now() + timedelta(hours=1)
 
         bin_data = {
             "id": f"bin-{i+1:03d}",
@@ -58,9 +127,11 @@ def generate_demo_bins():
             "fill_level": round(fill_level, 1),
             "status": status,
             "location_type": random.choice(["street", "park", "commercial", "residential"]),
+            "zone": zone_for(location["lat"] + lat_offset, location["lng"] + lng_offset),
             "description": f"Waste bin at {location['name']}",
-            "last_updated": datetime.now(),
-            "predicted_full_time": predicted_full_time
+            "last_updated": clock.now(),
+            "predicted_full_time": predicted_full_time,
+            "sensor_flags": []
         }
         bins.append(bin_data)
 
@@ -78,7 +149,7 @@ def generate_demo_alerts(bins):
                 "message": f"🚨 CRITICAL: Bin {bin['name']} is {bin['fill_level']}% full and needs immediate collection!",
                 "severity": "critical",
                 "bin_id": bin["id"],
-                "created_at": datetime.now() - timedelta(minutes=random.randint(5, 60)),
+                "created_at": clock.now() - timedelta(minutes=random.randint(5, 60)),
                 "acknowledged": False
             })
             alert_id += 1
@@ -88,7 +159,7 @@ def generate_demo_alerts(bins):
                 "message": f"⚠️ WARNING: Bin {bin['name']} is {bin['fill_level']}% full and should be collected soon.",
                 "severity": "high",
                 "bin_id": bin["id"],
-                "created_at": datetime.now() - timedelta(minutes=random.randint(30, 120)),
+                "created_at": clock.now() - timedelta(minutes=random.randint(30, 120)),
                 "acknowledged": False
             })
             alert_id += 1
@@ -98,12 +169,66 @@ def generate_demo_alerts(bins):
         "id": f"alert-{alert_id}",
         "message": "🟢 System Status: All collection routes optimized for today",
         "severity": "low",
-        "created_at": datetime.now() - timedelta(hours=2),
+        "created_at": clock.now() - timedelta(hours=2),
         "acknowledged": True
     })
 
     return alerts
 
+def _record_rollup(bin_data: Optional[Dict], timestamp: datetime, **increments: float):
+    if bin_data:
+        analytics_rollups.add(timestamp, bin_data["zone"], bin_data["location_type"], **increments)
+    else:
+        analytics_rollups.add(timestamp, "unassigned", "system", **increments)
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+def _record_change(change_type: str, entity: Dict):
+    """Stamp an entity with the next sequence number and append it to the change feed"""
+    global change_seq
+    change_seq += 1
+    entity["seq"] = change_seq
+    change = {"seq": change_seq, "change": change_type, "data": dict(entity), "at": clock.now()}
+    change_log.append(change)
+    pending_changes[(change_type.split("_")[0], entity["id"])] = change
+
+def _bin_changed(change_type: str, bin_data: Dict):
+    """Keep bin indexes current and record the change"""
+    tile_index.update(bin_data)
+    urgency_index.update(bin_data)
+    _record_change(change_type, bin_data)
+
+def _store_alert(alert: Dict):
+    alerts_db[alert["id"]] = alert
+    _record_rollup(bins_db.get(alert.get("bin_id")), alert["created_at"], alerts_generated=1)
+    _record_change("alert_created", alert)
+
+def _new_alert(message: str, severity: str, bin_id: Optional[str] = None) -> Dict:
+    alert = {
+        "id": f"alert-{uuid.uuid4().hex[:12]}",
+        "message": message,
+        "severity": severity,
+        "bin_id": bin_id,
+        "created_at": clock.now(),
+        "acknowledged": False
+    }
+    _store_alert(alert)
+    return alert
+
+def _sensor_flags_changed(bin_data: Dict, raised: Set[str]):
+    """Copy the detector's flags onto the bin and raise an alert for each new one"""
+    bin_data["sensor_flags"] = sensor_monitor.flags(bin_data["id"])
+    stats = sensor_monitor.sensors[bin_data["id"]]
+    for flag in sorted(raised):
+        severity, template = FLAG_ALERTS[flag]
+        since = stats.last_change_at if flag == "stuck" else stats.last_reading_at
+        message = template.format(name=bin_data["name"], value=bin_data["fill_level"], since=since.strftime("%Y-%m-%d %H:%M"))
+        _new_alert(message, severity, bin_data["id"])
+
+@shared
 def init_demo_data():
     """Initialize demo data"""
     global bins_db, alerts_db
@@ -114,9 +239,13 @@ def init_demo_data():
     # Store in database
     for bin in bins:
         bins_db[bin["id"]] = bin
+        _record_rollup(bin, bin["last_updated"], readings=1, fill_level_sum=bin["fill_level"])
+        sensor_monitor.track(bin["id"], bin["fill_level"], bin["last_updated"])
+        fill_rates.track(bin["id"], bin["fill_level"], bin["last_updated"], bin["predicted_full_time"])
+        _bin_changed("bin_created", bin)
 
     for alert in alerts:
-        alerts_db[alert["id"]] = alert
+        _store_alert(alert)
 
     return {
         "bins_count": len(bins),
@@ -124,17 +253,29 @@ def init_demo_data():
         "message": "Demo data initialized successfully"
     }
 
+@traced("storage")
+@shared
 def get_bins():
     """Get all bins"""
     return list(bins_db.values())
 
+@traced("storage")
+@shared
 def get_bin(bin_id: str):
     """Get a specific bin"""
     return bins_db.get(bin_id)
 
-def create_bin(bin_data: Dict):
-    """Create a new bin"""
-    bin_id = f"bin-{len(bins_db) + 1:03d}"
+def _next_bin_id() -> str:
+    """Allocate the next unused bin id; ids are never reused"""
+    global bin_id_counter
+    while True:
+        bin_id_counter += 1
+        bin_id = f"bin-{bin_id_counter:03d}"
+        if bin_id not in bins_db:
+            return bin_id
+
+def _insert_bin(bin_data: Dict) -> Dict:
+    bin_id = _next_bin_id()
     new_bin = {
         "id": bin_id,
         "name": bin_data["name"],
@@ -144,66 +285,536 @@ def create_bin(bin_data: Dict):
         "fill_level": 0.0,
         "status": "normal",
         "location_type": bin_data["location_type"],
+        "zone": zone_for(bin_data["latitude"], bin_data["longitude"]),
         "description": bin_data.get("description", ""),
-        "last_updated": datetime.now(),
-        "predicted_full_time": datetime.now() + timedelta(days=7)
+        "last_updated": clock.now(),
+        "predicted_full_time": clock.now() + timedelta(days=7),
+        "sensor_flags": []
     }
     bins_db[bin_id] = new_bin
+    # A new bin has no sensor reading yet; its first one sets the baseline
+    sensor_monitor.track(bin_id, None, new_bin["last_updated"])
+    # Bins are installed empty, so the first reading's rise is a fill rate
+    fill_rates.track(bin_id, 0.0, new_bin["last_updated"])
+    _bin_changed("bin_created", new_bin)
     return new_bin
 
+@traced("storage")
+@shared
+def create_bin(bin_data: Dict):
+    """Create a new bin"""
+    return _insert_bin(bin_data)
+
+@traced("storage")
+@shared
+def create_bins(bins_data: List[Dict]) -> List[str]:
+    """Create a batch of validated bins and return their ids"""
+    return [_insert_bin(bin_data)["id"] for bin_data in bins_data]
+
+@traced("storage")
+@shared
+def get_bins_page(offset: int, limit: int) -> List[Dict]:
+    """A slice of the bin registry in insertion order, for streaming exports"""
+    return list(islice(bins_db.values(), offset, offset + limit))
+
+@traced("storage")
+@shared
 def update_bin(bin_id: str, update_data: Dict):
     """Update a bin"""
     if bin_id not in bins_db:
         return None
 
     bin_data = bins_db[bin_id]
+    previous_fill = bin_data["fill_level"]
     for key, value in update_data.items():
         if key in bin_data:
             bin_data[key] = value
 
-    bin_data["last_updated"] = datetime.now()
+    bin_data["last_updated"] = clock.now()
+
+    if update_data.get("fill_level") is not None:
+        if sensor_monitor.is_collection(previous_fill, bin_data["fill_level"]):
+            # The bin was emptied since the last reading
+            _record_rollup(bin_data, bin_data["last_updated"], bins_collected=1,
+                           waste_collected=bin_data["capacity"] * previous_fill / 100)
+        _record_rollup(bin_data, bin_data["last_updated"], readings=1, fill_level_sum=bin_data["fill_level"])
+        bin_data["predicted_full_time"] = fill_rates.observe(bin_id, bin_data["fill_level"], bin_data["last_updated"])
+        raised, cleared = sensor_monitor.observe(bin_id, bin_data["fill_level"], bin_data["last_updated"])
+        if raised or cleared:
+            _sensor_flags_changed(bin_data, raised)
+    _bin_changed("bin_updated", bin_data)
     return bin_data
 
+@traced("storage")
+@shared
 def get_alerts():
     """Get all alerts"""
     return list(alerts_db.values())
 
+@traced("storage")
+@shared
+def create_alert(alert_data: Dict) -> Dict:
+    """Create a new alert"""
+    return _new_alert(alert_data["message"], alert_data["severity"], alert_data.get("bin_id"))
+
+@traced("storage")
+@shared
 def acknowledge_alert(alert_id: str):
     """Acknowledge an alert"""
     if alert_id in alerts_db:
         alerts_db[alert_id]["acknowledged"] = True
+        _record_change("alert_acknowledged", alerts_db[alert_id])
         return alerts_db[alert_id]
     return None
 
+@shared
+def get_latest_change_seq() -> int:
+    """Sequence number of the most recent change"""
+    return change_seq
+
+@traced("storage")
+@shared
+def get_changes(since: int, limit: int = 1000) -> Dict:
+    """Changes after a sequence number, oldest first.
+
+    'reset' is set when the gap is no longer in the ring (or the client saw a
+    sequence number from before a restart) and a full reload is needed.
+    'more' is set when the gap is longer than limit; continue from the seq of
+    the last change returned, not from latest_seq.
+    """
+    oldest = change_log[0]["seq"] if change_log else change_seq + 1
+    if since > change_seq or since < oldest - 1:
+        return {"latest_seq": change_seq, "changes": [], "reset": True, "more": False}
+    # The gap is at the end of the ring, so walk it from the right
+    gap = list(islice(reversed(change_log), change_seq - since))
+    gap.reverse()
+    return {"latest_seq": change_seq, "changes": gap[:limit], "reset": False, "more": len(gap) > limit}
+
+@shared
+def flush_pending_changes() -> Optional[str]:
+    """Merge everything changed since the last tick into one 'delta' message.
+
+    Returns None when nothing changed. Dashboard stats are embedded whenever
+    bins changed so clients do not have to fetch them.
+    """
+    if not pending_changes and not pending_vehicles:
+        return None
+    changes = sorted(pending_changes.values(), key=lambda c: c["seq"])
+    vehicles = list(pending_vehicles.values())
+    pending_changes.clear()
+    pending_vehicles.clear()
+    message = {"type": "delta", "latest_seq": change_seq, "changes": changes, "vehicles": vehicles}
+    if any(c["change"].startswith("bin_") for c in changes):
+        message["stats"] = get_dashboard_stats()
+    return json.dumps(message, default=_json_default)
+
+@traced("storage")
+@shared
+def get_tile(z: int, x: int, y: int) -> Dict:
+    """Bin clusters and fill heatmap cells for one map tile"""
+    return tile_index.tile(z, x, y)
+
+@shared
+def sweep_silent_sensors() -> List[str]:
+    """Flag bins whose sensors stopped reporting; returns the newly flagged ids"""
+    silent = [b for b in sensor_monitor.sweep_silent(clock.now()) if b in bins_db]
+    for bin_id in silent:
+        bin_data = bins_db[bin_id]
+        _sensor_flags_changed(bin_data, {"silent"})
+        _bin_changed("bin_updated", bin_data)
+    return silent
+
+@traced("storage")
+@shared
+def get_sensor_health(flagged_only: bool = True) -> List[Dict]:
+    """Sensor statistics per bin, by default only for bins with flags"""
+    return [
+        sensor_monitor.health(bin_id) for bin_id in bins_db
+        if bin_id in sensor_monitor.sensors and (not flagged_only or sensor_monitor.sensors[bin_id].flags)
+    ]
+
+@traced("storage")
+@shared
 def get_dashboard_stats():
-    """Calculate dashboard statistics"""
-    bins = list(bins_db.values())
-    if not bins:
-        return {
-            "total_bins": 0,
-            "critical_bins": 0,
-            "warning_bins": 0,
-            "normal_bins": 0,
-            "average_fill_level": 0.0,
-            "bins_needing_collection": 0
-        }
+    """Dashboard statistics, kept as running counts by the urgency index"""
+    return urgency_index.summary()
+
+@traced("storage")
+@shared
+def get_urgent_bins(k: int, within_hours: Optional[float] = None) -> List[Dict]:
+    """Up to k routable bins, soonest to overflow first"""
+    before = math.inf if within_hours is None else (clock.now() + timedelta(hours=within_hours)).timestamp()
+    return [bins_db[bin_id] for bin_id in urgency_index.most_urgent(k, before)]
+
+@traced("storage")
+@shared
+def get_bins_due_for_collection() -> List[Dict]:
+    """Routable bins at or above the collection threshold, most urgent first"""
+    return [bins_db[bin_id] for bin_id in urgency_index.due_for_collection()]
+
+# Citizen Report Functions
+def _triage_push(incident: Dict):
+    """Queue an incident under its current priority, replacing its older entry"""
+    triage_queue.push(incident["id"], (
+        -PRIORITY_RANK.get(incident["priority"], 0),
+        -incident["report_count"],
+        incident["first_reported"].timestamp()
+    ))
+
+def _find_duplicate_incident(report: Dict) -> Optional[Dict]:
+    """Nearest unresolved incident of the same type reported within the merge window"""
+    cutoff = report["created_at"] - timedelta(hours=REPORT_MERGE_WINDOW_HOURS)
+    for incident_id, _ in incident_index.nearby(report["latitude"], report["longitude"], REPORT_MERGE_RADIUS_M):
+        incident = incidents_db[incident_id]
+        if incident["last_reported"] < cutoff:
+            # Too old to absorb new reports ever again
+            incident_index.remove(incident_id)
+        elif incident["type"] == report["type"]:
+            return incident
+    return None
 
-    total_bins = len(bins)
-    critical_bins = len([b for b in bins if b["status"] == "critical"])
-    warning_bins = len([b for b in bins if b["status"] == "warning"])
-    normal_bins = len([b for b in bins if b["status"] == "normal"])
-    average_fill_level = sum(b["fill_level"] for b in bins) / total_bins
-    bins_needing_collection = len([b for b in bins if b["fill_level"] >= 75])
+@traced("storage")
+@shared
+def create_report(report_data: Dict) -> Dict:
+    """Store a citizen report, merging it into an existing incident if it is a duplicate"""
+    now = clock.now()
+    report = {
+        "id": f"report-{uuid.uuid4().hex[:12]}",
+        "type": report_data["type"],
+        "description": report_data.get("description", ""),
+        "latitude": report_data["latitude"],
+        "longitude": report_data["longitude"],
+        "address": report_data.get("address"),
+        "priority": report_data.get("priority", "medium"),
+        "location_type": report_data.get("location_type"),
+        "reporter_name": report_data.get("reporter_name"),
+        "reporter_email": report_data.get("reporter_email"),
+        "image_urls": [],
+        "thumbnail_urls": [],
+        "images_pending": 0,
+        "created_at": now
+    }
 
+    incident = _find_duplicate_incident(report)
+    merged = incident is not None
+    if incident:
+        # Keep the incident at the centroid of its reports
+        count = incident["report_count"]
+        incident["latitude"] = (incident["latitude"] * count + report["latitude"]) / (count + 1)
+        incident["longitude"] = (incident["longitude"] * count + report["longitude"]) / (count + 1)
+        incident["report_ids"].append(report["id"])
+        incident["report_count"] = count + 1
+        incident["last_reported"] = now
+        if PRIORITY_RANK.get(report["priority"], 0) > PRIORITY_RANK.get(incident["priority"], 0):
+            incident["priority"] = report["priority"]
+    else:
+        incident = {
+            "id": f"incident-{uuid.uuid4().hex[:12]}",
+            "type": report["type"],
+            "latitude": report["latitude"],
+            "longitude": report["longitude"],
+            "priority": report["priority"],
+            "status": "open",
+            "report_ids": [report["id"]],
+            "report_count": 1,
+            "thumbnail_urls": [],
+            "first_reported": now,
+            "last_reported": now
+        }
+        incidents_db[incident["id"]] = incident
+
+    report["incident_id"] = incident["id"]
+    reports_db[report["id"]] = report
+    incident_index.insert(incident["id"], incident["latitude"], incident["longitude"])
+    if incident["status"] == "open":
+        _triage_push(incident)
+
+    return {"report": report, "incident": incident, "merged": merged}
+
+@traced("storage")
+@shared
+def get_reports(incident_id: Optional[str] = None) -> List[Dict]:
+    """Get citizen reports, optionally only those of one incident"""
+    if incident_id is not None:
+        incident = incidents_db.get(incident_id)
+        return [reports_db[r] for r in incident["report_ids"]] if incident else []
+    return list(reports_db.values())
+
+@traced("storage")
+@shared
+def get_report(report_id: str) -> Optional[Dict]:
+    """Get a specific citizen report"""
+    return reports_db.get(report_id)
+
+@shared
+def set_report_images_pending(report_id: str, count: int) -> Optional[Dict]:
+    """Record images queued for background processing"""
+    report = reports_db.get(report_id)
+    if report:
+        report["images_pending"] += count
+    return report
+
+@shared
+def add_report_image(report_id: str, image_url: Optional[str], thumbnail_url: Optional[str]):
+    """Attach a processed image (or clear a failed one) from the image workers"""
+    report = reports_db.get(report_id)
+    if not report:
+        return
+    report["images_pending"] = max(report["images_pending"] - 1, 0)
+    if image_url:
+        report["image_urls"].append(image_url)
+        report["thumbnail_urls"].append(thumbnail_url)
+        incident = incidents_db.get(report["incident_id"])
+        if incident:
+            incident["thumbnail_urls"].append(thumbnail_url)
+
+@traced("storage")
+@shared
+def get_incidents(status: Optional[str] = None) -> List[Dict]:
+    """Get incidents, optionally filtered by status"""
+    return [i for i in incidents_db.values() if status is None or i["status"] == status]
+
+@traced("storage")
+@shared
+def get_triage_queue(limit: int = 20) -> List[Dict]:
+    """Open incidents in triage order without removing them from the queue"""
+    return [incidents_db[incident_id] for incident_id in triage_queue.smallest(limit)]
+
+@traced("storage")
+@shared
+def assign_next_incident(assignee: str) -> Optional[Dict]:
+    """Pop the most urgent open incident off the triage queue and assign it"""
+    # Assigned incidents leave the queue but still absorb duplicate reports
+    incident_id = triage_queue.pop()
+    if incident_id is None:
+        return None
+    incident = incidents_db[incident_id]
+    incident["status"] = "assigned"
+    incident["assigned_to"] = assignee
+    return incident
+
+@traced("storage")
+@shared
+def resolve_incident(incident_id: str) -> Optional[Dict]:
+    """Mark an incident as resolved; later reports at the spot open a new one"""
+    incident = incidents_db.get(incident_id)
+    if not incident:
+        return None
+    triage_queue.discard(incident_id)
+    incident_index.remove(incident_id)
+    incident["status"] = "resolved"
+    return incident
+
+# Route Plan Functions
+@shared
+def claim_planner_run(shift_date: str) -> bool:
+    """Let exactly one worker run the nightly planner for a shift"""
+    if shift_date in planner_runs:
+        return False
+    planner_runs[shift_date] = clock.now()
+    return True
+
+@traced("storage")
+@shared
+def save_route_plan(plan: Dict) -> Dict:
+    """Store a plan as the newest version for its shift date"""
+    global route_plan_version
+    route_plan_version += 1
+    plan["version"] = route_plan_version
+    for route in plan["routes"]:
+        route["plan_version"] = route_plan_version
+    # Index routes by vehicle so drivers can fetch their own in O(1)
+    plan["routes_by_vehicle"] = {route["vehicle_id"]: route for route in plan["routes"]}
+    route_plans_db[plan["date"]] = plan
+    return plan
+
+@traced("storage")
+@shared
+def get_route_plan(shift_date: str) -> Optional[Dict]:
+    """Get the latest plan for a shift date"""
+    return route_plans_db.get(shift_date)
+
+@traced("storage")
+@shared
+def get_planned_route(shift_date: str, vehicle_id: str) -> Optional[Dict]:
+    """Get one vehicle's route from the latest plan for a shift date"""
+    plan = route_plans_db.get(shift_date)
+    return plan["routes_by_vehicle"].get(vehicle_id) if plan else None
+
+# Analytics Functions
+@traced("storage")
+@shared
+def get_analytics_rollups(granularity: str, start: datetime, end: datetime,
+                          zone: Optional[str] = None, location_type: Optional[str] = None) -> List[Dict]:
+    """Pre-aggregated analytics per hour or day in [start, end)"""
+    return analytics_rollups.query(granularity, start, end, zone, location_type)
+
+@traced("storage")
+@shared
+def get_analytics_summary(start: datetime, end: datetime,
+                          zone: Optional[str] = None, location_type: Optional[str] = None) -> Dict:
+    """Pre-aggregated analytics totals over whole days in [start, end)"""
+    summary = analytics_rollups.summary(start, end, zone, location_type)
+    summary.update({"start": start, "end": end})
+    return summary
+
+# Vehicle Tracking Functions
+def _new_vehicle(vehicle_id: str) -> Dict:
+    return {
+        "id": vehicle_id,
+        "pings": deque(maxlen=VEHICLE_PING_BUFFER),  # ring buffer of (timestamp, lat, lng)
+        "speed_kmh": DEFAULT_SPEED_KMH,
+        "stops": [],  # (bin_id, lat, lng) in planned order
+        "route_offsets": [],  # distance along the route to each stop, in metres
+        "next_stop_index": 0,
+        "collected_bin_ids": [],
+        "pushed_next_eta": None
+    }
+
+def _vehicle_etas(vehicle: Dict, now: datetime) -> List[Dict]:
+    """ETAs of the remaining stops from the latest position and speed estimate"""
+    stops, offsets, index = vehicle["stops"], vehicle["route_offsets"], vehicle["next_stop_index"]
+    if index >= len(stops):
+        return []
+
+    if vehicle["pings"]:
+        _, lat, lng = vehicle["pings"][-1]
+        to_next = haversine_m(lat, lng, stops[index][1], stops[index][2])
+    else:
+        to_next = 0.0
+    metres_per_minute = max(vehicle["speed_kmh"], 5.0) * 1000 / 60
+
+    etas = []
+    for i in range(index, len(stops)):
+        distance = to_next + offsets[i] - offsets[index]
+        minutes = distance / metres_per_minute + (i - index) * STOP_SERVICE_MINUTES
+        etas.append({
+            "bin_id": stops[i][0],
+            "eta": now + timedelta(minutes=minutes),
+            "distance_m": round(distance, 1)
+        })
+    return etas
+
+def _vehicle_status(vehicle: Dict, now: datetime) -> Dict:
+    last = vehicle["pings"][-1] if vehicle["pings"] else (None, None, None)
+    stops, index = vehicle["stops"], vehicle["next_stop_index"]
     return {
-        "total_bins": total_bins,
-        "critical_bins": critical_bins,
-        "warning_bins": warning_bins,
-        "normal_bins": normal_bins,
-        "average_fill_level": round(average_fill_level, 1),
-        "bins_needing_collection": bins_needing_collection
+        "id": vehicle["id"],
+        "last_ping": last[0],
+        "latitude": last[1],
+        "longitude": last[2],
+        "speed_kmh": round(vehicle["speed_kmh"], 1),
+        "route_bin_ids": [stop[0] for stop in stops],
+        "collected_bin_ids": list(vehicle["collected_bin_ids"]),
+        "next_stop": stops[index][0] if index < len(stops) else None,
+        "etas": _vehicle_etas(vehicle, now)
     }
 
+def _collect_bin(bin_id: str, collected_at: datetime):
+    bin_data = bins_db.get(bin_id)
+    if bin_data:
+        _record_rollup(bin_data, collected_at, bins_collected=1,
+                       waste_collected=bin_data["capacity"] * bin_data["fill_level"] / 100)
+        bin_data["fill_level"] = 0.0
+        bin_data["status"] = "normal"
+        bin_data["last_updated"] = collected_at
+        bin_data["predicted_full_time"] = fill_rates.observe(bin_id, 0.0, collected_at)
+        # The drop to empty is expected, not a sensor fault
+        sensor_monitor.collected(bin_id, collected_at)
+        _bin_changed("bin_updated", bin_data)
+
+@traced("storage")
+@shared
+def assign_vehicle_route(vehicle_id: str, bin_ids: List[str]) -> Optional[Dict]:
+    """Give a vehicle a planned route; returns None if any bin is unknown"""
+    if any(bin_id not in bins_db for bin_id in bin_ids):
+        return None
+
+    vehicle = vehicles_db.setdefault(vehicle_id, _new_vehicle(vehicle_id))
+    vehicle["stops"] = [(b, bins_db[b]["latitude"], bins_db[b]["longitude"]) for b in bin_ids]
+    # Leg distances are summed once so ETAs only need the distance to the next stop
+    offsets = [0.0]
+    for prev, stop in zip(vehicle["stops"], vehicle["stops"][1:]):
+        offsets.append(offsets[-1] + haversine_m(prev[1], prev[2], stop[1], stop[2]))
+    vehicle["route_offsets"] = offsets
+    vehicle["next_stop_index"] = 0
+    vehicle["collected_bin_ids"] = []
+    vehicle["pushed_next_eta"] = None
+    return _vehicle_status(vehicle, clock.now())
+
+@shared
+def record_vehicle_pings(vehicle_id: str, pings: List[Dict]) -> Dict:
+    """Ingest GPS pings, mark reached stops as collected and decide whether to push ETAs.
+
+    Returns the vehicle status, the bins collected by this batch and a
+    'push' flag set when a stop was collected or the next ETA drifted; pushed
+    statuses go out with the next change tick.
+    """
+    now = clock.now()
+    vehicle = vehicles_db.setdefault(vehicle_id, _new_vehicle(vehicle_id))
+    buffer, stops = vehicle["pings"], vehicle["stops"]
+    collected = []
+
+    for ping in pings:
+        timestamp = ping.get("timestamp") or now
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.astimezone().replace(tzinfo=None)
+        lat, lng = ping["latitude"], ping["longitude"]
+
+        if buffer:
+            prev_time, prev_lat, prev_lng = buffer[-1]
+            elapsed = (timestamp - prev_time).total_seconds()
+            if elapsed > 0:
+                # Smooth the speed estimate; stops at bins drag it down only gradually
+                speed = haversine_m(prev_lat, prev_lng, lat, lng) / elapsed * 3.6
+                vehicle["speed_kmh"] = 0.8 * vehicle["speed_kmh"] + 0.2 * speed
+        buffer.append((timestamp, lat, lng))
+
+        # Only the next few planned stops are checked, so each ping is O(1)
+        index = vehicle["next_stop_index"]
+        for i in range(index, min(index + STOP_LOOKAHEAD, len(stops))):
+            bin_id, stop_lat, stop_lng = stops[i]
+            if haversine_m(lat, lng, stop_lat, stop_lng) <= COLLECTION_RADIUS_M:
+                _collect_bin(bin_id, timestamp)
+                vehicle["collected_bin_ids"].append(bin_id)
+                vehicle["next_stop_index"] = i + 1
+                collected.append(bin_id)
+                break
+
+    status = _vehicle_status(vehicle, now)
+    next_eta = status["etas"][0]["eta"] if status["etas"] else None
+    pushed = vehicle["pushed_next_eta"]
+    push = bool(collected) or (next_eta is not None and (
+        pushed is None or abs((next_eta - pushed).total_seconds()) > ETA_PUSH_THRESHOLD_SECONDS
+    ))
+    if push:
+        vehicle["pushed_next_eta"] = next_eta
+        pending_vehicles[vehicle_id] = status
+    return {"status": status, "collected": collected, "push": push}
+
+@traced("storage")
+@shared
+def get_vehicles() -> List[Dict]:
+    """Get the status of every tracked vehicle"""
+    now = clock.now()
+    return [_vehicle_status(v, now) for v in vehicles_db.values()]
+
+@traced("storage")
+@shared
+def get_vehicle(vehicle_id: str) -> Optional[Dict]:
+    """Get the status of one vehicle"""
+    vehicle = vehicles_db.get(vehicle_id)
+    return _vehicle_status(vehicle, clock.now()) if vehicle else None
+
+@traced("storage")
+@shared
+def get_vehicle_trail(vehicle_id: str) -> Optional[List[Dict]]:
+    """Recent pings from a vehicle's ring buffer, oldest first"""
+    vehicle = vehicles_db.get(vehicle_id)
+    if not vehicle:
+        return None
+    return [{"timestamp": t, "latitude": lat, "longitude": lng} for t, lat, lng in vehicle["pings"]]
+
 # User Authentication Functions
 def hash_password(password: str) -> str:
     """Simple password hashing for demo purposes"""
@@ -213,6 +824,7 @@ def verify_password(password: str, hashed: str) -> bool:
     """Verify password against hash"""
     return hash_password(password) == hashed
 
+@shared
 def create_user(user_data: Dict) -> Dict:
     """Create a new user"""
     user_id = str(uuid.uuid4())
@@ -225,19 +837,47 @@ def create_user(user_data: Dict) -> Dict:
         "password": hashed_password,
         "role": user_data.get("role", "user"),
         "avatar": f"https://api.dicebear.com/7.x/avataaars/svg?seed={user_data['email']}",
-        "created_at": datetime.now()
+        "created_at": clock.now()
     }
     
     users_db[user_id] = new_user
+    users_by_email[new_user["email"]] = user_id
+    user_index.add(new_user)
     return new_user
 
+@shared
 def get_user_by_email(email: str) -> Optional[Dict]:
     """Get user by email"""
-    for user in users_db.values():
-        if user["email"] == email:
-            return user
-    return None
+    user_id = users_by_email.get(email)
+    return users_db[user_id] if user_id else None
+
+@traced("storage")
+@shared
+def search_users(q: str, role: Optional[str], limit: int, cursor: Optional[str] = None) -> Dict:
+    """A page of users whose name or email starts with q, with the cursor for the next page"""
+    after = decode_cursor(cursor) if cursor else None
+    user_ids, last = user_index.search(q, role, limit, after)
+    return {
+        "users": [{k: v for k, v in users_db[u].items() if k != "password"} for u in user_ids],
+        "next_cursor": encode_cursor(last) if last else None
+    }
+
+@shared
+def create_session(user_id: str) -> str:
+    """Issue a session token for a user"""
+    token = str(uuid.uuid4())
+    sessions_db[token] = user_id
+    return token
+
+@shared
+def get_user_by_token(token: str) -> Optional[Dict]:
+    """Get the user a session token was issued to"""
+    user_id = sessions_db.get(token)
+    if user_id is None:
+        return None
+    return users_db.get(user_id)
 
+@shared
 def authenticate_user(email: str, password: str) -> Optional[Dict]:
     """Authenticate user with email and password"""
     user = get_user_by_email(email)
@@ -246,6 +886,7 @@ def authenticate_user(email: str, password: str) -> Optional[Dict]:
         return {k: v for k, v in user.items() if k != "password"}
     return None
 
+@shared
 def init_demo_users():
     """Initialize demo users for the system"""
     demo_users = [
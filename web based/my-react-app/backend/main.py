@@ -1,35 +1,143 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import JSONResponse
+from fastapi.encoders import jsonable_encoder
+from fastapi.staticfiles import StaticFiles
 import asyncio
 import json
+import os
+from contextlib import asynccontextmanager
 from datetime import datetime
+from time import perf_counter
+from typing import Dict, Optional
 import uvicorn
 
-from routes import bins, alerts, dashboard, routes, auth
-from database import init_demo_data
-from models import ConnectionManager
+from routes import bins, alerts, dashboard, routes, auth, admin, reports, vehicles, analytics, changes, tiles, sensors, users
+from database import init_demo_data, get_changes, get_latest_change_seq, get_user_by_token
+from utils.tracing import start_request, server_timing_header, log_if_slow
+from utils.shared_state import connect_shared_state, start_state_owner, is_shared
+from utils.rate_limit import RateLimiter
+from utils.encoding import NegotiatedResponse, wants_msgpack, set_binary_response
+from utils.image_processing import MEDIA_ROOT, MEDIA_URL
+from utils.connections import manager
+from utils.planner import nightly_planner
+from utils.anomaly import sensor_watchdog
+from utils.changefeed import wake_change_waiters, push_changes
 
-app = FastAPI(title="SwachhGrid API", version="1.0.0")
+# Workers started in multi-worker mode forward all storage calls to the state owner
+connect_shared_state()
 
-# CORS middleware
+# In-memory token buckets and event-loop lag based load shedding
+limiter = RateLimiter()
+
+async def on_bus_message(message: str):
+    wake_change_waiters()
+    await manager.send_local(message)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await manager.bus.start(on_bus_message)
+    tasks = []
+    if not is_shared():
+        # Changes are made in this process; push one merged delta per tick
+        tasks.append(asyncio.create_task(push_changes(manager.broadcast)))
+    limiter.monitor.start()
+    tasks.append(asyncio.create_task(nightly_planner()))
+    tasks.append(asyncio.create_task(sensor_watchdog()))
+    yield
+    for task in tasks:
+        task.cancel()
+    limiter.monitor.stop()
+    await manager.bus.stop()
+
+app = FastAPI(
+    title="SwachhGrid API",
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=NegotiatedResponse
+)
+
+# Compress large response bodies
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
+# Content negotiation: MessagePack bodies for clients that send Accept: application/msgpack
+@app.middleware("http")
+async def negotiate_encoding(request: Request, call_next):
+    set_binary_response(wants_msgpack(request.headers.get("accept", "")))
+    response = await call_next(request)
+    response.headers.append("Vary", "Accept")
+    return response
+
+# Per-request tracing: Server-Timing header and sampled slow-request log
+@app.middleware("http")
+async def server_timing(request: Request, call_next):
+    spans = start_request()
+    start = perf_counter()
+    response = await call_next(request)
+    total_ms = (perf_counter() - start) * 1000
+    response.headers["Server-Timing"] = server_timing_header(spans, total_ms)
+    log_if_slow(request.method, request.url.path, response.status_code, spans, total_ms)
+    return response
+
+# Sessions are never revoked, so a token this worker has verified stays valid
+verified_tokens: Dict[str, str] = {}  # token -> user id
+
+def _session_user_id(request: Request) -> Optional[str]:
+    """User id behind the request's bearer token, or None when it has no valid session"""
+    authorization = request.headers.get("authorization")
+    if not authorization or not authorization.startswith("Bearer "):
+        return None
+    token = authorization[7:]
+    user_id = verified_tokens.get(token)
+    if user_id is None:
+        user = get_user_by_token(token)
+        if user is None:
+            return None
+        user_id = verified_tokens[token] = user["id"]
+    return user_id
+
+# Rate limiting and load shedding run first so rejected requests cost as little as possible
+@app.middleware("http")
+async def rate_limit(request: Request, call_next):
+    address = request.client.host if request.client else "unknown"
+    rejection = limiter.check(address, _session_user_id(request), request.method, request.url.path)
+    if rejection:
+        status_code, retry_after, detail = rejection
+        return JSONResponse(
+            status_code=status_code,
+            content={"detail": detail},
+            headers={"Retry-After": str(retry_after)}
+        )
+    return await call_next(request)
+
+# CORS middleware, registered last so it runs outermost and also covers 429/503 rejections
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # In production, specify your frontend URL
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Retry-After"],
 )
 
-# WebSocket connection manager
-manager = ConnectionManager()
-
 # Include routers
 app.include_router(auth.router, prefix="/api", tags=["authentication"])
 app.include_router(bins.router, prefix="/api", tags=["bins"])
 app.include_router(alerts.router, prefix="/api", tags=["alerts"])
 app.include_router(dashboard.router, prefix="/api", tags=["dashboard"])
 app.include_router(routes.router, prefix="/api", tags=["routes"])
+app.include_router(admin.router, prefix="/api", tags=["admin"])
+app.include_router(reports.router, prefix="/api", tags=["reports"])
+app.include_router(vehicles.router, prefix="/api", tags=["vehicles"])
+app.include_router(analytics.router, prefix="/api", tags=["analytics"])
+app.include_router(changes.router, prefix="/api", tags=["changes"])
+app.include_router(tiles.router, prefix="/api", tags=["tiles"])
+app.include_router(sensors.router, prefix="/api", tags=["sensors"])
+app.include_router(users.router, prefix="/api", tags=["users"])
+
+# Processed report images and thumbnails
+app.mount(MEDIA_URL, StaticFiles(directory=MEDIA_ROOT, check_dir=False), name="media")
 
 @app.get("/")
 async def root():
@@ -55,8 +163,21 @@ async def initialize_demo_data():
         )
 
 @app.websocket("/ws")
-async def websocket_endpoint(websocket: WebSocket):
+async def websocket_endpoint(websocket: WebSocket, since: Optional[int] = None):
     await manager.connect(websocket)
+    # Replay what a reconnecting client missed; changes carry per-entity seq numbers,
+    # so live messages interleaving with the replay are harmless
+    if since is not None:
+        # Sent in pages until the client has caught up, so a long gap is not cut short
+        while True:
+            feed = get_changes(since)
+            await manager.send_to(websocket, json.dumps(jsonable_encoder({"type": "replay", **feed})))
+            if not feed["more"]:
+                break
+            since = feed["changes"][-1]["seq"]
+    else:
+        message = {"type": "sync", "latest_seq": get_latest_change_seq()}
+        await manager.send_to(websocket, json.dumps(jsonable_encoder(message)))
     try:
         while True:
             data = await websocket.receive_text()
@@ -66,4 +187,13 @@ async def websocket_endpoint(websocket: WebSocket):
         manager.disconnect(websocket)
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    workers = int(os.getenv("WORKERS", "1"))
+    if workers > 1:
+        # One process owns the data and the pub/sub hub; workers talk to it over local IPC
+        state_owner = start_state_owner()
+        try:
+            uvicorn.run("main:app", host="0.0.0.0", port=8000, workers=workers, ws_per_message_deflate=True)
+        finally:
+            state_owner.shutdown()
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8000, ws_per_message_deflate=True)
\ No newline at end of file
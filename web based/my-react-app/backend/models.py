@@ -1,7 +1,9 @@
 from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Set
 from datetime import datetime
 from fastapi import WebSocket
+from utils.tracing import traced
+from utils.encoding import MSGPACK_SUBPROTOCOL, encode_frame
 
 class Bin(BaseModel):
     id: str
@@ -12,9 +14,12 @@ class Bin(BaseModel):
     fill_level: float
     status: str  # 'normal', 'warning', 'critical'
     location_type: str
+    zone: Optional[str] = None
     description: Optional[str] = None
     last_updated: datetime
     predicted_full_time: Optional[datetime] = None
+    seq: Optional[int] = None  # change feed sequence number of the last mutation
+    sensor_flags: List[str] = []  # 'stuck', 'noisy', 'jump', 'silent'
 
 class Alert(BaseModel):
     id: str
@@ -23,6 +28,19 @@ class Alert(BaseModel):
     bin_id: Optional[str] = None
     created_at: datetime
     acknowledged: bool = False
+    seq: Optional[int] = None
+
+class Change(BaseModel):
+    seq: int
+    change: str  # 'bin_created', 'bin_updated', 'alert_created', 'alert_acknowledged'
+    data: Dict[str, Any]
+    at: datetime
+
+class ChangeFeed(BaseModel):
+    latest_seq: int
+    changes: List[Change]
+    reset: bool  # the requested gap is gone; reload everything
+    more: bool = False  # only the first 'limit' changes were returned; continue from the last one
 
 class DashboardStats(BaseModel):
     total_bins: int
@@ -32,11 +50,89 @@ class DashboardStats(BaseModel):
     average_fill_level: float
     bins_needing_collection: int
 
+class AnalyticsRollup(BaseModel):
+    period_start: datetime
+    granularity: str  # 'hour' or 'day'
+    readings: int
+    average_fill_level: float
+    bins_collected: int
+    waste_collected: float  # litres, from bin capacity and fill level at collection
+    alerts_generated: int
+    zone_distribution: Dict[str, float]
+    location_type_distribution: Dict[str, float]
+
+class AnalyticsSummary(BaseModel):
+    start: datetime
+    end: datetime
+    readings: int
+    average_fill_level: float
+    bins_collected: int
+    waste_collected: float
+    alerts_generated: int
+    zone_distribution: Dict[str, float]
+    location_type_distribution: Dict[str, float]
+
+class PlacementRecommendation(BaseModel):
+    rank: int
+    latitude: float
+    longitude: float
+    zone: str
+    demand_covered: float  # litres per day newly within walking distance
+    coverage_percent_after: float
+
+class CoverageAnalysis(BaseModel):
+    cell_size_m: float
+    walk_radius_m: float
+    bins_considered: int
+    reports_considered: int
+    demand_cells: int
+    total_demand: float  # litres per day
+    covered_demand: float
+    coverage_percent: float
+    recommendations: List[PlacementRecommendation]
+
+class MarkerCluster(BaseModel):
+    latitude: float
+    longitude: float
+    count: int
+    worst_status: str
+    average_fill_level: float
+    status_counts: Dict[str, int]
+    bin_id: Optional[str] = None  # set when the cluster is a single bin
+
+class HeatmapCell(BaseModel):
+    latitude: float
+    longitude: float
+    count: int
+    average_fill_level: float
+
+class MapTile(BaseModel):
+    z: int
+    x: int
+    y: int
+    clusters: List[MarkerCluster]
+    heatmap: List[HeatmapCell]
+
 class RouteOptimization(BaseModel):
     bin_ids: List[str]
     total_distance: float
     estimated_time: float  # in minutes
-    coordinates: List[List[float]]
+    coordinates: List[List[float]]  # empty when the geometry is sent as a polyline
+    polyline: Optional[str] = None  # encoded polyline of the route, on request
+    polyline_precision: Optional[int] = None  # decimal places the polyline was encoded with
+
+class PlannedRoute(RouteOptimization):
+    vehicle_id: str
+    zone: str
+    projected_fill_levels: Dict[str, float]
+    plan_version: Optional[int] = None  # version of the plan this route belongs to
+
+class RoutePlan(BaseModel):
+    version: int
+    date: str
+    generated_at: datetime
+    shift_start: datetime
+    routes: List[PlannedRoute]
 
 class BinCreate(BaseModel):
     name: str
@@ -51,6 +147,103 @@ class BinUpdate(BaseModel):
     status: Optional[str] = None
     description: Optional[str] = None
 
+class SensorHealth(BaseModel):
+    bin_id: str
+    flags: List[str]
+    readings: int
+    last_value: Optional[float] = None
+    last_reading_at: datetime
+    last_change_at: datetime
+    delta_mean: float  # rolling mean of reading-to-reading change
+    delta_stddev: float
+
+class BulkImportError(BaseModel):
+    row: int  # 1-based record number, not counting a CSV header
+    error: str
+
+class BulkImportResult(BaseModel):
+    created: int
+    failed: int
+    bin_ids: List[str]
+    errors: List[BulkImportError]
+    errors_truncated: bool = False
+
+# Citizen Report Models
+class ReportCreate(BaseModel):
+    type: str = "bin_overflow"  # 'bin_overflow', 'bin_missing', 'bin_damaged', 'illegal_dumping', 'bin_request', ...
+    description: str = ""
+    latitude: float
+    longitude: float
+    address: Optional[str] = None
+    priority: str = "medium"  # 'low', 'medium', 'high', 'urgent'
+    location_type: Optional[str] = None
+    reporter_name: Optional[str] = None
+    reporter_email: Optional[str] = None
+
+class CitizenReport(BaseModel):
+    id: str
+    incident_id: str
+    type: str
+    description: str
+    latitude: float
+    longitude: float
+    address: Optional[str] = None
+    priority: str
+    location_type: Optional[str] = None
+    reporter_name: Optional[str] = None
+    reporter_email: Optional[str] = None
+    image_urls: List[str] = []
+    thumbnail_urls: List[str] = []
+    images_pending: int = 0
+    created_at: datetime
+
+class Incident(BaseModel):
+    id: str
+    type: str
+    latitude: float
+    longitude: float
+    priority: str
+    status: str  # 'open', 'assigned', 'resolved'
+    report_ids: List[str]
+    report_count: int
+    assigned_to: Optional[str] = None
+    thumbnail_urls: List[str] = []
+    first_reported: datetime
+    last_reported: datetime
+
+class ReportSubmission(BaseModel):
+    report: CitizenReport
+    incident: Incident
+    merged: bool
+
+# Vehicle Tracking Models
+class VehiclePing(BaseModel):
+    latitude: float
+    longitude: float
+    timestamp: Optional[datetime] = None
+
+class VehiclePingBatch(BaseModel):
+    pings: List[VehiclePing]
+
+class VehicleRouteAssign(BaseModel):
+    bin_ids: List[str]
+
+class StopEta(BaseModel):
+    bin_id: str
+    eta: datetime
+    distance_m: float
+
+class VehicleStatus(BaseModel):
+    id: str
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    last_ping: Optional[datetime] = None
+    speed_kmh: float
+    route_bin_ids: List[str] = []
+    collected_bin_ids: List[str] = []
+    next_stop: Optional[str] = None
+    etas: List[StopEta] = []
+
 # Authentication Models
 class User(BaseModel):
     id: str
@@ -66,6 +259,10 @@ class UserCreate(BaseModel):
     password: str
     role: str = 'user'
 
+class UserPage(BaseModel):
+    users: List[User]
+    next_cursor: Optional[str] = None  # pass back as cursor for the next page; None on the last one
+
 class UserLogin(BaseModel):
     email: str
     password: str
@@ -75,20 +272,60 @@ class LoginResponse(BaseModel):
     token: str
     message: str
 
+class ClockSetting(BaseModel):
+    speed: float = 1.0  # simulated seconds per wall-clock second
+    time: Optional[datetime] = None  # start from this time instead of the current server time
+
+class ClockState(BaseModel):
+    now: datetime
+    speed: float
+
 class ConnectionManager:
-    def __init__(self):
+    def __init__(self, bus=None):
         self.active_connections: List[WebSocket] = []
+        # Connections that negotiated MessagePack frames
+        self.binary_connections: Set[WebSocket] = set()
+        # Pub/sub bus that fans broadcasts out to every worker process
+        self.bus = bus
 
     async def connect(self, websocket: WebSocket):
-        await websocket.accept()
+        if MSGPACK_SUBPROTOCOL in websocket.scope.get("subprotocols", []):
+            await websocket.accept(subprotocol=MSGPACK_SUBPROTOCOL)
+            self.binary_connections.add(websocket)
+        else:
+            await websocket.accept()
         self.active_connections.append(websocket)
 
     def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
+        if websocket in self.active_connections:
+            self.active_connections.remove(websocket)
+        self.binary_connections.discard(websocket)
 
+    @traced("broadcast")
     async def broadcast(self, message: str):
-        for connection in self.active_connections:
+        if self.bus is not None:
+            await self.bus.publish(message)
+        else:
+            await self.send_local(message)
+
+    async def send_to(self, websocket: WebSocket, message: str):
+        """Send a message to a single client in its negotiated encoding"""
+        if websocket in self.binary_connections:
+            await websocket.send_bytes(encode_frame(message))
+        else:
+            await websocket.send_text(message)
+
+    async def send_local(self, message: str):
+        """Send a message to the WebSocket clients connected to this worker"""
+        packed = None
+        for connection in list(self.active_connections):
             try:
-                await connection.send_text(message)
+                if connection in self.binary_connections:
+                    # Encode once per broadcast, only if a binary client is connected
+                    if packed is None:
+                        packed = encode_frame(message)
+                    await connection.send_bytes(packed)
+                else:
+                    await connection.send_text(message)
             except:
                 self.disconnect(connection)
\ No newline at end of file
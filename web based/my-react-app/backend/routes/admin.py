@@ -0,0 +1,55 @@
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import Response
+from datetime import datetime
+from typing import Dict
+from models import ClockSetting, ClockState
+from routes.auth import require_admin
+from utils.clock import clock
+from utils.profiler import capture_profile, is_profiling
+from utils.shared_state import is_shared
+from utils.tracing import TimedRoute
+
+router = APIRouter(route_class=TimedRoute)
+
+@router.get("/admin/profile")
+async def capture_process_profile(
+    seconds: float = Query(5.0, gt=0, le=60),
+    format: str = Query("pstats", pattern="^(pstats|text)$"),
+    admin: Dict = Depends(require_admin)
+):
+    """Capture a time-boxed cProfile of the live process and download it"""
+    if is_profiling():
+        raise HTTPException(status_code=409, detail="A profile capture is already running")
+
+    content = await capture_profile(seconds, format)
+    extension = "txt" if format == "text" else "prof"
+    filename = f"swachhgrid-{datetime.now().strftime('%Y%m%d-%H%M%S')}.{extension}"
+    return Response(
+        content=content,
+        media_type="text/plain" if format == "text" else "application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.get("/admin/clock", response_model=ClockState)
+async def get_server_clock(admin: Dict = Depends(require_admin)):
+    """Current server time and how fast it runs"""
+    return {"now": clock.now(), "speed": clock.speed}
+
+@router.put("/admin/clock", response_model=ClockState)
+async def set_server_clock(setting: ClockSetting, admin: Dict = Depends(require_admin)):
+    """Run the server clock faster than wall time, e.g. to match an accelerated simulation"""
+    if setting.speed <= 0:
+        raise HTTPException(status_code=400, detail="speed must be positive")
+    if is_shared():
+        # Each worker has its own clock; the environment is the only setting they all share
+        raise HTTPException(status_code=409, detail="Set CLOCK_SPEED in the environment when running several workers")
+    clock.set(setting.speed, setting.time)
+    return {"now": clock.now(), "speed": clock.speed}
+
+@router.delete("/admin/clock", response_model=ClockState)
+async def reset_server_clock(admin: Dict = Depends(require_admin)):
+    """Follow wall time again"""
+    if is_shared():
+        raise HTTPException(status_code=409, detail="Set CLOCK_SPEED in the environment when running several workers")
+    clock.reset()
+    return {"now": clock.now(), "speed": clock.speed}
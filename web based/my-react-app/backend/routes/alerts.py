@@ -2,8 +2,9 @@ from fastapi import APIRouter, HTTPException
 from typing import List
 from models import Alert
 from database import get_alerts, acknowledge_alert
+from utils.tracing import TimedRoute
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 @router.get("/alerts", response_model=List[Alert])
 async def get_all_alerts():
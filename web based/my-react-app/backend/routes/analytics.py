@@ -0,0 +1,70 @@
+from fastapi import APIRouter, HTTPException, Query
+from datetime import datetime, timedelta
+from typing import List, Optional
+from models import AnalyticsRollup, AnalyticsSummary, CoverageAnalysis
+from database import get_analytics_rollups, get_analytics_summary, get_bins, get_reports
+from utils.clock import clock
+from utils.coverage import analyze_coverage
+from utils.singleflight import coalesced
+from utils.tracing import TimedRoute
+
+router = APIRouter(route_class=TimedRoute)
+
+def _date_range(start: Optional[datetime], end: Optional[datetime], default_days: int):
+    end = end or clock.now()
+    start = start or end - timedelta(days=default_days)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    return start, end
+
+@router.get("/analytics/hourly", response_model=List[AnalyticsRollup])
+async def get_hourly_analytics(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    zone: Optional[str] = None,
+    location_type: Optional[str] = None
+):
+    """Hourly rollups of fill readings, collections and alerts (default: last 24 hours)"""
+    start, end = _date_range(start, end, 1)
+    return get_analytics_rollups("hour", start, end, zone, location_type)
+
+@router.get("/analytics/daily", response_model=List[AnalyticsRollup])
+async def get_daily_analytics(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    zone: Optional[str] = None,
+    location_type: Optional[str] = None
+):
+    """Daily rollups of fill readings, collections and alerts (default: last 30 days)"""
+    start, end = _date_range(start, end, 30)
+    return get_analytics_rollups("day", start, end, zone, location_type)
+
+@router.get("/analytics/summary", response_model=AnalyticsSummary)
+async def get_analytics_totals(
+    start: Optional[datetime] = Query(None, description="Defaults to 30 days before end"),
+    end: Optional[datetime] = None,
+    zone: Optional[str] = None,
+    location_type: Optional[str] = None
+):
+    """Totals and zone / location type distributions over a date range, e.g. a monthly report"""
+    start, end = _date_range(start, end, 30)
+    return get_analytics_summary(start, end, zone, location_type)
+
+@router.get("/analytics/coverage", response_model=CoverageAnalysis)
+async def get_coverage_analysis(
+    top_k: int = Query(5, ge=1, le=100, description="Number of new bin locations to recommend"),
+    walk_radius_m: float = Query(200, ge=25, le=2000),
+    cell_size_m: float = Query(50, ge=10, le=1000),
+    report_days: int = Query(90, ge=1, le=3650, description="Citizen reports from this many days back count as demand")
+):
+    """Walking-distance coverage of the current bins and recommended sites for new ones"""
+    # Truncated to the minute so identical requests in a burst share one analysis
+    report_since = (clock.now() - timedelta(days=report_days)).replace(second=0, microsecond=0)
+
+    def compute():
+        return analyze_coverage(get_bins(), get_reports(), top_k, walk_radius_m, cell_size_m, report_since)
+
+    try:
+        return await coalesced("coverage", (top_k, walk_radius_m, cell_size_m, report_since), compute)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
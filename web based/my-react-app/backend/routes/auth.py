@@ -1,13 +1,43 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, status, Header
+from typing import Dict, Optional
 from models import UserCreate, UserLogin, LoginResponse, User
-from database import create_user, authenticate_user, get_user_by_email, init_demo_users
-import uuid
+from database import create_user, authenticate_user, get_user_by_email, init_demo_users, create_session, get_user_by_token
+from utils.tracing import TimedRoute
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
+
+def get_current_user(authorization: Optional[str] = Header(None)) -> Dict:
+    """Resolve the user from an 'Authorization: Bearer <token>' header"""
+    token = authorization[7:] if authorization and authorization.startswith("Bearer ") else None
+    user = get_user_by_token(token) if token else None
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or missing authentication token"
+        )
+    return user
+
+def require_admin(authorization: Optional[str] = Header(None)) -> Dict:
+    """Only allow users with the admin role"""
+    user = get_current_user(authorization)
+    if user["role"] != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    return user
 
 @router.post("/auth/register", response_model=LoginResponse)
-async def register_user(user_data: UserCreate):
-    """Register a new user"""
+async def register_user(user_data: UserCreate, authorization: Optional[str] = Header(None)):
+    """Register a new user; only an admin session can create admin accounts"""
+    if user_data.role not in ("user", "admin"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Role must be 'user' or 'admin'"
+        )
+    if user_data.role != "user":
+        require_admin(authorization)
+
     # Check if user already exists
     existing_user = get_user_by_email(user_data.email)
     if existing_user:
@@ -19,8 +49,8 @@ async def register_user(user_data: UserCreate):
     # Create new user
     new_user = create_user(user_data.dict())
     
-    # Generate a simple token (in production, use JWT)
-    token = str(uuid.uuid4())
+    # Generate a simple session token (in production, use JWT)
+    token = create_session(new_user["id"])
     
     return LoginResponse(
         user=User(**{k: v for k, v in new_user.items() if k != "password"}),
@@ -39,8 +69,8 @@ async def login_user(login_data: UserLogin):
             detail="Invalid email or password"
         )
     
-    # Generate a simple token (in production, use JWT)
-    token = str(uuid.uuid4())
+    # Generate a simple session token (in production, use JWT)
+    token = create_session(user["id"])
     
     return LoginResponse(
         user=User(**user),
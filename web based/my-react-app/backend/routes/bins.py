@@ -1,15 +1,54 @@
-from fastapi import APIRouter, HTTPException
-from typing import List
-from models import Bin, BinCreate, BinUpdate
-from database import get_bins, get_bin, create_bin, update_bin
+from fastapi import APIRouter, HTTPException, Depends, Request, Query
+from fastapi.responses import StreamingResponse
+from typing import List, Dict, Optional
+from models import Bin, BinCreate, BinUpdate, BulkImportResult
+from database import get_bins, get_bin, create_bin, update_bin, create_bins, get_bins_page, get_urgent_bins
+from routes.auth import require_admin
+from utils.bin_io import (
+    IMPORT_FORMATS, FORMAT_MEDIA_TYPES, format_for_content_type,
+    parse_rows, validate_row, export_header, export_page, export_footer
+)
+from utils.tracing import TimedRoute
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
+
+BULK_BATCH_SIZE = 500  # valid rows inserted per storage call
+EXPORT_PAGE_SIZE = 1000  # bins serialized per streamed chunk
+MAX_REPORTED_ERRORS = 1000
 
 @router.get("/bins", response_model=List[Bin])
 async def get_all_bins():
     """Get all waste bins"""
     return get_bins()
 
+@router.get("/bins/export")
+async def export_bins(format: str = Query("ndjson", pattern="^(csv|ndjson|geojson)$")):
+    """Stream the whole bin registry as CSV, NDJSON or a GeoJSON FeatureCollection"""
+    async def generate():
+        yield export_header(format)
+        offset = 0
+        while True:
+            page = get_bins_page(offset, EXPORT_PAGE_SIZE)
+            if not page:
+                break
+            yield export_page(format, page, first=offset == 0)
+            offset += len(page)
+        yield export_footer(format)
+
+    return StreamingResponse(
+        generate(),
+        media_type=FORMAT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="bins.{format}"'}
+    )
+
+@router.get("/bins/urgent", response_model=List[Bin])
+async def get_most_urgent_bins(
+    k: int = Query(20, ge=1, le=1000),
+    within_hours: Optional[float] = Query(None, gt=0, description="Only bins expected to overflow within this many hours")
+):
+    """Bins closest to overflowing, soonest first; bins with flagged sensors are left out unless they read high"""
+    return get_urgent_bins(k, within_hours)
+
 @router.get("/bins/{bin_id}", response_model=Bin)
 async def get_single_bin(bin_id: str):
     """Get a specific bin by ID"""
@@ -24,6 +63,48 @@ async def create_new_bin(bin_data: BinCreate):
     new_bin = create_bin(bin_data.dict())
     return new_bin
 
+@router.post("/bins/bulk", response_model=BulkImportResult)
+async def bulk_import_bins(
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson|geojson)$"),
+    admin: Dict = Depends(require_admin)
+):
+    """Import bins from a CSV, NDJSON or GeoJSON body, reporting rows that fail validation
+
+    The format comes from the format parameter or the Content-Type header.
+    """
+    fmt = format or format_for_content_type(request.headers.get("content-type", ""))
+    if fmt not in IMPORT_FORMATS:
+        raise HTTPException(status_code=415, detail=f"Send one of: {', '.join(FORMAT_MEDIA_TYPES.values())}")
+
+    bin_ids: List[str] = []
+    errors: List[Dict] = []
+    failed = 0
+    batch: List[Dict] = []
+    async for row, raw in parse_rows(fmt, request.stream()):
+        try:
+            if isinstance(raw, ValueError):
+                raise raw  # the row could not be parsed
+            batch.append(validate_row(raw))
+        except ValueError as e:
+            failed += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({"row": row, "error": str(e)})
+            continue
+        if len(batch) >= BULK_BATCH_SIZE:
+            bin_ids.extend(create_bins(batch))
+            batch = []
+    if batch:
+        bin_ids.extend(create_bins(batch))
+
+    return {
+        "created": len(bin_ids),
+        "failed": failed,
+        "bin_ids": bin_ids,
+        "errors": errors,
+        "errors_truncated": failed > len(errors)
+    }
+
 @router.put("/bins/{bin_id}", response_model=Bin)
 async def update_existing_bin(bin_id: str, update_data: BinUpdate):
     """Update an existing bin"""
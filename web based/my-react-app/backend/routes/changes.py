@@ -0,0 +1,15 @@
+from fastapi import APIRouter, Query
+from models import ChangeFeed
+from utils.changefeed import wait_for_changes
+from utils.tracing import TimedRoute
+
+router = APIRouter(route_class=TimedRoute)
+
+@router.get("/changes", response_model=ChangeFeed)
+async def get_change_feed(
+    since: int = Query(0, ge=0),
+    timeout: float = Query(0, ge=0, le=60, description="Seconds to wait for a change (long-poll)"),
+    limit: int = Query(1000, ge=1, le=5000)
+):
+    """Bin and alert changes after a sequence number"""
+    return await wait_for_changes(since, timeout, limit)
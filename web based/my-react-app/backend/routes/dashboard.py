@@ -1,10 +1,12 @@
 from fastapi import APIRouter
 from models import DashboardStats
 from database import get_dashboard_stats
+from utils.singleflight import coalesced
+from utils.tracing import TimedRoute
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 @router.get("/dashboard/stats", response_model=DashboardStats)
 async def get_dashboard_statistics():
     """Get dashboard statistics"""
-    return get_dashboard_stats()
\ No newline at end of file
+    return await coalesced("dashboard_stats", (), get_dashboard_stats)
\ No newline at end of file
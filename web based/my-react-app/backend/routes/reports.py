@@ -0,0 +1,73 @@
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Query
+from typing import List, Dict, Optional
+from models import ReportCreate, CitizenReport, Incident, ReportSubmission
+from database import (
+    create_report, get_reports, get_report, set_report_images_pending,
+    get_incidents, get_triage_queue, assign_next_incident, resolve_incident
+)
+from routes.auth import require_admin
+from utils.image_processing import submit_report_images
+from utils.tracing import TimedRoute
+
+router = APIRouter(route_class=TimedRoute)
+
+MAX_IMAGES_PER_REPORT = 5
+
+@router.post("/reports", response_model=ReportSubmission)
+async def submit_citizen_report(report_data: ReportCreate):
+    """Submit a citizen report; near-duplicate reports are merged into one incident"""
+    return create_report(report_data.dict())
+
+@router.get("/reports", response_model=List[CitizenReport])
+async def get_all_reports(incident_id: Optional[str] = None):
+    """Get citizen reports, optionally for a single incident"""
+    return get_reports(incident_id)
+
+@router.get("/reports/{report_id}", response_model=CitizenReport)
+async def get_single_report(report_id: str):
+    """Get a specific citizen report by ID"""
+    report = get_report(report_id)
+    if not report:
+        raise HTTPException(status_code=404, detail="Report not found")
+    return report
+
+@router.post("/reports/{report_id}/images", response_model=CitizenReport, status_code=202)
+async def upload_report_images(report_id: str, files: List[UploadFile] = File(...)):
+    """Attach images to a report; they are resized in the background"""
+    report = get_report(report_id)
+    if not report:
+        raise HTTPException(status_code=404, detail="Report not found")
+    first_index = len(report["image_urls"]) + report["images_pending"]
+    if first_index + len(files) > MAX_IMAGES_PER_REPORT:
+        raise HTTPException(status_code=400, detail=f"A report can have at most {MAX_IMAGES_PER_REPORT} images")
+
+    images = [await f.read() for f in files]
+    report = set_report_images_pending(report_id, len(images))
+    submit_report_images(report_id, first_index, images)
+    return report
+
+@router.get("/incidents", response_model=List[Incident])
+async def get_all_incidents(status: Optional[str] = None):
+    """Get incidents, optionally filtered by status"""
+    return get_incidents(status)
+
+@router.get("/incidents/triage", response_model=List[Incident])
+async def get_incident_triage_queue(limit: int = Query(20, ge=1, le=200)):
+    """Open incidents ordered by priority, report count and age"""
+    return get_triage_queue(limit)
+
+@router.post("/incidents/triage/next", response_model=Incident)
+async def assign_next_triage_incident(admin: Dict = Depends(require_admin)):
+    """Assign the most urgent open incident to the calling admin"""
+    incident = assign_next_incident(admin["name"])
+    if not incident:
+        raise HTTPException(status_code=404, detail="No open incidents")
+    return incident
+
+@router.put("/incidents/{incident_id}/resolve", response_model=Incident)
+async def resolve_reported_incident(incident_id: str, admin: Dict = Depends(require_admin)):
+    """Resolve an incident"""
+    incident = resolve_incident(incident_id)
+    if not incident:
+        raise HTTPException(status_code=404, detail="Incident not found")
+    return incident
@@ -1,10 +1,74 @@
-from fastapi import APIRouter
-from models import RouteOptimization
+from fastapi import APIRouter, HTTPException, Depends, Query
+from typing import Dict, Hashable, Optional
+from models import RouteOptimization, RoutePlan, PlannedRoute
+from database import get_route_plan, get_planned_route, get_latest_change_seq
+from routes.auth import require_admin
 from utils.route_optimizer import optimize_collection_route
+from utils.clock import clock
+from utils.planner import run_planner_now
+from utils.polyline import DEFAULT_PRECISION, geometry_cache
+from utils.singleflight import coalesced
+from utils.tracing import TimedRoute
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
+
+class GeometryParams:
+    """How route geometry is sent: as [lat, lng] pairs or as an encoded polyline"""
+
+    def __init__(
+        self,
+        geometry: str = Query("coordinates", pattern="^(coordinates|polyline)$"),
+        precision: int = Query(DEFAULT_PRECISION, ge=1, le=7, description="Polyline decimal places"),
+        zoom: Optional[int] = Query(None, ge=0, le=22, description="Simplify the polyline for this map zoom")
+    ):
+        self.geometry = geometry
+        self.precision = precision
+        self.zoom = zoom
+
+    def apply(self, route: Dict, key: Hashable) -> Dict:
+        """The route with its geometry in the requested form; key names one version of it"""
+        if self.geometry == "coordinates":
+            return route
+        # Route geometry runs from stop to stop, and the client draws the line through
+        # every bin to visit, so only vertices between stops may be simplified away
+        stops = range(len(route["coordinates"]))
+        return {
+            **route,
+            "coordinates": [],
+            "polyline": geometry_cache.polyline(key, route["coordinates"], self.precision, self.zoom, stops),
+            "polyline_precision": self.precision
+        }
+
+def _optimize_versioned():
+    # Labelled with the version it started from, which identifies the route for the geometry cache
+    return get_latest_change_seq(), optimize_collection_route()
 
 @router.get("/route/optimize", response_model=RouteOptimization)
-async def optimize_collection_route_endpoint():
+async def optimize_collection_route_endpoint(geometry: GeometryParams = Depends()):
     """Optimize collection route for waste bins"""
-    return optimize_collection_route()
\ No newline at end of file
+    version, route = await coalesced("route_optimize", (), _optimize_versioned)
+    return geometry.apply(route.dict(), ("optimize", version))
+
+@router.get("/routes/today", response_model=RoutePlan)
+async def get_todays_route_plan(geometry: GeometryParams = Depends()):
+    """Get the precomputed route plan for today's shift"""
+    plan = get_route_plan(clock.now().date().isoformat())
+    if not plan:
+        raise HTTPException(status_code=404, detail="No route plan for today")
+    return {
+        **plan,
+        "routes": [geometry.apply(r, ("plan", r["plan_version"], r["vehicle_id"])) for r in plan["routes"]]
+    }
+
+@router.get("/routes/today/{vehicle_id}", response_model=PlannedRoute)
+async def get_todays_vehicle_route(vehicle_id: str, geometry: GeometryParams = Depends()):
+    """Get one vehicle's precomputed route for today's shift"""
+    route = get_planned_route(clock.now().date().isoformat(), vehicle_id)
+    if not route:
+        raise HTTPException(status_code=404, detail="No planned route for this vehicle today")
+    return geometry.apply(route, ("plan", route["plan_version"], vehicle_id))
+
+@router.post("/routes/plan", response_model=RoutePlan)
+async def plan_next_shift(admin: Dict = Depends(require_admin)):
+    """Run the batch route planner for the next shift immediately"""
+    return await run_planner_now()
@@ -0,0 +1,12 @@
+from fastapi import APIRouter
+from typing import List
+from models import SensorHealth
+from database import get_sensor_health
+from utils.tracing import TimedRoute
+
+router = APIRouter(route_class=TimedRoute)
+
+@router.get("/sensors/health", response_model=List[SensorHealth])
+async def get_sensor_health_report(flagged_only: bool = True):
+    """Rolling fill sensor statistics, by default only for bins with stuck, noisy, jump or silent flags"""
+    return get_sensor_health(flagged_only)
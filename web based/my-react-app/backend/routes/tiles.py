@@ -0,0 +1,13 @@
+from fastapi import APIRouter, HTTPException, Path
+from models import MapTile
+from database import get_tile
+from utils.tracing import TimedRoute
+
+router = APIRouter(route_class=TimedRoute)
+
+@router.get("/tiles/{z}/{x}/{y}", response_model=MapTile)
+async def get_map_tile(z: int = Path(..., ge=0, le=22), x: int = Path(..., ge=0), y: int = Path(..., ge=0)):
+    """Bin marker clusters and fill level heatmap for a Web Mercator (XYZ) tile"""
+    if x >= 2 ** z or y >= 2 ** z:
+        raise HTTPException(status_code=404, detail="Tile out of range")
+    return get_tile(z, x, y)
@@ -0,0 +1,22 @@
+from fastapi import APIRouter, HTTPException, Depends, Query
+from typing import Dict, Optional
+from models import UserPage
+from database import search_users
+from routes.auth import require_admin
+from utils.tracing import TimedRoute
+
+router = APIRouter(route_class=TimedRoute)
+
+@router.get("/users", response_model=UserPage)
+async def list_users(
+    q: str = Query("", max_length=100, description="Prefix of a name, a later name word or an email"),
+    role: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    admin: Dict = Depends(require_admin)
+):
+    """Browse users by name, or search them as you type"""
+    try:
+        return search_users(q, role, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
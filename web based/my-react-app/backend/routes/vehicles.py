@@ -0,0 +1,65 @@
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
+from typing import List, Dict
+import json
+from models import VehiclePing, VehiclePingBatch, VehicleRouteAssign, VehicleStatus
+from database import assign_vehicle_route, record_vehicle_pings, get_vehicles, get_vehicle, get_vehicle_trail
+from utils.tracing import TimedRoute
+
+router = APIRouter(route_class=TimedRoute)
+
+async def ingest_pings(vehicle_id: str, pings: List[VehiclePing]) -> Dict:
+    """Record pings; ETA and collection updates reach WebSocket clients with the next change tick"""
+    return record_vehicle_pings(vehicle_id, [p.dict() for p in pings])["status"]
+
+@router.get("/vehicles", response_model=List[VehicleStatus])
+async def get_all_vehicles():
+    """Get the live status of every tracked vehicle"""
+    return get_vehicles()
+
+@router.get("/vehicles/{vehicle_id}", response_model=VehicleStatus)
+async def get_single_vehicle(vehicle_id: str):
+    """Get a vehicle's position, route progress and stop ETAs"""
+    vehicle = get_vehicle(vehicle_id)
+    if not vehicle:
+        raise HTTPException(status_code=404, detail="Vehicle not found")
+    return vehicle
+
+@router.get("/vehicles/{vehicle_id}/trail", response_model=List[VehiclePing])
+async def get_vehicle_ping_trail(vehicle_id: str):
+    """Get the recent pings kept in the vehicle's ring buffer"""
+    trail = get_vehicle_trail(vehicle_id)
+    if trail is None:
+        raise HTTPException(status_code=404, detail="Vehicle not found")
+    return trail
+
+@router.put("/vehicles/{vehicle_id}/route", response_model=VehicleStatus)
+async def assign_route_to_vehicle(vehicle_id: str, route: VehicleRouteAssign):
+    """Assign the planned sequence of bins a vehicle will collect"""
+    vehicle = assign_vehicle_route(vehicle_id, route.bin_ids)
+    if not vehicle:
+        raise HTTPException(status_code=404, detail="Route contains unknown bins")
+    return vehicle
+
+@router.post("/vehicles/{vehicle_id}/pings", response_model=VehicleStatus)
+async def post_vehicle_pings(vehicle_id: str, batch: VehiclePingBatch):
+    """Ingest a batch of GPS pings from a vehicle"""
+    return await ingest_pings(vehicle_id, batch.pings)
+
+@router.websocket("/vehicles/{vehicle_id}/stream")
+async def vehicle_ping_stream(websocket: WebSocket, vehicle_id: str):
+    """Ingest GPS pings over a WebSocket, one ping or a list of pings per message"""
+    await websocket.accept()
+    try:
+        while True:
+            data = await websocket.receive_text()
+            try:
+                payload = json.loads(data)
+                items = payload if isinstance(payload, list) else [payload]
+                pings = [VehiclePing(**item) for item in items]
+            except (ValueError, TypeError, ValidationError):
+                await websocket.send_text(json.dumps({"error": "Invalid ping"}))
+                continue
+            await ingest_pings(vehicle_id, pings)
+    except WebSocketDisconnect:
+        pass
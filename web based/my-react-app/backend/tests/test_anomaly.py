@@ -0,0 +1,52 @@
+from datetime import datetime, timedelta
+
+from database import create_bin, get_bins_due_for_collection, update_bin
+from utils.anomaly import AnomalyDetector, STUCK_AFTER
+
+T0 = datetime(2024, 1, 1, 6, 0)
+
+def _detector(*readings: float) -> AnomalyDetector:
+    detector = AnomalyDetector(20.0)
+    detector.track("b", None, T0)
+    for minutes, value in enumerate(readings):
+        detector.observe("b", value, T0 + timedelta(minutes=minutes))
+    return detector
+
+def test_fast_rise_is_not_a_jump():
+    assert _detector(15.1, 96.0).flags("b") == []
+
+def test_drop_without_collection_is_a_jump_until_readings_agree():
+    assert _detector(80.0, 50.0).flags("b") == ["jump"]
+    assert _detector(80.0, 50.0, 51.0, 52.0).flags("b") == ["jump"]
+    assert _detector(80.0, 50.0, 51.0, 52.0, 53.0).flags("b") == []
+
+def test_drop_to_empty_is_a_collection():
+    assert _detector(85.0, 2.0, 4.0).flags("b") == []
+
+def test_reading_out_of_range_is_a_jump():
+    assert _detector(40.0, 140.0).flags("b") == ["jump"]
+    assert _detector(40.0, -5.0).flags("b") == ["jump"]
+
+def test_full_bin_is_not_stuck():
+    detector = AnomalyDetector(20.0)
+    detector.track("b", None, T0)
+    for hours in range(0, int(STUCK_AFTER.total_seconds() // 3600) + 6):
+        detector.observe("b", 100.0, T0 + timedelta(hours=hours))
+    assert detector.flags("b") == []
+
+def test_filling_fast_bin_stays_routed():
+    bin_data = create_bin({"name": "Fast filler", "latitude": 40.72, "longitude": -73.99, "capacity": 100, "location_type": "street"})
+    for fill_level in (15.1, 96.0, 97.0):
+        update_bin(bin_data["id"], {"fill_level": fill_level})
+    assert bin_data["sensor_flags"] == []
+    assert bin_data["id"] in [b["id"] for b in get_bins_due_for_collection()]
+
+def test_flagged_bin_reading_high_stays_routed():
+    high, low = (create_bin({"name": name, "latitude": 40.72, "longitude": -73.98, "capacity": 100, "location_type": "street"})
+                 for name in ("Flagged high", "Flagged low"))
+    for bin_data, (first, second) in ((high, (100.0, 80.0)), (low, (60.0, 30.0))):
+        update_bin(bin_data["id"], {"fill_level": first})
+        update_bin(bin_data["id"], {"fill_level": second})
+        assert bin_data["sensor_flags"] == ["jump"]
+    due = [b["id"] for b in get_bins_due_for_collection()]
+    assert high["id"] in due and low["id"] not in due
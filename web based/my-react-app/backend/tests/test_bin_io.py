@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+
+from utils.bin_io import parse_rows, validate_row
+
+HEADER = "name,latitude,longitude,capacity,location_type,description\n"
+
+async def _chunks(body: bytes, size: int):
+    for start in range(0, len(body), size):
+        yield body[start:start + size]
+
+def parse(fmt: str, text: str, size: int = 7):
+    """All (row, raw) pairs, fed in small chunks so lines and quotes split across them"""
+    async def collect():
+        return [pair async for pair in parse_rows(fmt, _chunks(text.encode(), size))]
+    return asyncio.run(collect())
+
+def test_quoted_field_may_span_lines():
+    rows = parse("csv", HEADER + 'Corner,40.7,-74.0,100,street,"first line\nsecond, with comma\n\nfourth"\n'
+                 "Park,40.8,-73.9,200,park,plain\n")
+    assert [row for row, _ in rows] == [1, 2]
+    assert rows[0][1]["description"] == "first line\nsecond, with comma\n\nfourth"
+    assert rows[1][1]["name"] == "Park"
+
+def test_escaped_quotes_do_not_open_a_field():
+    rows = parse("csv", HEADER + 'Corner,40.7,-74.0,100,street,"the ""big"" one"\n'
+                 '"Say ""hi""",40.8,-73.9,200,park,\n')
+    assert rows[0][1]["description"] == 'the "big" one'
+    assert rows[1][1]["name"] == 'Say "hi"'
+    assert "description" not in rows[1][1]
+
+def test_crlf_and_byte_order_mark():
+    rows = parse("csv", "﻿" + HEADER.replace("\n", "\r\n") + "Corner,40.7,-74.0,100,street,x\r\n")
+    assert rows == [(1, {"name": "Corner", "latitude": "40.7", "longitude": "-74.0", "capacity": "100",
+                         "location_type": "street", "description": "x"})]
+
+def test_column_count_errors_keep_row_numbers():
+    rows = parse("csv", HEADER + "Corner,40.7,-74.0\n\n" + "Park,40.8,-73.9,200,park,plain\n")
+    assert rows[0][0] == 1 and str(rows[0][1]) == "Expected 6 columns, got 3"
+    assert rows[1][0] == 2 and rows[1][1]["name"] == "Park"
+
+def test_unterminated_quote_is_reported_after_the_last_row():
+    rows = parse("csv", HEADER + "Park,40.8,-73.9,200,park,plain\n" + 'Corner,40.7,-74.0,100,street,"open\n')
+    assert rows[0][1]["name"] == "Park"
+    assert rows[1][0] == 2 and str(rows[1][1]) == "Unterminated quoted field"
+
+def test_invalid_ndjson_line_is_reported_and_skipped():
+    rows = parse("ndjson", '{"name": "Corner"}\n\nnot json\n'
+                 '{"type": "Feature", "geometry": {"type": "Point", "coordinates": [-74.0, 40.7]}, '
+                 '"properties": {"name": "Park"}}\n')
+    assert rows[0] == (1, {"name": "Corner"})
+    assert rows[1][0] == 2 and str(rows[1][1]).startswith("Invalid JSON line")
+    assert rows[2] == (3, {"name": "Park", "latitude": 40.7, "longitude": -74.0})
+
+def test_geojson_rejects_non_point_features():
+    rows = parse("geojson", '{"type": "FeatureCollection", "features": ['
+                 '{"type": "Feature", "geometry": {"type": "LineString", "coordinates": []}}]}')
+    assert rows[0][0] == 1 and str(rows[0][1]) == "Feature geometry must be a Point"
+
+def test_validate_row_messages_name_the_field():
+    raw = {"name": "Corner", "latitude": "40.7", "longitude": "-74.0", "capacity": "100", "location_type": "street"}
+    assert validate_row(raw)["capacity"] == 100
+    with pytest.raises(ValueError, match="^latitude: must be between -90 and 90$"):
+        validate_row({**raw, "latitude": "91"})
+    with pytest.raises(ValueError, match="^capacity: must be positive$"):
+        validate_row({**raw, "capacity": "0"})
+    with pytest.raises(ValueError, match="^longitude: "):
+        validate_row({**raw, "longitude": "west"})
@@ -0,0 +1,38 @@
+import time
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+
+from database import create_bin, sensor_monitor, sweep_silent_sensors, update_bin
+from main import app
+from utils.anomaly import SILENT_AFTER
+from utils.clock import ServerClock, clock
+
+def test_accelerated_clock_runs_at_its_speed():
+    accelerated = ServerClock(1.0, time.time())
+    accelerated.set(3600.0, datetime(2024, 1, 1))
+    time.sleep(0.05)
+    assert accelerated.now() - datetime(2024, 1, 1) >= timedelta(minutes=3)
+
+def test_silent_sensor_is_flagged_in_server_time():
+    bin_data = create_bin({"name": "Quiet", "latitude": 40.74, "longitude": -73.99, "capacity": 100, "location_type": "park"})
+    update_bin(bin_data["id"], {"fill_level": 20.0})
+    try:
+        clock.set(1.0, clock.now() + SILENT_AFTER + timedelta(minutes=1))
+        assert bin_data["id"] in sweep_silent_sensors()
+        assert "silent" in sensor_monitor.flags(bin_data["id"])
+    finally:
+        clock.reset()
+
+def test_clock_endpoint_needs_admin_and_positive_speed():
+    client = TestClient(app)
+    client.post("/api/auth/init-demo-users")
+    token = client.post("/api/auth/login", json={"email": "admin@swachhgrid.com", "password": "admin123"}).json()["token"]
+    admin = {"Authorization": f"Bearer {token}"}
+    try:
+        assert client.put("/api/admin/clock", json={"speed": 60}).status_code in (401, 403)
+        assert client.put("/api/admin/clock", json={"speed": 0}, headers=admin).status_code == 400
+        response = client.put("/api/admin/clock", json={"speed": 60}, headers=admin)
+        assert response.status_code == 200 and response.json()["speed"] == 60
+    finally:
+        clock.reset()
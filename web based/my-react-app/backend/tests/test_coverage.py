@@ -0,0 +1,34 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from utils.coverage import DEMAND_SPREAD_M, _Grid, analyze_coverage
+
+NOW = datetime(2024, 1, 1, 12, 0)
+# Two bins about 2.5 km apart, the western one a little further north, so the
+# east edge of each row of the grid sits next to demand at the west edge of the next
+BINS = [
+    {"latitude": lat, "longitude": lng, "capacity": 240, "fill_level": 50.0, "last_updated": NOW,
+     "predicted_full_time": NOW + timedelta(hours=10), "sensor_flags": []}
+    for lat, lng in ((40.7000, -74.0000), (40.6995, -73.9700))
+]
+
+def test_interior_excludes_padding_on_every_side():
+    grid = _Grid([(40.70, -74.00), (40.71, -73.99)], 50, 200)
+    for row in range(grid.rows):
+        for col in range(grid.cols):
+            inside = grid.pad <= row < grid.rows - grid.pad and grid.pad <= col < grid.cols - grid.pad
+            assert grid.interior(row * grid.cols + col) == inside
+
+def test_recommendations_stay_within_the_service_area():
+    result = analyze_coverage(BINS, [], 100, 200, 50)
+    grid = _Grid([(b["latitude"], b["longitude"]) for b in BINS], 50, max(DEMAND_SPREAD_M, 200))
+    assert result["recommendations"]
+    for site in result["recommendations"]:
+        assert grid.interior(grid.index(site["latitude"], site["longitude"]))
+        assert site["demand_covered"] <= result["total_demand"]
+
+def test_oversized_area_is_rejected():
+    far = dict(BINS[0], latitude=BINS[0]["latitude"] + 0.5)
+    with pytest.raises(ValueError):
+        analyze_coverage([BINS[0], far], [], 5, 200, 10)
@@ -0,0 +1,36 @@
+from fastapi.testclient import TestClient
+
+from database import create_bin, update_bin
+from main import app
+from utils.polyline import decode, encode, simplify
+
+# A straight street with a slight kink at index 2 and bins at 0, 3 and 5
+STREET = [[40.7000, -74.0000], [40.7001, -74.0000], [40.70020, -73.99999], [40.7003, -74.0000],
+          [40.7004, -74.0000], [40.7005, -74.0000]]
+
+def test_encode_matches_reference_example():
+    # The worked example from the encoded polyline algorithm format description
+    assert encode([[38.5, -120.2], [40.7, -120.95], [43.252, -126.453]]) == "_p~iF~ps|U_ulLnnqC_mqNvxq`@"
+
+def test_round_trip_at_each_precision():
+    points = [[40.712776, -74.005974], [-33.868820, 151.209290], [0.0, 0.0], [89.999999, -179.999999]]
+    for precision in (5, 6, 7):
+        decoded = decode(encode(points, precision), precision)
+        assert len(decoded) == len(points)
+        for (lat, lng), (d_lat, d_lng) in zip(points, decoded):
+            assert abs(lat - d_lat) <= 10 ** -precision and abs(lng - d_lng) <= 10 ** -precision
+
+def test_simplify_drops_vertices_between_stops_only():
+    assert simplify(STREET, 50.0) == [STREET[0], STREET[-1]]
+    assert simplify(STREET, 50.0, keep=[3]) == [STREET[0], STREET[3], STREET[-1]]
+
+def test_route_polyline_keeps_every_stop():
+    for n in range(8):
+        bin_data = create_bin({"name": f"Stop {n}", "latitude": 40.76 + n * 0.0001, "longitude": -73.97,
+                               "capacity": 100, "location_type": "street"})
+        update_bin(bin_data["id"], {"fill_level": 95.0})
+    client = TestClient(app)
+    plain = client.get("/api/route/optimize").json()
+    encoded = client.get("/api/route/optimize", params={"geometry": "polyline", "zoom": 3}).json()
+    assert encoded["coordinates"] == []
+    assert len(decode(encoded["polyline"], encoded["polyline_precision"])) == len(plain["bin_ids"])
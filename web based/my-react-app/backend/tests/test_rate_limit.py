@@ -0,0 +1,15 @@
+from fastapi.testclient import TestClient
+
+from main import app
+
+def test_rate_limited_response_carries_cors_headers():
+    client = TestClient(app)
+    origin = {"Origin": "http://localhost:3000"}
+    statuses = [
+        client.post("/api/auth/login", json={"email": "nobody@example.com", "password": "wrong"}, headers=origin)
+        for _ in range(10)
+    ]
+    rejected = next(r for r in statuses if r.status_code == 429)
+    assert rejected.headers["Retry-After"]
+    assert rejected.headers["Access-Control-Allow-Origin"] in ("*", origin["Origin"])
+    assert "retry-after" in rejected.headers["Access-Control-Expose-Headers"].lower()
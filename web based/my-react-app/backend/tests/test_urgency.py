@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta
+
+from database import create_bin, get_urgent_bins, update_bin
+from utils.urgency import FillRateEstimator, overflow_time
+
+T0 = datetime(2024, 1, 1, 6, 0)
+
+def _new_bin(name: str) -> dict:
+    return create_bin({"name": name, "latitude": 40.71, "longitude": -74.0, "capacity": 100, "location_type": "street"})
+
+def test_full_time_follows_fill_rate():
+    rates = FillRateEstimator(6)
+    rates.track("b", 0.0, T0)
+    assert rates.observe("b", 10.0, T0 + timedelta(hours=2)) == T0 + timedelta(hours=20)
+
+def test_collection_recomputes_full_time_from_empty():
+    rates = FillRateEstimator(6)
+    rates.track("b", 0.0, T0)
+    rates.observe("b", 50.0, T0 + timedelta(hours=10))
+    # Emptying keeps the rate of 5 points per hour but starts again from 0
+    assert rates.observe("b", 0.0, T0 + timedelta(hours=11)) == T0 + timedelta(hours=31)
+
+def test_bin_not_filling_has_no_full_time():
+    rates = FillRateEstimator(6)
+    rates.track("b", 40.0, T0)
+    assert rates.observe("b", 40.0, T0 + timedelta(hours=1)) is None
+
+def test_only_a_full_bin_overflows_now():
+    stale = T0 - timedelta(days=1)
+    assert overflow_time({"fill_level": 30.0, "last_updated": T0, "predicted_full_time": stale}) == stale.timestamp()
+    assert overflow_time({"fill_level": 100.0, "last_updated": T0, "predicted_full_time": None}) == T0.timestamp()
+
+def test_nearly_full_bin_is_urgent():
+    bin_data = _new_bin("Nearly full")
+    update_bin(bin_data["id"], {"fill_level": 98.0})
+    assert bin_data["id"] in [b["id"] for b in get_urgent_bins(1000, within_hours=24)]
+
+def test_emptied_bin_is_not_ranked_first():
+    emptied, full = _new_bin("Emptied"), _new_bin("Full")
+    update_bin(emptied["id"], {"fill_level": 90.0})
+    # A prediction left over from before the collection must not count
+    emptied["predicted_full_time"] = datetime.now() - timedelta(days=1)
+    update_bin(emptied["id"], {"fill_level": 0.0})
+    update_bin(full["id"], {"fill_level": 98.0})
+
+    assert emptied["predicted_full_time"] > emptied["last_updated"]
+    ranked = [b["id"] for b in get_urgent_bins(1000)]
+    assert ranked.index(full["id"]) < ranked.index(emptied["id"])
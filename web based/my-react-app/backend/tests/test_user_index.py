@@ -0,0 +1,45 @@
+import pytest
+
+from utils.user_index import UserIndex, decode_cursor, encode_cursor
+
+USERS = [
+    {"id": "u1", "name": "Sita Ram", "email": "sita@example.com", "role": "driver"},
+    {"id": "u2", "name": "Ram Das", "email": "ramdas@example.com", "role": "admin"},
+    {"id": "u3", "name": "Rama  Krishnan", "email": "rk@example.com", "role": "driver"},
+    {"id": "u4", "name": "Ravi Rao", "email": "ravi@example.com", "role": "driver"},
+]
+
+def make_index():
+    index = UserIndex()
+    for user in USERS:
+        index.add(user)
+    return index
+
+def test_prefix_matches_later_words_and_lists_each_user_once():
+    user_ids, after = make_index().search("RAM", None, 10)
+    # In term order: "ram" (from Sita Ram), "ram das", "rama krishnan"; Ram Das
+    # also matches through the email but appears once
+    assert user_ids == ["u1", "u2", "u3"]
+    assert after is None
+
+def test_role_filter():
+    assert make_index().search("ram", "driver", 10)[0] == ["u1", "u3"]
+    assert make_index().search("ram", "dispatcher", 10)[0] == []
+
+def test_cursor_pages_through_every_match_once():
+    index = make_index()
+    seen, after = [], None
+    while True:
+        user_ids, after = index.search("r", None, 1, after=decode_cursor(encode_cursor(after)) if after else None)
+        seen.extend(user_ids)
+        if after is None:
+            break
+    assert sorted(seen) == ["u1", "u2", "u3", "u4"]
+    assert len(seen) == len(set(seen))
+
+def test_cursor_round_trip_and_rejects_garbage():
+    key = ("sita ram", "u1")
+    assert decode_cursor(encode_cursor(key)) == key
+    for cursor in ("!!!", "bm90IGpzb24", encode_cursor([1, 2]).rstrip("=")):
+        with pytest.raises(ValueError, match="Invalid cursor"):
+            decode_cursor(cursor)
@@ -0,0 +1,19 @@
+from datetime import datetime, timedelta
+
+from database import assign_vehicle_route, create_bin, record_vehicle_pings, sensor_monitor, update_bin
+
+def test_collection_resets_prediction_and_sensor_baseline():
+    bin_data = create_bin({"name": "On route", "latitude": 40.7301, "longitude": -73.9901, "capacity": 100, "location_type": "street"})
+    update_bin(bin_data["id"], {"fill_level": 90.0})
+    stale = bin_data["predicted_full_time"]
+
+    assign_vehicle_route("truck-collect", [bin_data["id"]])
+    result = record_vehicle_pings("truck-collect", [{"latitude": 40.7301, "longitude": -73.9901, "timestamp": datetime.now()}])
+
+    assert result["collected"] == [bin_data["id"]]
+    assert bin_data["fill_level"] == 0.0
+    assert bin_data["predicted_full_time"] > stale
+    assert sensor_monitor.health(bin_data["id"])["last_value"] == 0.0
+    # The next reading is compared with the empty bin
+    update_bin(bin_data["id"], {"fill_level": 3.0})
+    assert bin_data["sensor_flags"] == []
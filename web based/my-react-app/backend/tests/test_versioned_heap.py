@@ -0,0 +1,43 @@
+from utils.versioned_heap import VersionedHeap
+
+def test_push_again_replaces_the_key():
+    heap = VersionedHeap()
+    heap.push("a", (3.0,))
+    heap.push("b", (2.0,))
+    heap.push("a", (1.0,))
+    assert len(heap) == 2
+    assert heap.pop() == "a"
+    assert heap.pop() == "b"
+    assert heap.pop() is None
+
+def test_discarded_item_is_skipped():
+    heap = VersionedHeap()
+    heap.push("a", (1.0,))
+    heap.push("b", (2.0,))
+    heap.discard("a")
+    assert "a" not in heap
+    assert heap.pop() == "b"
+
+def test_readded_item_does_not_revive_its_old_entry():
+    heap = VersionedHeap()
+    heap.push("a", (1.0,))
+    heap.discard("a")
+    heap.push("b", (2.0,))
+    heap.push("a", (3.0,))
+    assert heap.smallest(5) == ["b", "a"]
+
+def test_smallest_leaves_items_in_place_and_respects_max_first():
+    heap = VersionedHeap()
+    for n, item in enumerate("edcba"):
+        heap.push(item, (float(n), item))
+    assert heap.smallest(2) == ["e", "d"]
+    assert heap.smallest(10, max_first=2.0) == ["e", "d", "c"]
+    assert len(heap) == 5
+    assert [heap.pop() for _ in range(5)] == list("edcba")
+
+def test_stale_entries_are_compacted():
+    heap = VersionedHeap()
+    for n in range(500):
+        heap.push("a", (float(n),))
+    assert len(heap.heap) <= 2 * len(heap) + 65
+    assert heap.pop() == "a" and heap.pop() is None
@@ -0,0 +1,194 @@
+import asyncio
+import logging
+import math
+import os
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+
+from utils.clock import clock
+
+logger = logging.getLogger("swachhgrid.sensors")
+
+# A reading that has not changed for this long means the sensor is stuck
+STUCK_AFTER = timedelta(hours=float(os.getenv("SENSOR_STUCK_HOURS", "12")))
+# No reading for this long means the sensor is silent
+SILENT_AFTER = timedelta(hours=float(os.getenv("SENSOR_SILENT_HOURS", "6")))
+SWEEP_INTERVAL_SECONDS = float(os.getenv("SENSOR_SWEEP_SECONDS", "300"))
+# Waste does not disappear between collections, so a larger drop is impossible
+# unless it empties the bin; smaller drops are compaction or sensor noise
+JUMP_TOLERANCE = 15.0
+# A drop to this level or below is a collection
+EMPTIED_LEVEL = float(os.getenv("SENSOR_EMPTIED_LEVEL", "10"))
+JUMP_CLEAR_READINGS = 3  # readings agreeing with the new level needed before a jump flag is dropped
+# Standard deviation of reading-to-reading changes above which a sensor is noisy
+NOISE_STDDEV = float(os.getenv("SENSOR_NOISE_STDDEV", "12"))
+NOISE_ALPHA = 0.1  # weight of the newest change in the rolling statistics
+MIN_READINGS = 5  # stuck and noisy need this many readings of history
+STUCK_EPSILON = 0.5
+# A full bin reads the same until it is collected, so an unchanged reading here is not stuck
+FULL_LEVEL = 100.0
+
+FLAG_ALERTS = {
+    "stuck": ("high", "🔧 SENSOR: Bin {name} has reported {value}% without change since {since}"),
+    "noisy": ("medium", "🔧 SENSOR: Bin {name} reports erratic fill levels"),
+    "jump": ("high", "🔧 SENSOR: Bin {name} reported an impossible fill level change to {value}%"),
+    "silent": ("high", "🔧 SENSOR: Bin {name} has not reported since {since}"),
+}
+
+class SensorStats:
+    """Rolling statistics for one bin's fill sensor, updated in O(1) per reading.
+
+    Reading-to-reading changes feed an exponentially weighted form of
+    Welford's mean/variance update, so old behaviour fades out.
+    """
+
+    __slots__ = ("readings", "delta_mean", "delta_var", "last_value", "last_reading_at",
+                 "last_change_at", "plausible_streak", "flags")
+
+    def __init__(self, value: Optional[float], at: datetime):
+        self.readings = 0
+        self.delta_mean = 0.0
+        self.delta_var = 0.0
+        self.last_value = value
+        self.last_reading_at = at
+        self.last_change_at = at
+        self.plausible_streak = 0
+        self.flags: Set[str] = set()
+
+    def add_delta(self, delta: float):
+        diff = delta - self.delta_mean
+        increment = NOISE_ALPHA * diff
+        self.delta_mean += increment
+        self.delta_var = (1 - NOISE_ALPHA) * (self.delta_var + diff * increment)
+
+    @property
+    def delta_stddev(self) -> float:
+        return math.sqrt(self.delta_var)
+
+class AnomalyDetector:
+    """Flags stuck, noisy, impossible-jump and silent fill sensors as readings arrive"""
+
+    def __init__(self, collection_drop: float):
+        self.collection_drop = collection_drop
+        self.sensors: Dict[str, SensorStats] = {}
+        # Bins ordered from least to most recently heard, so a silence sweep
+        # stops at the first bin heard from recently
+        self.last_heard: "OrderedDict[str, datetime]" = OrderedDict()
+
+    def track(self, bin_id: str, value: Optional[float], at: datetime):
+        """Start watching a bin; without a value its first reading becomes the baseline"""
+        self.sensors[bin_id] = SensorStats(value, at)
+        self.last_heard[bin_id] = at
+        self.last_heard.move_to_end(bin_id)
+
+    def observe(self, bin_id: str, value: float, at: datetime) -> Tuple[Set[str], Set[str]]:
+        """Update a bin's statistics with a reading; returns (flags raised, flags cleared)"""
+        stats = self.sensors.get(bin_id)
+        if stats is None:
+            self.track(bin_id, value, at)
+            return set(), set()
+        before = set(stats.flags)
+        self.last_heard[bin_id] = at
+        self.last_heard.move_to_end(bin_id)
+        stats.flags.discard("silent")
+        if stats.last_value is None:
+            stats.last_value = value
+            stats.last_reading_at = stats.last_change_at = at
+            return stats.flags - before, before - stats.flags
+        stats.readings += 1
+
+        delta = value - stats.last_value
+        if not 0 <= value <= 100:
+            # Later readings are compared with the last plausible one
+            stats.flags.add("jump")
+            stats.plausible_streak = 0
+            return stats.flags - before, before - stats.flags
+        collection = self.is_collection(stats.last_value, value)
+        if delta < -JUMP_TOLERANCE and not collection:
+            # Later readings are compared with the new level; the flag clears once they agree
+            stats.flags.add("jump")
+            stats.plausible_streak = 0
+            stats.last_value = value
+            stats.last_reading_at = stats.last_change_at = at
+            return stats.flags - before, before - stats.flags
+
+        stats.plausible_streak += 1
+        if stats.plausible_streak >= JUMP_CLEAR_READINGS:
+            stats.flags.discard("jump")
+
+        if not collection:
+            # Collections are expected drops and say nothing about sensor noise
+            stats.add_delta(delta)
+        if stats.readings >= MIN_READINGS:
+            if stats.delta_stddev > NOISE_STDDEV:
+                stats.flags.add("noisy")
+            elif stats.delta_stddev < NOISE_STDDEV / 2:
+                stats.flags.discard("noisy")
+
+        if abs(delta) > STUCK_EPSILON:
+            stats.last_change_at = at
+            stats.flags.discard("stuck")
+        elif value >= FULL_LEVEL - STUCK_EPSILON:
+            stats.flags.discard("stuck")
+        elif stats.readings >= MIN_READINGS and at - stats.last_change_at >= STUCK_AFTER:
+            stats.flags.add("stuck")
+
+        stats.last_value = value
+        stats.last_reading_at = at
+        return stats.flags - before, before - stats.flags
+
+    def is_collection(self, previous: float, value: float) -> bool:
+        """Whether a drop between two readings is the bin being emptied"""
+        return previous - value > self.collection_drop and value <= EMPTIED_LEVEL
+
+    def collected(self, bin_id: str, at: datetime):
+        """Record that a bin was emptied, so the next reading is compared with an empty bin"""
+        stats = self.sensors.get(bin_id)
+        if stats is not None:
+            stats.last_value = 0.0
+            stats.last_reading_at = stats.last_change_at = at
+
+    def sweep_silent(self, now: datetime) -> List[str]:
+        """Flag sensors not heard from within SILENT_AFTER; returns newly silent bins"""
+        cutoff = now - SILENT_AFTER
+        silent = []
+        for bin_id, heard_at in self.last_heard.items():
+            if heard_at > cutoff:
+                break
+            flags = self.sensors[bin_id].flags
+            if "silent" not in flags:
+                flags.add("silent")
+                silent.append(bin_id)
+        return silent
+
+    def flags(self, bin_id: str) -> List[str]:
+        stats = self.sensors.get(bin_id)
+        return sorted(stats.flags) if stats else []
+
+    def health(self, bin_id: str) -> Optional[Dict]:
+        stats = self.sensors.get(bin_id)
+        if stats is None:
+            return None
+        return {
+            "bin_id": bin_id,
+            "flags": sorted(stats.flags),
+            "readings": stats.readings,
+            "last_value": stats.last_value,
+            "last_reading_at": stats.last_reading_at,
+            "last_change_at": stats.last_change_at,
+            "delta_mean": round(stats.delta_mean, 2),
+            "delta_stddev": round(stats.delta_stddev, 2)
+        }
+
+async def sensor_watchdog():
+    """Lifespan task that periodically flags sensors that stopped reporting"""
+    from database import sweep_silent_sensors
+    while True:
+        await asyncio.sleep(clock.wall_seconds(SWEEP_INTERVAL_SECONDS))
+        try:
+            flagged = sweep_silent_sensors()
+            if flagged:
+                logger.info(f"{len(flagged)} bin sensors went silent")
+        except Exception:
+            logger.exception("Silent sensor sweep failed")
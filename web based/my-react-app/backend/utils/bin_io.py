@@ -0,0 +1,173 @@
+import codecs
+import csv
+import io
+import json
+from collections import deque
+from datetime import datetime
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from models import BinCreate
+
+IMPORT_FORMATS = ("csv", "ndjson", "geojson")
+
+FORMAT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "geojson": "application/geo+json",
+}
+
+# Import columns first so an export can be imported again unchanged
+CSV_COLUMNS = [
+    "name", "latitude", "longitude", "capacity", "location_type", "description",
+    "id", "fill_level", "status", "zone", "last_updated", "predicted_full_time"
+]
+
+def format_for_content_type(content_type: str) -> Optional[str]:
+    media_type = content_type.split(";")[0].strip().lower()
+    if media_type in ("text/csv", "application/csv"):
+        return "csv"
+    if media_type in ("application/x-ndjson", "application/ndjson", "application/jsonl"):
+        return "ndjson"
+    if media_type in ("application/geo+json", "application/json"):
+        return "geojson"
+    return None
+
+async def _iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Decode a byte stream into lines without holding more than one chunk"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+def _feature_to_row(feature: Dict) -> Dict:
+    if not isinstance(feature, dict) or feature.get("type") != "Feature":
+        raise ValueError("Expected a GeoJSON Feature")
+    geometry = feature.get("geometry") or {}
+    if geometry.get("type") != "Point":
+        raise ValueError("Feature geometry must be a Point")
+    longitude, latitude = geometry["coordinates"][:2]
+    return {**(feature.get("properties") or {}), "latitude": latitude, "longitude": longitude}
+
+async def parse_rows(fmt: str, chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, Dict]]:
+    """Yield (row number, raw row) pairs; rows that cannot be parsed yield a ValueError instead
+
+    CSV and NDJSON are read line by line; a quoted CSV field may span lines. A
+    GeoJSON FeatureCollection has to be read whole, but NDJSON lines may also
+    hold single Features.
+    """
+    if fmt == "geojson":
+        body = b"".join([chunk async for chunk in chunks])
+        try:
+            document = json.loads(body)
+        except ValueError as e:
+            yield 1, ValueError(f"Invalid GeoJSON: {e}")
+            return
+        features = document.get("features") if isinstance(document, dict) else None
+        if not isinstance(features, list):
+            yield 1, ValueError("Expected a GeoJSON FeatureCollection")
+            return
+        for row, feature in enumerate(features, start=1):
+            try:
+                yield row, _feature_to_row(feature)
+            except (ValueError, KeyError, TypeError) as e:
+                yield row, ValueError(str(e))
+        return
+
+    row = 0
+    if fmt == "ndjson":
+        async for line in _iter_lines(chunks):
+            if not line.strip():
+                continue
+            row += 1
+            try:
+                record = json.loads(line)
+                yield row, _feature_to_row(record) if record.get("type") == "Feature" else record
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                yield row, ValueError(f"Invalid JSON line: {e}")
+        return
+
+    # One reader for the whole stream, advanced only once a complete record is
+    # queued: a quoted field may span lines, and is open while quotes are unbalanced
+    lines: deque = deque()
+    reader = csv.reader(iter(lines.popleft, None))
+    quotes = 0
+    header: Optional[List[str]] = None
+    async for line in _iter_lines(chunks):
+        if not lines and not line.strip():
+            continue
+        lines.append(line + "\n")
+        quotes += line.count('"')
+        if quotes % 2:
+            continue
+        quotes = 0
+        values = next(reader)
+        if header is None:
+            header = [column.strip().lower() for column in values]
+            continue
+        row += 1
+        if len(values) != len(header):
+            yield row, ValueError(f"Expected {len(header)} columns, got {len(values)}")
+            continue
+        yield row, {column: value for column, value in zip(header, values) if value != ""}
+    if lines:
+        yield row + 1, ValueError("Unterminated quoted field")
+
+def validate_row(raw: Dict) -> Dict:
+    """Validate one imported row, raising ValueError with a readable message"""
+    try:
+        bin_data = BinCreate(**raw).dict()
+    except ValidationError as e:
+        raise ValueError("; ".join(
+            f"{'.'.join(str(p) for p in error['loc'])}: {error['msg']}" for error in e.errors()
+        ))
+    if not -90 <= bin_data["latitude"] <= 90:
+        raise ValueError("latitude: must be between -90 and 90")
+    if not -180 <= bin_data["longitude"] <= 180:
+        raise ValueError("longitude: must be between -180 and 180")
+    if bin_data["capacity"] <= 0:
+        raise ValueError("capacity: must be positive")
+    return bin_data
+
+def _plain(bin_data: Dict) -> Dict:
+    return {key: value.isoformat() if isinstance(value, datetime) else value for key, value in bin_data.items()}
+
+def export_header(fmt: str) -> str:
+    if fmt == "csv":
+        return ",".join(CSV_COLUMNS) + "\r\n"
+    if fmt == "geojson":
+        return '{"type":"FeatureCollection","features":['
+    return ""
+
+def export_footer(fmt: str) -> str:
+    return "]}\n" if fmt == "geojson" else ""
+
+def export_page(fmt: str, bins: Iterable[Dict], first: bool) -> str:
+    """Serialize one page of bins; first says whether nothing was written before it"""
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=CSV_COLUMNS, extrasaction="ignore")
+        writer.writerows(_plain(b) for b in bins)
+        return buffer.getvalue()
+    if fmt == "geojson":
+        features = []
+        for b in bins:
+            properties = _plain(b)
+            properties.pop("latitude")
+            properties.pop("longitude")
+            features.append(json.dumps({
+                "type": "Feature",
+                "geometry": {"type": "Point", "coordinates": [b["longitude"], b["latitude"]]},
+                "properties": properties
+            }))
+        if not features:
+            return ""
+        return ("" if first else ",") + ",".join(features)
+    return "".join(json.dumps(_plain(b)) + "\n" for b in bins)
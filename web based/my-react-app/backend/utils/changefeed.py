@@ -0,0 +1,45 @@
+import asyncio
+import logging
+from time import monotonic
+from typing import Awaitable, Callable, Dict, Set
+
+from database import get_changes, flush_pending_changes, CHANGE_TICK_SECONDS
+
+logger = logging.getLogger("swachhgrid.changefeed")
+
+# Long-poll requests waiting for the next bus message
+_waiters: Set[asyncio.Future] = set()
+
+def wake_change_waiters():
+    """Wake every long-poll request so it re-checks the change feed"""
+    for waiter in _waiters:
+        if not waiter.done():
+            waiter.set_result(None)
+    _waiters.clear()
+
+async def wait_for_changes(since: int, timeout: float, limit: int) -> Dict:
+    """Return changes after 'since', waiting up to 'timeout' seconds for the first one"""
+    deadline = monotonic() + timeout
+    while True:
+        feed = get_changes(since, limit)
+        remaining = deadline - monotonic()
+        if feed["changes"] or feed["reset"] or remaining <= 0:
+            return feed
+
+        waiter = asyncio.get_running_loop().create_future()
+        _waiters.add(waiter)
+        try:
+            await asyncio.wait_for(waiter, remaining)
+        except asyncio.TimeoutError:
+            _waiters.discard(waiter)
+
+async def push_changes(broadcast: Callable[[str], Awaitable[None]]):
+    """Lifespan task that broadcasts one merged delta per tick (single-worker mode)"""
+    while True:
+        await asyncio.sleep(CHANGE_TICK_SECONDS)
+        try:
+            message = flush_pending_changes()
+            if message:
+                await broadcast(message)
+        except Exception:
+            logger.exception("Change push failed")
@@ -0,0 +1,47 @@
+import os
+import time
+from datetime import datetime
+from typing import Optional
+
+# Simulated seconds per wall-clock second; every worker reads the same value and
+# epoch, so in multi-worker mode they all agree on the time
+CLOCK_SPEED = float(os.getenv("CLOCK_SPEED", "1"))
+CLOCK_EPOCH = float(os.getenv("CLOCK_EPOCH", str(time.time())))
+
+class ServerClock:
+    """The server's notion of now, which can run faster than wall time.
+
+    Bin, alert and rollup timestamps, sensor silence and stuck checks, ETAs,
+    overflow predictions and the nightly planner all read this clock, so a
+    simulation accelerated N times sees hours pass in hours/N of wall time.
+    Simulated time is anchor + (wall time since the anchor) * speed.
+    """
+
+    def __init__(self, speed: float, epoch: float):
+        self.speed = speed
+        self.anchor_wall = epoch
+        self.anchor = epoch
+
+    def timestamp(self) -> float:
+        return self.anchor + (time.time() - self.anchor_wall) * self.speed
+
+    def now(self) -> datetime:
+        return datetime.fromtimestamp(self.timestamp())
+
+    def set(self, speed: float, at: Optional[datetime] = None):
+        """Run at a new speed from a given time, or from the current time when none is given"""
+        anchor = at.timestamp() if at else self.timestamp()
+        self.anchor_wall = time.time()
+        self.anchor = anchor
+        self.speed = speed
+
+    def reset(self):
+        """Follow wall time again"""
+        self.speed = 1.0
+        self.anchor_wall = self.anchor = time.time()
+
+    def wall_seconds(self, simulated_seconds: float) -> float:
+        """How long to sleep for a simulated interval to pass"""
+        return simulated_seconds / self.speed
+
+clock = ServerClock(CLOCK_SPEED, CLOCK_EPOCH)
@@ -0,0 +1,6 @@
+from models import ConnectionManager
+from utils.pubsub import create_bus
+
+# WebSocket connection manager shared by the /ws endpoint and routers that push updates;
+# broadcasts go through the bus to reach every worker
+manager = ConnectionManager(create_bus())
@@ -0,0 +1,196 @@
+import heapq
+import math
+import os
+from datetime import datetime
+from itertools import accumulate
+from typing import Dict, List, Optional, Tuple
+
+from utils.geo import METRES_PER_DEGREE_LAT, zone_for
+
+# Streets make walks longer than the straight line; a typical urban circuity factor
+WALK_DETOUR_FACTOR = float(os.getenv("COVERAGE_WALK_DETOUR", "1.3"))
+# Waste generated near a bin comes from roughly this far around it
+DEMAND_SPREAD_M = float(os.getenv("COVERAGE_DEMAND_SPREAD_M", "500"))
+# Each citizen report adds this much daily demand (litres), scaled by report type
+REPORT_DEMAND_LITRES = 20.0
+REPORT_TYPE_WEIGHTS = {
+    "bin_request": 1.0,
+    "bin_missing": 1.0,
+    "illegal_dumping": 1.0,
+    "bin_overflow": 0.5,
+    "bin_damaged": 0.0,
+}
+# The analysis runs in a worker thread, but its pure-Python passes hold the GIL at
+# roughly 2 s per million cells, stalling the event loop; larger areas need larger cells
+MAX_CELLS = int(os.getenv("COVERAGE_MAX_CELLS", "250000"))
+
+def daily_generation(bin_data: Dict) -> float:
+    """Litres per day a bin collects, from its fill level and predicted full time"""
+    full_time = bin_data.get("predicted_full_time")
+    if not full_time or bin_data.get("sensor_flags") or bin_data["fill_level"] >= 100:
+        return 0.0
+    hours_to_full = (full_time - bin_data["last_updated"]).total_seconds() / 3600
+    if hours_to_full <= 0:
+        return 0.0
+    rate = (100 - bin_data["fill_level"]) / hours_to_full  # percentage points per hour
+    return bin_data["capacity"] * rate / 100 * 24
+
+class _Grid:
+    """Flat row-major grid of square cells on a local projection of the service area"""
+
+    def __init__(self, points: List[Tuple[float, float]], cell_size_m: float, margin_m: float):
+        lats = [p[0] for p in points]
+        lngs = [p[1] for p in points]
+        self.lat0 = min(lats)
+        self.lng0 = min(lngs)
+        self.lng_scale = METRES_PER_DEGREE_LAT * max(math.cos(math.radians((min(lats) + max(lats)) / 2)), 0.01)
+        self.cell_size_m = cell_size_m
+        self.pad = math.ceil(margin_m / cell_size_m) + 1
+        self.rows = math.floor((max(lats) - self.lat0) * METRES_PER_DEGREE_LAT / cell_size_m) + 2 * self.pad + 1
+        self.cols = math.floor((max(lngs) - self.lng0) * self.lng_scale / cell_size_m) + 2 * self.pad + 1
+
+    @property
+    def size(self) -> int:
+        return self.rows * self.cols
+
+    def index(self, lat: float, lng: float) -> int:
+        row = math.floor((lat - self.lat0) * METRES_PER_DEGREE_LAT / self.cell_size_m) + self.pad
+        col = math.floor((lng - self.lng0) * self.lng_scale / self.cell_size_m) + self.pad
+        return row * self.cols + col
+
+    def interior(self, index: int) -> bool:
+        """Whether a cell lies inside the padding, where a stencil cannot run off an edge.
+
+        Rows are flattened end to end, so an offset past the last column would
+        otherwise land at the start of the next row.
+        """
+        row, col = divmod(index, self.cols)
+        return self.pad <= row < self.rows - self.pad and self.pad <= col < self.cols - self.pad
+
+    def centre(self, index: int) -> Tuple[float, float]:
+        row, col = divmod(index, self.cols)
+        lat = self.lat0 + (row - self.pad + 0.5) * self.cell_size_m / METRES_PER_DEGREE_LAT
+        lng = self.lng0 + (col - self.pad + 0.5) * self.cell_size_m / self.lng_scale
+        return lat, lng
+
+    def stencil(self, radius_m: float, detour: float = 1.0) -> List[int]:
+        """Index offsets of every cell within the radius, computed once per analysis"""
+        reach = math.ceil(radius_m / self.cell_size_m)
+        return [
+            dr * self.cols + dc
+            for dr in range(-reach, reach + 1)
+            for dc in range(-reach, reach + 1)
+            if math.hypot(dr, dc) * self.cell_size_m * detour <= radius_m
+        ]
+
+    def box_blur(self, values: List[float], radius: int):
+        """Average over a (2r+1)-cell square in place, as one pass over rows and one over columns.
+
+        Prefix sums make each pass linear in the number of cells whatever the radius.
+        """
+        width = 2 * radius + 1
+        for start, step, length in (
+            *((r * self.cols, 1, self.cols) for r in range(self.rows)),
+            *((c, self.cols, self.rows) for c in range(self.cols)),
+        ):
+            line = values[start:start + step * length:step]
+            prefix = [0.0, *accumulate(line)]
+            values[start:start + step * length:step] = [
+                (prefix[min(i + radius + 1, length)] - prefix[max(i - radius, 0)]) / width
+                for i in range(length)
+            ]
+
+def analyze_coverage(bins: List[Dict], reports: List[Dict], top_k: int, walk_radius_m: float,
+                     cell_size_m: float, report_since: Optional[datetime] = None) -> Dict:
+    """Walking-distance coverage of the current bins and greedy placement of new ones.
+
+    Demand per grid cell is the daily waste generated around each bin (from
+    its fill rate, spread with a tent kernel as two box blurs) plus weighted
+    citizen reports. A cell is covered when a bin is within walk_radius_m of
+    walking distance. New sites are picked by lazy greedy maximum coverage:
+    each pick is the cell whose walking catchment holds the most uncovered
+    demand.
+    """
+    reports = [
+        r for r in reports
+        if REPORT_TYPE_WEIGHTS.get(r["type"], 0.5) > 0 and (report_since is None or r["created_at"] >= report_since)
+    ]
+    points = [(b["latitude"], b["longitude"]) for b in bins] + [(r["latitude"], r["longitude"]) for r in reports]
+    result = {
+        "cell_size_m": cell_size_m,
+        "walk_radius_m": walk_radius_m,
+        "bins_considered": len(bins),
+        "reports_considered": len(reports),
+        "demand_cells": 0,
+        "total_demand": 0.0,
+        "covered_demand": 0.0,
+        "coverage_percent": 100.0,
+        "recommendations": []
+    }
+    if not points:
+        return result
+
+    grid = _Grid(points, cell_size_m, max(DEMAND_SPREAD_M, walk_radius_m))
+    if grid.size > MAX_CELLS:
+        raise ValueError(f"Service area needs {grid.size} cells; use a larger cell size")
+
+    demand = [0.0] * grid.size
+    for b in bins:
+        demand[grid.index(b["latitude"], b["longitude"])] += daily_generation(b)
+    blur_radius = max(round(DEMAND_SPREAD_M / cell_size_m / 2), 1)
+    grid.box_blur(demand, blur_radius)
+    grid.box_blur(demand, blur_radius)
+
+    walk = grid.stencil(walk_radius_m, WALK_DETOUR_FACTOR)
+    for r in reports:
+        share = REPORT_DEMAND_LITRES * REPORT_TYPE_WEIGHTS.get(r["type"], 0.5) / len(walk)
+        origin = grid.index(r["latitude"], r["longitude"])
+        for offset in walk:
+            demand[origin + offset] += share
+
+    covered = bytearray(grid.size)
+    for b in bins:
+        origin = grid.index(b["latitude"], b["longitude"])
+        for offset in walk:
+            covered[origin + offset] = 1
+
+    total = sum(demand)
+    uncovered = {i: d for i, d in enumerate(demand) if d > 1e-9 and not covered[i]}
+    covered_demand = total - sum(uncovered.values())
+    result.update({
+        "demand_cells": sum(1 for d in demand if d > 1e-9),
+        "total_demand": round(total, 1),
+        "covered_demand": round(covered_demand, 1),
+        "coverage_percent": round(100 * covered_demand / total, 2) if total else 100.0
+    })
+
+    def gain(cell: int) -> float:
+        return sum(uncovered.get(cell + offset, 0.0) for offset in walk)
+
+    # Gains only shrink as sites are added, so stale heap entries are re-scored
+    # lazily and an entry that is still best after re-scoring is the true best
+    heap = [(-gain(cell), cell) for cell in uncovered if grid.interior(cell)]
+    heapq.heapify(heap)
+    recommendations = result["recommendations"]
+    while heap and len(recommendations) < top_k:
+        _, cell = heapq.heappop(heap)
+        current = gain(cell)
+        if current <= 1e-9:
+            continue
+        if heap and current < -heap[0][0] - 1e-9:
+            heapq.heappush(heap, (-current, cell))
+            continue
+        for offset in walk:
+            uncovered.pop(cell + offset, None)
+        covered_demand += current
+        lat, lng = grid.centre(cell)
+        recommendations.append({
+            "rank": len(recommendations) + 1,
+            "latitude": round(lat, 6),
+            "longitude": round(lng, 6),
+            "zone": zone_for(lat, lng),
+            "demand_covered": round(current, 1),
+            "coverage_percent_after": round(100 * covered_demand / total, 2)
+        })
+
+    return result
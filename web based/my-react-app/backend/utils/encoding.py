@@ -0,0 +1,45 @@
+import json
+from contextvars import ContextVar
+from typing import Any
+
+import msgpack
+from fastapi.responses import JSONResponse
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+# WebSocket subprotocol clients request to receive MessagePack frames
+MSGPACK_SUBPROTOCOL = "swachhgrid.msgpack"
+
+# Whether the client of the current request asked for MessagePack
+_binary_response: ContextVar[bool] = ContextVar("binary_response", default=False)
+
+def wants_msgpack(accept: str) -> bool:
+    """Check an Accept header for MessagePack"""
+    media_types = [part.split(";")[0].strip() for part in accept.split(",")]
+    return MSGPACK_MEDIA_TYPE in media_types or "application/x-msgpack" in media_types
+
+def set_binary_response(enabled: bool):
+    _binary_response.set(enabled)
+
+def pack(content: Any) -> bytes:
+    return msgpack.packb(content, use_bin_type=True)
+
+def encode_frame(message: str) -> bytes:
+    """Re-encode a JSON broadcast message as a MessagePack frame"""
+    try:
+        return pack(json.loads(message))
+    except ValueError:
+        # Plain text messages are sent as a packed string
+        return pack(message)
+
+class NegotiatedResponse(JSONResponse):
+    """Default response class that renders MessagePack when the client asked for it"""
+
+    def __init__(self, content: Any, *args, **kwargs):
+        if _binary_response.get():
+            self.media_type = MSGPACK_MEDIA_TYPE
+        super().__init__(content, *args, **kwargs)
+
+    def render(self, content: Any) -> bytes:
+        if self.media_type == MSGPACK_MEDIA_TYPE:
+            return pack(content)
+        return super().render(content)
@@ -0,0 +1,94 @@
+import math
+from typing import Dict, Hashable, Iterator, List, Optional, Set, Tuple
+
+EARTH_RADIUS_M = 6371000.0
+METRES_PER_DEGREE_LAT = 111320.0
+
+def haversine_m(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance between two points in metres"""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+class GridIndex:
+    """Uniform grid spatial hash for radius queries over points.
+
+    Cells are square in metres around a reference latitude (the first point
+    inserted), which is accurate enough at city scale.
+    """
+
+    def __init__(self, cell_size_m: float, reference_latitude: Optional[float] = None):
+        self.cell_size_m = cell_size_m
+        self.cells: Dict[Tuple[int, int], Set[Hashable]] = {}
+        self.points: Dict[Hashable, Tuple[float, float]] = {}
+        self._lat_step = cell_size_m / METRES_PER_DEGREE_LAT
+        self._lng_step: Optional[float] = None
+        if reference_latitude is not None:
+            self._set_reference(reference_latitude)
+
+    def _set_reference(self, latitude: float):
+        self._lng_step = self.cell_size_m / (METRES_PER_DEGREE_LAT * max(math.cos(math.radians(latitude)), 0.01))
+
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return (math.floor(lat / self._lat_step), math.floor(lng / self._lng_step))
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.points
+
+    def insert(self, key: Hashable, lat: float, lng: float):
+        if self._lng_step is None:
+            self._set_reference(lat)
+        if key in self.points:
+            self.remove(key)
+        self.points[key] = (lat, lng)
+        self.cells.setdefault(self._cell(lat, lng), set()).add(key)
+
+    def remove(self, key: Hashable):
+        point = self.points.pop(key, None)
+        if point is None:
+            return
+        cell = self._cell(*point)
+        members = self.cells.get(cell)
+        if members is not None:
+            members.discard(key)
+            if not members:
+                del self.cells[cell]
+
+    def candidates(self, lat: float, lng: float, radius_m: float) -> Iterator[Hashable]:
+        """Keys in every cell overlapping the radius (may include points outside it)"""
+        if self._lng_step is None:
+            return
+        reach = math.ceil(radius_m / self.cell_size_m)
+        row, col = self._cell(lat, lng)
+        for r in range(row - reach, row + reach + 1):
+            for c in range(col - reach, col + reach + 1):
+                yield from self.cells.get((r, c), ())
+
+    def nearby(self, lat: float, lng: float, radius_m: float) -> List[Tuple[Hashable, float]]:
+        """(key, distance in metres) of points within the radius, nearest first"""
+        results = []
+        for key in self.candidates(lat, lng, radius_m):
+            point_lat, point_lng = self.points[key]
+            distance = haversine_m(lat, lng, point_lat, point_lng)
+            if distance <= radius_m:
+                results.append((key, distance))
+        results.sort(key=lambda item: item[1])
+        return results
+
+# Service zones are square grid cells of this size
+ZONE_SIZE_M = 2000.0
+
+def zone_for(lat: float, lng: float, zone_size_m: float = ZONE_SIZE_M) -> str:
+    """Name of the fixed grid zone a point falls in"""
+    lat_step = zone_size_m / METRES_PER_DEGREE_LAT
+    row = math.floor(lat / lat_step)
+    # Column width is fixed per row so zone boundaries are straight lines
+    row_lat = (row + 0.5) * lat_step
+    lng_step = zone_size_m / (METRES_PER_DEGREE_LAT * max(math.cos(math.radians(row_lat)), 0.01))
+    return f"Z{row}:{math.floor(lng / lng_step)}"
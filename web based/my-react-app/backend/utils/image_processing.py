@@ -0,0 +1,54 @@
+import io
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from database import add_report_image
+
+logger = logging.getLogger("swachhgrid.images")
+
+MEDIA_ROOT = os.getenv("MEDIA_ROOT", "media")
+MEDIA_URL = "/media"
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+MAX_IMAGE_SIZE = (1280, 1280)
+THUMBNAIL_SIZE = (256, 256)
+
+# Pillow releases the GIL while resizing, so a thread pool keeps the cores busy
+_executor = ThreadPoolExecutor(max_workers=IMAGE_WORKERS, thread_name_prefix="report-images")
+
+def _process_image(report_id: str, index: int, raw: bytes) -> Tuple[Optional[str], Optional[str]]:
+    """Resize an uploaded image and write it with a thumbnail under MEDIA_ROOT"""
+    try:
+        image = Image.open(io.BytesIO(raw))
+        image = ImageOps.exif_transpose(image).convert("RGB")
+    except (UnidentifiedImageError, OSError):
+        logger.warning(f"Discarding unreadable image {index} of {report_id}")
+        return None, None
+
+    directory = os.path.join(MEDIA_ROOT, "reports", report_id)
+    os.makedirs(directory, exist_ok=True)
+
+    image.thumbnail(MAX_IMAGE_SIZE)
+    image.save(os.path.join(directory, f"{index}.jpg"), "JPEG", quality=85, optimize=True)
+    image.thumbnail(THUMBNAIL_SIZE)
+    image.save(os.path.join(directory, f"{index}_thumb.jpg"), "JPEG", quality=80)
+
+    base_url = f"{MEDIA_URL}/reports/{report_id}"
+    return f"{base_url}/{index}.jpg", f"{base_url}/{index}_thumb.jpg"
+
+def _process_and_attach(report_id: str, index: int, raw: bytes):
+    image_url, thumbnail_url = None, None
+    try:
+        image_url, thumbnail_url = _process_image(report_id, index, raw)
+    except Exception:
+        logger.exception(f"Image processing failed for {report_id}")
+    finally:
+        add_report_image(report_id, image_url, thumbnail_url)
+
+def submit_report_images(report_id: str, first_index: int, images: List[bytes]):
+    """Queue raw uploads for resizing off the request path"""
+    for offset, raw in enumerate(images):
+        _executor.submit(_process_and_attach, report_id, first_index + offset, raw)
@@ -0,0 +1,115 @@
+import asyncio
+import logging
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, time, timedelta
+from typing import Dict, List, Optional
+
+from database import get_bins, save_route_plan, claim_planner_run
+from utils.clock import clock
+from utils.geo import zone_for
+from utils.route_optimizer import solve_route
+from utils.urgency import COLLECTION_THRESHOLD, is_routable
+
+logger = logging.getLogger("swachhgrid.planner")
+
+# When the nightly planner runs and when the shift it plans for starts (local time, HH:MM)
+PLANNER_TIME = os.getenv("PLANNER_TIME", "02:00")
+SHIFT_START = os.getenv("SHIFT_START", "06:00")
+MAX_STOPS_PER_VEHICLE = int(os.getenv("PLANNER_MAX_STOPS", "20"))
+PLANNER_WORKERS = int(os.getenv("PLANNER_WORKERS", str(os.cpu_count() or 2)))
+
+def _parse_clock(value: str) -> time:
+    hours, minutes = value.split(":")
+    return time(int(hours), int(minutes))
+
+def next_occurrence(clock: time, now: datetime) -> datetime:
+    """Next datetime at the given wall-clock time, strictly after now"""
+    candidate = datetime.combine(now.date(), clock)
+    return candidate if candidate > now else candidate + timedelta(days=1)
+
+def project_fill_level(bin_data: Dict, at: datetime) -> float:
+    """Extrapolate a bin's fill level linearly towards its predicted full time"""
+    fill_level = bin_data["fill_level"]
+    full_time = bin_data.get("predicted_full_time")
+    if not full_time or fill_level >= 100:
+        return fill_level
+    hours_to_full = (full_time - bin_data["last_updated"]).total_seconds() / 3600
+    if hours_to_full <= 0:
+        return 100.0
+    rate = (100 - fill_level) / hours_to_full
+    hours_ahead = (at - bin_data["last_updated"]).total_seconds() / 3600
+    return min(100.0, fill_level + rate * max(hours_ahead, 0))
+
+def split_by_sweep(bins: List[Dict], max_stops: int) -> List[List[Dict]]:
+    """Split a zone's bins into vehicle-sized groups by angle around their centroid"""
+    if len(bins) <= max_stops:
+        return [bins]
+    lat0 = sum(b["latitude"] for b in bins) / len(bins)
+    lng0 = sum(b["longitude"] for b in bins) / len(bins)
+    ordered = sorted(bins, key=lambda b: math.atan2(b["latitude"] - lat0, b["longitude"] - lng0))
+    return [ordered[i:i + max_stops] for i in range(0, len(ordered), max_stops)]
+
+def build_route_plan(shift_start: datetime, executor: Optional[ProcessPoolExecutor] = None) -> Dict:
+    """Pick bins projected to need collection at shift start and solve a route per vehicle"""
+    projected = {}
+    zones: Dict[str, List[Dict]] = {}
+    for bin_data in get_bins():
+        if not is_routable(bin_data):
+            continue
+        fill_level = project_fill_level(bin_data, shift_start)
+        if fill_level >= COLLECTION_THRESHOLD:
+            projected[bin_data["id"]] = round(fill_level, 1)
+            zones.setdefault(zone_for(bin_data["latitude"], bin_data["longitude"]), []).append(bin_data)
+
+    jobs = []
+    for zone, zone_bins in sorted(zones.items()):
+        for n, group in enumerate(split_by_sweep(zone_bins, MAX_STOPS_PER_VEHICLE), start=1):
+            jobs.append((zone, f"{zone}-truck-{n}", group))
+
+    groups = [group for _, _, group in jobs]
+    solutions = executor.map(solve_route, groups) if executor else map(solve_route, groups)
+
+    routes = []
+    for (zone, vehicle_id, _), solution in zip(jobs, solutions):
+        route = solution.dict()
+        route.update({
+            "vehicle_id": vehicle_id,
+            "zone": zone,
+            "projected_fill_levels": {b: projected[b] for b in route["bin_ids"]}
+        })
+        routes.append(route)
+
+    return save_route_plan({
+        "date": shift_start.date().isoformat(),
+        "generated_at": clock.now(),
+        "shift_start": shift_start,
+        "routes": routes
+    })
+
+async def run_planner_now(shift_start: Optional[datetime] = None) -> Dict:
+    """Build a plan for the next shift in a process pool without blocking the event loop"""
+    shift_start = shift_start or next_occurrence(_parse_clock(SHIFT_START), clock.now())
+    loop = asyncio.get_running_loop()
+    with ProcessPoolExecutor(max_workers=PLANNER_WORKERS) as executor:
+        return await loop.run_in_executor(None, build_route_plan, shift_start, executor)
+
+async def nightly_planner():
+    """Lifespan task that plans the next shift every night at PLANNER_TIME"""
+    planner_time = _parse_clock(PLANNER_TIME)
+    while True:
+        run_at = next_occurrence(planner_time, clock.now())
+        # Slept in short steps so a change of clock speed takes effect
+        while clock.now() < run_at:
+            await asyncio.sleep(min(clock.wall_seconds((run_at - clock.now()).total_seconds()), 60))
+
+        shift_start = next_occurrence(_parse_clock(SHIFT_START), clock.now())
+        # With several workers only the first one to claim the shift plans it
+        if not claim_planner_run(shift_start.date().isoformat()):
+            continue
+        try:
+            plan = await run_planner_now(shift_start)
+            logger.info(f"Planned {len(plan['routes'])} routes for {plan['date']} (version {plan['version']})")
+        except Exception:
+            logger.exception("Nightly route planning failed")
@@ -0,0 +1,117 @@
+import math
+import os
+from collections import OrderedDict
+from typing import Collection, Hashable, List, Optional, Sequence
+
+from utils.geo import METRES_PER_DEGREE_LAT
+
+DEFAULT_PRECISION = 5  # decimal places kept; 5 is about 1 m and what most map libraries expect
+# Points closer than this many screen pixels to the simplified line are dropped
+SIMPLIFY_PIXELS = float(os.getenv("POLYLINE_SIMPLIFY_PIXELS", "1.0"))
+GEOMETRY_CACHE_SIZE = int(os.getenv("GEOMETRY_CACHE_SIZE", "512"))
+# Ground resolution of a 256px Web Mercator tile at zoom 0 on the equator
+METRES_PER_PIXEL_Z0 = 156543.03392
+
+def encode(points: Sequence[Sequence[float]], precision: int = DEFAULT_PRECISION) -> str:
+    """Encode [lat, lng] pairs with the encoded polyline algorithm format"""
+    factor = 10 ** precision
+    chars: List[str] = []
+    previous_lat = previous_lng = 0
+    for lat, lng in points:
+        lat_e, lng_e = round(lat * factor), round(lng * factor)
+        for delta in (lat_e - previous_lat, lng_e - previous_lng):
+            value = ~(delta << 1) if delta < 0 else delta << 1
+            while value >= 0x20:
+                chars.append(chr((0x20 | (value & 0x1F)) + 63))
+                value >>= 5
+            chars.append(chr(value + 63))
+        previous_lat, previous_lng = lat_e, lng_e
+    return "".join(chars)
+
+def decode(encoded: str, precision: int = DEFAULT_PRECISION) -> List[List[float]]:
+    factor = 10 ** precision
+    points: List[List[float]] = []
+    index = lat = lng = 0
+    while index < len(encoded):
+        deltas = []
+        for _ in range(2):
+            shift = result = 0
+            while True:
+                byte = ord(encoded[index]) - 63
+                index += 1
+                result |= (byte & 0x1F) << shift
+                shift += 5
+                if byte < 0x20:
+                    break
+            deltas.append(~(result >> 1) if result & 1 else result >> 1)
+        lat += deltas[0]
+        lng += deltas[1]
+        points.append([lat / factor, lng / factor])
+    return points
+
+def zoom_tolerance_m(zoom: int, latitude: float) -> float:
+    """Ground distance covered by SIMPLIFY_PIXELS screen pixels at a zoom level"""
+    return SIMPLIFY_PIXELS * METRES_PER_PIXEL_Z0 * math.cos(math.radians(latitude)) / 2 ** zoom
+
+def simplify(points: Sequence[Sequence[float]], tolerance_m: float,
+             keep: Collection[int] = ()) -> List[Sequence[float]]:
+    """Douglas-Peucker simplification; endpoints and the vertices at the keep indices are always kept"""
+    if len(points) < 3 or tolerance_m <= 0:
+        return list(points)
+    # Local equirectangular projection in metres, accurate enough for a city
+    lng_scale = METRES_PER_DEGREE_LAT * math.cos(math.radians(sum(p[0] for p in points) / len(points)))
+    xy = [(p[1] * lng_scale, p[0] * METRES_PER_DEGREE_LAT) for p in points]
+    kept = bytearray(len(points))
+    # Fixed vertices split the line into stretches that are simplified independently
+    anchors = sorted({0, len(points) - 1, *keep})
+    for index in anchors:
+        kept[index] = 1
+    stack = list(zip(anchors, anchors[1:]))
+    while stack:
+        first, last = stack.pop()
+        (x1, y1), (x2, y2) = xy[first], xy[last]
+        dx, dy = x2 - x1, y2 - y1
+        length = math.hypot(dx, dy)
+        farthest, max_distance = first, 0.0
+        for i in range(first + 1, last):
+            px, py = xy[i]
+            if length:
+                distance = abs(dy * (px - x1) - dx * (py - y1)) / length
+            else:
+                distance = math.hypot(px - x1, py - y1)
+            if distance > max_distance:
+                farthest, max_distance = i, distance
+        if max_distance > tolerance_m:
+            kept[farthest] = 1
+            stack.append((first, farthest))
+            stack.append((farthest, last))
+    return [p for p, is_kept in zip(points, kept) if is_kept]
+
+class GeometryCache:
+    """Encoded route geometries by (route key, version, precision, zoom), least recently used dropped first.
+
+    Routes are immutable per version, so an entry never needs invalidating.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.entries: "OrderedDict[Hashable, str]" = OrderedDict()
+
+    def polyline(self, key: Hashable, coordinates: Sequence[Sequence[float]], precision: int = DEFAULT_PRECISION,
+                 zoom: Optional[int] = None, stops: Collection[int] = ()) -> str:
+        """The encoded geometry, simplified for a zoom level without dropping the vertices at stops"""
+        cache_key = (key, precision, zoom)
+        encoded = self.entries.get(cache_key)
+        if encoded is not None:
+            self.entries.move_to_end(cache_key)
+            return encoded
+        points = coordinates
+        if zoom is not None and coordinates:
+            latitude = sum(p[0] for p in coordinates) / len(coordinates)
+            points = simplify(coordinates, zoom_tolerance_m(zoom, latitude), stops)
+        encoded = self.entries[cache_key] = encode(points, precision)
+        if len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+        return encoded
+
+geometry_cache = GeometryCache(GEOMETRY_CACHE_SIZE)
@@ -0,0 +1,37 @@
+import asyncio
+import cProfile
+import io
+import marshal
+import pstats
+
+# Only one cProfile session can be active in a process at a time
+_profile_lock = asyncio.Lock()
+
+def is_profiling() -> bool:
+    """Check whether a profile capture is currently running"""
+    return _profile_lock.locked()
+
+async def capture_profile(seconds: float, output_format: str = "pstats") -> bytes:
+    """Profile the event loop thread for the given number of seconds.
+
+    Everything that runs on the loop while the capture is active (request
+    handlers, broadcasts, background tasks) ends up in the profile. Work
+    handed off to the threadpool is not included.
+    """
+    async with _profile_lock:
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profiler.disable()
+
+    if output_format == "text":
+        stream = io.StringIO()
+        stats = pstats.Stats(profiler, stream=stream)
+        stats.sort_stats("cumulative").print_stats(100)
+        return stream.getvalue().encode()
+
+    # Same format as cProfile's dump_stats, loadable with pstats or snakeviz
+    profiler.create_stats()
+    return marshal.dumps(profiler.stats)
@@ -0,0 +1,132 @@
+import asyncio
+import logging
+import os
+import socketserver
+import struct
+import threading
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+logger = logging.getLogger("swachhgrid.pubsub")
+
+Handler = Callable[[str], Awaitable[None]]
+
+# Frames on the wire are a 4-byte big-endian length followed by UTF-8 text
+_HEADER = struct.Struct(">I")
+
+class LocalBus:
+    """In-process pub/sub bus used when running a single worker"""
+
+    def __init__(self):
+        self.handlers: List[Handler] = []
+
+    async def start(self, handler: Handler):
+        self.handlers.append(handler)
+
+    async def stop(self):
+        self.handlers.clear()
+
+    async def publish(self, message: str):
+        for handler in list(self.handlers):
+            await handler(message)
+
+class SocketBus:
+    """Pub/sub bus that relays messages through a BusHub so every worker receives them"""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.handlers: List[Handler] = []
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader_task: Optional[asyncio.Task] = None
+
+    async def start(self, handler: Handler):
+        self.handlers.append(handler)
+        reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        self._reader_task = asyncio.create_task(self._read_loop(reader))
+
+    async def stop(self):
+        if self._reader_task:
+            self._reader_task.cancel()
+        if self._writer:
+            self._writer.close()
+        self.handlers.clear()
+
+    async def publish(self, message: str):
+        payload = message.encode()
+        self._writer.write(_HEADER.pack(len(payload)) + payload)
+        await self._writer.drain()
+
+    async def _read_loop(self, reader: asyncio.StreamReader):
+        try:
+            while True:
+                header = await reader.readexactly(_HEADER.size)
+                payload = await reader.readexactly(_HEADER.unpack(header)[0])
+                message = payload.decode()
+                for handler in list(self.handlers):
+                    try:
+                        await handler(message)
+                    except Exception:
+                        logger.exception("Bus handler failed")
+        except asyncio.IncompleteReadError:
+            logger.error("Lost connection to the pub/sub hub")
+
+class _HubConnection(socketserver.BaseRequestHandler):
+    def setup(self):
+        self.send_lock = threading.Lock()
+        with self.server.clients_lock:
+            self.server.clients.append(self)
+
+    def handle(self):
+        stream = self.request.makefile("rb")
+        while True:
+            header = stream.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                return
+            payload = stream.read(_HEADER.unpack(header)[0])
+            self.server.fan_out(header + payload)
+
+    def finish(self):
+        with self.server.clients_lock:
+            self.server.clients.remove(self)
+
+    def send(self, frame: bytes):
+        with self.send_lock:
+            self.request.sendall(frame)
+
+class BusHub(socketserver.ThreadingTCPServer):
+    """Local broker that forwards every published frame to all connected workers"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address: Tuple[str, int]):
+        super().__init__(address, _HubConnection)
+        self.clients: List[_HubConnection] = []
+        self.clients_lock = threading.Lock()
+
+    def fan_out(self, frame: bytes):
+        with self.clients_lock:
+            clients = list(self.clients)
+        for client in clients:
+            try:
+                client.send(frame)
+            except OSError:
+                pass
+
+    def publish(self, message: str):
+        """Publish from inside the hub's own process"""
+        payload = message.encode()
+        self.fan_out(_HEADER.pack(len(payload)) + payload)
+
+    def serve_in_background(self) -> threading.Thread:
+        thread = threading.Thread(target=self.serve_forever, name="bus-hub", daemon=True)
+        thread.start()
+        return thread
+
+def create_bus():
+    """Create the bus configured for this process"""
+    address = os.getenv("SWACHHGRID_BUS_ADDRESS")
+    if not address:
+        return LocalBus()
+    host, port = address.rsplit(":", 1)
+    return SocketBus(host, int(port))
@@ -0,0 +1,141 @@
+import asyncio
+import math
+import os
+import re
+from dataclasses import dataclass
+from time import monotonic
+from typing import Dict, List, Optional, Tuple
+
+# Priority classes, shed in this order when the event loop is lagging
+PRIORITY_LOW = "low"
+PRIORITY_NORMAL = "normal"
+PRIORITY_CRITICAL = "critical"
+
+# Loop lag (ms) at which low-priority requests are shed; normal ones are shed at twice this
+SHED_LAG_MS = float(os.getenv("SHED_LAG_MS", "200"))
+SHED_RETRY_AFTER = int(os.getenv("SHED_RETRY_AFTER", "2"))
+
+DEFAULT_RATE = float(os.getenv("RATE_LIMIT_PER_SEC", "20"))
+DEFAULT_BURST = float(os.getenv("RATE_LIMIT_BURST", "40"))
+# Multiplies every rate and burst, e.g. to let a load test or simulator through
+RATE_LIMIT_SCALE = float(os.getenv("RATE_LIMIT_SCALE", "1"))
+
+# Idle buckets are dropped once this many are being tracked
+MAX_BUCKETS = 50000
+
+@dataclass
+class RouteLimit:
+    name: str
+    method: str
+    pattern: str
+    rate: float  # tokens per second
+    burst: float
+    priority: str = PRIORITY_NORMAL
+    per_address: bool = False  # key by remote address even for signed-in clients
+
+ROUTE_LIMITS: List[RouteLimit] = [
+    # Brute-force protection: 5 attempts, then one every 12 seconds
+    RouteLimit("login", "POST", r"^/api/auth/login$", rate=5 / 60, burst=5, per_address=True),
+    RouteLimit("optimize", "GET", r"^/api/route/optimize$", rate=0.5, burst=5, priority=PRIORITY_LOW),
+    RouteLimit("stats", "GET", r"^/api/dashboard/stats$", rate=2, burst=10, priority=PRIORITY_LOW),
+    # Telemetry ingestion from gateways: generous, and shed last
+    RouteLimit("telemetry", "PUT", r"^/api/bins/[^/]+$", rate=50, burst=100, priority=PRIORITY_CRITICAL),
+    RouteLimit("gps", "POST", r"^/api/vehicles/[^/]+/pings$", rate=10, burst=30, priority=PRIORITY_CRITICAL),
+    RouteLimit("alerts", "GET", r"^/api/alerts$", rate=DEFAULT_RATE, burst=DEFAULT_BURST, priority=PRIORITY_CRITICAL),
+]
+
+DEFAULT_LIMIT = RouteLimit("default", "*", r"", rate=DEFAULT_RATE, burst=DEFAULT_BURST)
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = monotonic()
+
+    def refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, now: float) -> float:
+        """Take one token; returns 0 on success or the seconds to wait for one"""
+        self.refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes up from a short sleep"""
+
+    def __init__(self, interval: float = 0.1):
+        self.interval = interval
+        self.lag_ms = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        while True:
+            start = monotonic()
+            await asyncio.sleep(self.interval)
+            lag = (monotonic() - start - self.interval) * 1000
+            # Rise immediately, decay gradually so one quiet tick does not end shedding
+            self.lag_ms = max(lag, self.lag_ms * 0.5)
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+
+class RateLimiter:
+    """Per-client, per-route token buckets plus lag-based load shedding"""
+
+    def __init__(self, limits: List[RouteLimit] = ROUTE_LIMITS, monitor: Optional[LoopLagMonitor] = None):
+        self.limits = [(limit, re.compile(limit.pattern)) for limit in limits]
+        self.monitor = monitor or LoopLagMonitor()
+        self.buckets: Dict[Tuple[str, str], TokenBucket] = {}
+
+    def match(self, method: str, path: str) -> RouteLimit:
+        for limit, pattern in self.limits:
+            if limit.method in ("*", method) and pattern.match(path):
+                return limit
+        return DEFAULT_LIMIT
+
+    def should_shed(self, priority: str) -> bool:
+        lag = self.monitor.lag_ms
+        if priority == PRIORITY_CRITICAL:
+            return False
+        if priority == PRIORITY_LOW:
+            return lag > SHED_LAG_MS
+        return lag > SHED_LAG_MS * 2
+
+    def check(self, address: str, user_id: Optional[str], method: str, path: str) -> Optional[Tuple[int, int, str]]:
+        """Return (status code, retry-after seconds, reason) if the request must be rejected
+
+        Clients are keyed by user id only when the caller has verified their
+        session, so made-up credentials cannot buy a fresh bucket.
+        """
+        limit = self.match(method, path)
+        if self.should_shed(limit.priority):
+            return 503, SHED_RETRY_AFTER, "Server is overloaded, please retry later"
+
+        now = monotonic()
+        client = f"user:{user_id}" if user_id and not limit.per_address else address
+        key = (client, limit.name)
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            if len(self.buckets) >= MAX_BUCKETS:
+                self._evict_idle(now)
+            bucket = self.buckets[key] = TokenBucket(limit.rate * RATE_LIMIT_SCALE, limit.burst * RATE_LIMIT_SCALE)
+
+        wait = bucket.take(now)
+        if wait > 0:
+            return 429, math.ceil(wait), "Rate limit exceeded"
+        return None
+
+    def _evict_idle(self, now: float):
+        for key, bucket in list(self.buckets.items()):
+            bucket.refill(now)
+            if bucket.tokens >= bucket.burst:
+                del self.buckets[key]
@@ -0,0 +1,92 @@
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+GRANULARITIES = ("hour", "day")
+# Hourly buckets older than this are dropped; daily buckets are kept
+HOURLY_RETENTION = timedelta(days=90)
+
+COUNTERS = ("readings", "fill_level_sum", "bins_collected", "waste_collected", "alerts_generated")
+
+def truncate(timestamp: datetime, granularity: str) -> datetime:
+    if granularity == "hour":
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+
+class RollupStore:
+    """Hourly and daily counters per (zone, location type), updated as events arrive.
+
+    Each bucket holds one counter dict per (zone, location_type) group, and
+    bucket start times are kept sorted so range queries only visit the
+    buckets inside the range.
+    """
+
+    def __init__(self):
+        self.buckets: Dict[str, Dict[datetime, Dict[Tuple[str, str], Dict[str, float]]]] = {g: {} for g in GRANULARITIES}
+        self.starts: Dict[str, List[datetime]] = {g: [] for g in GRANULARITIES}
+
+    def add(self, timestamp: datetime, zone: str, location_type: str, **increments: float):
+        for granularity in GRANULARITIES:
+            start = truncate(timestamp, granularity)
+            bucket = self.buckets[granularity].get(start)
+            if bucket is None:
+                bucket = self.buckets[granularity][start] = {}
+                insort(self.starts[granularity], start)
+                if granularity == "hour":
+                    self._expire_hours(start - HOURLY_RETENTION)
+            counters = bucket.get((zone, location_type))
+            if counters is None:
+                counters = bucket[(zone, location_type)] = dict.fromkeys(COUNTERS, 0.0)
+            for name, value in increments.items():
+                counters[name] += value
+
+    def _expire_hours(self, cutoff: datetime):
+        starts = self.starts["hour"]
+        expired = bisect_left(starts, cutoff)
+        for start in starts[:expired]:
+            del self.buckets["hour"][start]
+        del starts[:expired]
+
+    def _range(self, granularity: str, start: datetime, end: datetime) -> List[datetime]:
+        starts = self.starts[granularity]
+        return starts[bisect_left(starts, truncate(start, granularity)):bisect_left(starts, end)]
+
+    def _aggregate(self, groups: List[Dict[Tuple[str, str], Dict[str, float]]],
+                   zone: Optional[str], location_type: Optional[str]) -> Dict:
+        totals = dict.fromkeys(COUNTERS, 0.0)
+        by_zone: Dict[str, float] = {}
+        by_location_type: Dict[str, float] = {}
+        for bucket in groups:
+            for (group_zone, group_type), counters in bucket.items():
+                if (zone and group_zone != zone) or (location_type and group_type != location_type):
+                    continue
+                for name in COUNTERS:
+                    totals[name] += counters[name]
+                by_zone[group_zone] = by_zone.get(group_zone, 0.0) + counters["waste_collected"]
+                by_location_type[group_type] = by_location_type.get(group_type, 0.0) + counters["waste_collected"]
+        return {
+            "readings": int(totals["readings"]),
+            "average_fill_level": round(totals["fill_level_sum"] / totals["readings"], 1) if totals["readings"] else 0.0,
+            "bins_collected": int(totals["bins_collected"]),
+            "waste_collected": round(totals["waste_collected"], 1),
+            "alerts_generated": int(totals["alerts_generated"]),
+            "zone_distribution": {k: round(v, 1) for k, v in by_zone.items()},
+            "location_type_distribution": {k: round(v, 1) for k, v in by_location_type.items()}
+        }
+
+    def query(self, granularity: str, start: datetime, end: datetime,
+              zone: Optional[str] = None, location_type: Optional[str] = None) -> List[Dict]:
+        """One row per bucket starting in [start, end) with matching activity"""
+        rows = []
+        for bucket_start in self._range(granularity, start, end):
+            row = self._aggregate([self.buckets[granularity][bucket_start]], zone, location_type)
+            if row["readings"] or row["bins_collected"] or row["alerts_generated"]:
+                row.update({"period_start": bucket_start, "granularity": granularity})
+                rows.append(row)
+        return rows
+
+    def summary(self, start: datetime, end: datetime,
+                zone: Optional[str] = None, location_type: Optional[str] = None) -> Dict:
+        """Totals over [start, end), from daily buckets (whole days only)"""
+        groups = [self.buckets["day"][s] for s in self._range("day", start, end)]
+        return self._aggregate(groups, zone, location_type)
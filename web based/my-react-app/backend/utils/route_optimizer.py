@@ -1,7 +1,8 @@
-import random
-from typing import List
-from database import get_bins
+import math
+from typing import Dict, List
+from database import get_bins_due_for_collection
 from models import RouteOptimization
+from utils.tracing import traced
 
 def calculate_distance(coord1: List[float], coord2: List[float]) -> float:
     """Calculate distance between two coordinates using Haversine formula"""
@@ -9,37 +10,24 @@ def calculate_distance(coord1: List[float], coord2: List[float]) -> float:
     lat2, lon2 = coord2
 
     # Convert to radians
-    lat1_rad = lat1 * 3.14159 / 180
-    lon1_rad = lon1 * 3.14159 / 180
-    lat2_rad = lat2 * 3.14159 / 180
-    lon2_rad = lon2 * 3.14159 / 180
+    lat1_rad = math.radians(lat1)
+    lon1_rad = math.radians(lon1)
+    lat2_rad = math.radians(lat2)
+    lon2_rad = math.radians(lon2)
 
     # Haversine formula
     dlat = lat2_rad - lat1_rad
     dlon = lon2_rad - lon1_rad
 
-    a = (dlat/2).sin()**2 + lat1_rad.cos() * lat2_rad.cos() * (dlon/2).sin()**2
-    c = 2 * a.sqrt().asin()
+    a = math.sin(dlat/2)**2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlon/2)**2
+    c = 2 * math.asin(math.sqrt(a))
 
     # Earth's radius in kilometers
     r = 6371
     return c * r
 
-def optimize_collection_route() -> RouteOptimization:
-    """Optimize collection route using a simple nearest neighbor algorithm"""
-    bins = get_bins()
-
-    if not bins:
-        return RouteOptimization(
-            bin_ids=[],
-            total_distance=0.0,
-            estimated_time=0.0,
-            coordinates=[]
-        )
-
-    # Filter bins that need collection (fill level >= 75%)
-    bins_to_collect = [bin for bin in bins if bin["fill_level"] >= 75]
-
+def solve_route(bins_to_collect: List[Dict]) -> RouteOptimization:
+    """Order the given bins into a route using a simple nearest neighbor algorithm"""
     if not bins_to_collect:
         return RouteOptimization(
             bin_ids=[],
@@ -87,4 +75,15 @@ def optimize_collection_route() -> RouteOptimization:
         total_distance=round(total_distance, 2),
         estimated_time=round(estimated_time, 1),
         coordinates=coordinates
-    )
\ No newline at end of file
+    )
+
+# Solver modes by name; benchmarks/route_benchmark.py measures every entry
+SOLVERS = {
+    "nearest_neighbor": solve_route,
+}
+
+@traced("optimize")
+def optimize_collection_route() -> RouteOptimization:
+    """Optimize collection route for all bins that currently need collection"""
+    # Read from the urgency index, so the route starts at the bin closest to overflowing
+    return solve_route(get_bins_due_for_collection())
@@ -0,0 +1,96 @@
+import functools
+import logging
+import os
+import secrets
+import threading
+import time
+from multiprocessing.managers import BaseManager
+from typing import Callable, Optional
+
+from utils.clock import CLOCK_EPOCH
+
+STATE_HOST = os.getenv("STATE_HOST", "127.0.0.1")
+STATE_PORT = int(os.getenv("STATE_PORT", "8701"))
+BUS_PORT = int(os.getenv("BUS_PORT", "8702"))
+
+# Proxy to the state owner; None when this process owns the data itself
+_remote = None
+
+# The owner serves each worker connection on its own thread
+_state_lock = threading.RLock()
+
+class StateService:
+    """Runs database functions inside the state-owner process"""
+
+    def call(self, name: str, args: tuple, kwargs: dict):
+        import database
+        with _state_lock:
+            return getattr(database, name)(*args, **kwargs)
+
+class StateManager(BaseManager):
+    pass
+
+StateManager.register("state", callable=StateService)
+
+def shared(func: Callable):
+    """Decorator that routes a database function to the state owner when one is configured"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if _remote is not None:
+            return _remote.call(func.__name__, args, kwargs)
+        return func(*args, **kwargs)
+    return wrapper
+
+def is_shared() -> bool:
+    """Whether this process forwards storage calls to a separate state owner"""
+    return _remote is not None
+
+def _push_changes(hub):
+    import database
+    while True:
+        time.sleep(database.CHANGE_TICK_SECONDS)
+        try:
+            with _state_lock:
+                message = database.flush_pending_changes()
+            if message:
+                hub.publish(message)
+        except Exception:
+            logging.getLogger("swachhgrid.changefeed").exception("Change push failed")
+
+def _start_bus_hub(bus_address):
+    from utils.pubsub import BusHub
+    hub = BusHub(bus_address)
+    hub.serve_in_background()
+    # Changes happen in this process, so each tick's delta is fanned out to the workers from here
+    threading.Thread(target=_push_changes, args=(hub,), name="change-push", daemon=True).start()
+
+def start_state_owner() -> StateManager:
+    """Start the process that owns all state and hosts the pub/sub hub.
+
+    Connection details are exported through the environment so that worker
+    processes started afterwards connect to it on import.
+    """
+    authkey = secrets.token_bytes(32)
+    # Every process reads the clock from the same epoch, so they agree on the time
+    os.environ["CLOCK_EPOCH"] = str(CLOCK_EPOCH)
+    owner = StateManager(address=(STATE_HOST, STATE_PORT), authkey=authkey)
+    owner.start(initializer=_start_bus_hub, initargs=((STATE_HOST, BUS_PORT),))
+
+    os.environ["SWACHHGRID_STATE_ADDRESS"] = f"{STATE_HOST}:{STATE_PORT}"
+    os.environ["SWACHHGRID_STATE_AUTHKEY"] = authkey.hex()
+    os.environ["SWACHHGRID_BUS_ADDRESS"] = f"{STATE_HOST}:{BUS_PORT}"
+    return owner
+
+def connect_shared_state(address: Optional[str] = None, authkey: Optional[str] = None) -> bool:
+    """Connect this worker to the state owner if one was started"""
+    global _remote
+    address = address or os.getenv("SWACHHGRID_STATE_ADDRESS")
+    authkey = authkey or os.getenv("SWACHHGRID_STATE_AUTHKEY")
+    if not address or not authkey:
+        return False
+
+    host, port = address.rsplit(":", 1)
+    client = StateManager(address=(host, int(port)), authkey=bytes.fromhex(authkey))
+    client.connect()
+    _remote = client.state()
+    return True
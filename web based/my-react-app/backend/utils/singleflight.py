@@ -0,0 +1,55 @@
+import asyncio
+import contextvars
+import os
+from time import monotonic
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+from database import get_latest_change_seq
+from utils.tracing import span
+
+# How long a result is reused while the data it was computed from is unchanged
+SINGLEFLIGHT_TTL = float(os.getenv("SINGLEFLIGHT_TTL_SECONDS", "5"))
+
+class SingleFlight:
+    """Coalesces identical concurrent computations and reuses the result per data version.
+
+    Callers with the same key and version await one shared computation; once
+    it finishes the result is served until it is older than the TTL or the
+    version moves on. Only the latest result per key is kept.
+    """
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl = ttl_seconds
+        self.in_flight: Dict[Tuple[Hashable, Hashable], asyncio.Future] = {}
+        self.results: Dict[Hashable, Tuple[Hashable, float, Any]] = {}  # key -> (version, expires, value)
+
+    async def run(self, key: Hashable, version: Hashable, compute: Callable[[], Any]) -> Any:
+        cached = self.results.get(key)
+        if cached and cached[0] == version and cached[1] > monotonic():
+            return cached[2]
+
+        flight = self.in_flight.get((key, version))
+        if flight is None:
+            flight = self.in_flight[(key, version)] = asyncio.ensure_future(self._compute(key, version, compute))
+            # A caller that disconnects must not cancel the computation others are waiting on
+            return await asyncio.shield(flight)
+        # The computation's own spans go to the request that started it
+        with span("coalesced"):
+            return await asyncio.shield(flight)
+
+    async def _compute(self, key: Hashable, version: Hashable, compute: Callable[[], Any]) -> Any:
+        try:
+            # Runs off the event loop so concurrent callers can join while it computes, in the
+            # starting request's context so its storage and optimize spans are recorded
+            context = contextvars.copy_context()
+            value = await asyncio.get_running_loop().run_in_executor(None, context.run, compute)
+            self.results[key] = (version, monotonic() + self.ttl, value)
+            return value
+        finally:
+            self.in_flight.pop((key, version), None)
+
+single_flight = SingleFlight(SINGLEFLIGHT_TTL)
+
+async def coalesced(endpoint: str, params: Tuple, compute: Callable[[], Any]) -> Any:
+    """Run an expensive read once per burst, keyed by endpoint, parameters and change feed position"""
+    return await single_flight.run((endpoint, params), get_latest_change_seq(), compute)
@@ -0,0 +1,113 @@
+import math
+from typing import Dict, List, Tuple
+
+TILE_SIZE_PX = 256
+CLUSTER_CELL_PX = 64  # markers closer than this on screen are merged
+CELLS_PER_TILE = TILE_SIZE_PX // CLUSTER_CELL_PX
+MAX_LEVEL = 18  # deepest zoom level with its own cells
+HEATMAP_LEVELS_DOWN = 2  # heat cells are the cluster cells two zooms deeper (16px)
+
+STATUS_SEVERITY = {"normal": 0, "warning": 1, "critical": 2}
+SEVERITY_STATUS = {v: k for k, v in STATUS_SEVERITY.items()}
+
+def mercator(lat: float, lng: float) -> Tuple[float, float]:
+    """Normalized Web Mercator coordinates in [0, 1)"""
+    lat = max(min(lat, 85.0511), -85.0511)
+    x = (lng + 180.0) / 360.0
+    sin_lat = math.sin(math.radians(lat))
+    y = 0.5 - math.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)
+    return min(max(x, 0.0), 1 - 1e-12), min(max(y, 0.0), 1 - 1e-12)
+
+def _new_cell() -> Dict:
+    return {"count": 0, "lat_sum": 0.0, "lng_sum": 0.0, "fill_sum": 0.0, "statuses": [0, 0, 0], "bin_ids": set()}
+
+class TileIndex:
+    """Grid clusters of bins for every zoom level, updated one bin at a time.
+
+    Each bin contributes to exactly one cell per level, so an insert, move or
+    status change touches MAX_LEVEL + 1 cells and a tile query reads a fixed
+    number of cells regardless of how many bins exist.
+    """
+
+    def __init__(self):
+        self.levels: List[Dict[Tuple[int, int], Dict]] = [{} for _ in range(MAX_LEVEL + 1)]
+        self.entries: Dict[str, Tuple[float, float, float, int]] = {}  # bin id -> indexed values
+
+    def _apply(self, bin_id: str, entry: Tuple[float, float, float, int], sign: int):
+        lat, lng, fill_level, severity = entry
+        mx, my = mercator(lat, lng)
+        for level, cells in enumerate(self.levels):
+            scale = CELLS_PER_TILE << level
+            key = (int(mx * scale), int(my * scale))
+            cell = cells.get(key)
+            if cell is None:
+                cell = cells[key] = _new_cell()
+            cell["count"] += sign
+            cell["lat_sum"] += sign * lat
+            cell["lng_sum"] += sign * lng
+            cell["fill_sum"] += sign * fill_level
+            cell["statuses"][severity] += sign
+            if sign > 0:
+                cell["bin_ids"].add(bin_id)
+            else:
+                cell["bin_ids"].discard(bin_id)
+            if cell["count"] == 0:
+                del cells[key]
+
+    def update(self, bin_data: Dict):
+        entry = (
+            bin_data["latitude"],
+            bin_data["longitude"],
+            bin_data["fill_level"],
+            STATUS_SEVERITY.get(bin_data["status"], 0)
+        )
+        previous = self.entries.get(bin_data["id"])
+        if previous == entry:
+            return
+        if previous is not None:
+            self._apply(bin_data["id"], previous, -1)
+        self._apply(bin_data["id"], entry, 1)
+        self.entries[bin_data["id"]] = entry
+
+    def remove(self, bin_id: str):
+        previous = self.entries.pop(bin_id, None)
+        if previous is not None:
+            self._apply(bin_id, previous, -1)
+
+    def _cells_in_tile(self, z: int, x: int, y: int, level: int) -> List[Dict]:
+        """Cells of a level that fall inside tile (z, x, y)"""
+        cells = self.levels[level]
+        if level >= z:
+            span = CELLS_PER_TILE << (level - z)
+            x0, y0 = x * span, y * span
+            return [cells[(cx, cy)] for cx in range(x0, x0 + span) for cy in range(y0, y0 + span) if (cx, cy) in cells]
+        # Zoomed in past the deepest level: the tile lies inside a single cell
+        key = ((x * CELLS_PER_TILE) >> (z - level), (y * CELLS_PER_TILE) >> (z - level))
+        return [cells[key]] if key in cells else []
+
+    def tile(self, z: int, x: int, y: int) -> Dict:
+        clusters = []
+        for cell in self._cells_in_tile(z, x, y, min(z, MAX_LEVEL)):
+            count = cell["count"]
+            worst = max(i for i, n in enumerate(cell["statuses"]) if n > 0)
+            clusters.append({
+                "latitude": cell["lat_sum"] / count,
+                "longitude": cell["lng_sum"] / count,
+                "count": count,
+                "worst_status": SEVERITY_STATUS[worst],
+                "average_fill_level": round(cell["fill_sum"] / count, 1),
+                "status_counts": {SEVERITY_STATUS[i]: n for i, n in enumerate(cell["statuses"]) if n},
+                "bin_id": next(iter(cell["bin_ids"])) if count == 1 else None
+            })
+
+        heatmap = []
+        heat_level = min(z + HEATMAP_LEVELS_DOWN, MAX_LEVEL)
+        for cell in self._cells_in_tile(z, x, y, heat_level):
+            heatmap.append({
+                "latitude": cell["lat_sum"] / cell["count"],
+                "longitude": cell["lng_sum"] / cell["count"],
+                "count": cell["count"],
+                "average_fill_level": round(cell["fill_sum"] / cell["count"], 1)
+            })
+
+        return {"z": z, "x": x, "y": y, "clusters": clusters, "heatmap": heatmap}
@@ -0,0 +1,95 @@
+import asyncio
+import functools
+import logging
+import os
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Callable, Dict, Optional
+
+from fastapi.routing import APIRoute
+
+logger = logging.getLogger("swachhgrid.timing")
+
+# Requests slower than this (in ms) are candidates for the slow-request log
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "500"))
+# Fraction of slow requests that actually get logged
+SLOW_REQUEST_SAMPLE_RATE = float(os.getenv("SLOW_REQUEST_SAMPLE_RATE", "1.0"))
+
+# Span durations (ms) for the request currently being handled
+_current_spans: ContextVar[Optional[Dict[str, float]]] = ContextVar("current_spans", default=None)
+
+def start_request() -> Dict[str, float]:
+    """Start collecting spans for a new request"""
+    spans: Dict[str, float] = {}
+    _current_spans.set(spans)
+    return spans
+
+def record(name: str, duration_ms: float):
+    """Add a duration to the named span of the current request"""
+    spans = _current_spans.get()
+    if spans is not None:
+        spans[name] = spans.get(name, 0.0) + duration_ms
+
+@contextmanager
+def span(name: str):
+    """Time a block of code as a named span"""
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        record(name, (perf_counter() - start) * 1000)
+
+def traced(name: str):
+    """Decorator that times every call of a function as a named span"""
+    def decorator(func: Callable):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def server_timing_header(spans: Dict[str, float], total_ms: float) -> str:
+    """Format spans as a Server-Timing header value"""
+    entries = [f"{name};dur={duration:.2f}" for name, duration in spans.items()]
+    entries.append(f"total;dur={total_ms:.2f}")
+    return ", ".join(entries)
+
+def log_if_slow(method: str, path: str, status_code: int, spans: Dict[str, float], total_ms: float):
+    """Log a sampled breakdown of requests slower than SLOW_REQUEST_MS"""
+    if total_ms < SLOW_REQUEST_MS or random.random() >= SLOW_REQUEST_SAMPLE_RATE:
+        return
+    breakdown = " ".join(f"{name}={duration:.1f}ms" for name, duration in spans.items())
+    logger.warning(f"Slow request {method} {path} -> {status_code} in {total_ms:.1f}ms [{breakdown}]")
+
+class TimedRoute(APIRoute):
+    """APIRoute that splits handler time into endpoint and validation/serialization spans"""
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        super().__init__(path, traced("endpoint")(endpoint), **kwargs)
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def timed_handler(request):
+            spans = _current_spans.get()
+            endpoint_before = spans.get("endpoint", 0.0) if spans is not None else 0.0
+            start = perf_counter()
+            try:
+                return await handler(request)
+            finally:
+                if spans is not None:
+                    handler_ms = (perf_counter() - start) * 1000
+                    endpoint_ms = spans.pop("endpoint", 0.0) - endpoint_before
+                    record("serialize", max(handler_ms - endpoint_ms, 0.0))
+
+        return timed_handler
@@ -0,0 +1,155 @@
+import math
+import os
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from utils.versioned_heap import VersionedHeap
+
+# Bins at or above this fill level need collection
+COLLECTION_THRESHOLD = 75
+# How quickly a bin's estimated fill rate follows new readings; a rise spread over
+# this many hours counts about two thirds towards the new rate
+FILL_RATE_HOURS = float(os.getenv("FILL_RATE_HOURS", "6"))
+# A first rise is measured over at least this long, so a reading right after
+# installation does not imply an absurd rate
+MIN_RATE_HOURS = 0.25
+MIN_FILL_RATE = 0.01  # percentage points per hour; slower bins have no predicted full time
+
+def is_routable(bin_data: Dict) -> bool:
+    """Whether a bin is a collection candidate.
+
+    Bins with flagged fill sensors are left out until the flags clear, unless
+    they read at or above the collection threshold: a reading that high is as
+    likely an overflowing bin as a faulty sensor, and a visit settles which.
+    """
+    return not bin_data.get("sensor_flags") or bin_data["fill_level"] >= COLLECTION_THRESHOLD
+
+def overflow_time(bin_data: Dict) -> float:
+    """Timestamp a bin is expected to overflow at; infinity when there is no estimate.
+
+    Only a full bin counts as overflowing since its last reading.
+    """
+    if bin_data["fill_level"] >= 100:
+        return bin_data["last_updated"].timestamp()
+    full_time: Optional[datetime] = bin_data.get("predicted_full_time")
+    return full_time.timestamp() if full_time else math.inf
+
+class FillRateEstimator:
+    """Smoothed fill rate per bin, in percentage points per hour, for predicting full times.
+
+    Rises between readings update a moving average weighted by the time they
+    span, so a burst of closely spaced readings moves the rate no more than
+    one reading over the same interval. Drops (collections) only move the
+    baseline: emptying a bin does not change how fast it fills.
+    """
+
+    def __init__(self, time_constant_hours: float):
+        self.time_constant = time_constant_hours
+        self.rates: Dict[str, float] = {}
+        self.baselines: Dict[str, Tuple[float, datetime]] = {}  # bin id -> (fill level, at)
+
+    def track(self, bin_id: str, fill_level: float, at: datetime, full_time: Optional[datetime] = None):
+        """Start from a reading, taking the rate implied by an existing prediction if there is one"""
+        self.baselines[bin_id] = (fill_level, at)
+        self.rates.pop(bin_id, None)
+        if full_time and full_time > at and fill_level < 100:
+            self.rates[bin_id] = (100 - fill_level) / ((full_time - at).total_seconds() / 3600)
+
+    def observe(self, bin_id: str, fill_level: float, at: datetime) -> Optional[datetime]:
+        """Update a bin's rate with a reading and return its new predicted full time"""
+        previous = self.baselines.get(bin_id)
+        self.baselines[bin_id] = (fill_level, at)
+        if previous is not None:
+            delta = fill_level - previous[0]
+            hours = (at - previous[1]).total_seconds() / 3600
+            rate = self.rates.get(bin_id)
+            if delta >= 0 and hours > 0:
+                if rate is None:
+                    self.rates[bin_id] = delta / max(hours, MIN_RATE_HOURS)
+                else:
+                    weight = 1 - math.exp(-hours / self.time_constant)
+                    self.rates[bin_id] = rate + weight * (delta / hours - rate)
+        return self.predict(bin_id, fill_level, at)
+
+    def predict(self, bin_id: str, fill_level: float, at: datetime) -> Optional[datetime]:
+        """When a bin reaches 100% at its current rate; None when it is not filling"""
+        if fill_level >= 100:
+            return at
+        rate = self.rates.get(bin_id, 0.0)
+        if rate < MIN_FILL_RATE:
+            return None
+        return at + timedelta(hours=(100 - fill_level) / rate)
+
+class UrgencyIndex:
+    """Bins ordered by predicted overflow, plus running counts for the dashboard.
+
+    Routable bins are kept in a versioned heap keyed on
+    (overflow time, -fill level), so updates are O(log n) and a top-k query
+    only pops what it returns.
+    """
+
+    def __init__(self, threshold: float):
+        self.threshold = threshold
+        self.queue = VersionedHeap()
+        self.entries: Dict[str, Tuple[float, float, str, bool]] = {}  # bin id -> (overflow, fill, status, routable)
+        self.due: Dict[str, None] = {}  # routable bins at or above the threshold
+        self.status_counts: Counter = Counter()
+        self.fill_sum = 0.0
+        self.needing_collection = 0
+
+    def _count(self, entry: Tuple[float, float, str, bool], sign: int):
+        _, fill_level, status, _ = entry
+        self.status_counts[status] += sign
+        self.fill_sum += sign * fill_level
+        if fill_level >= self.threshold:
+            self.needing_collection += sign
+
+    def update(self, bin_data: Dict):
+        bin_id = bin_data["id"]
+        entry = (overflow_time(bin_data), bin_data["fill_level"], bin_data["status"], is_routable(bin_data))
+        previous = self.entries.get(bin_id)
+        if previous == entry:
+            return
+        if previous is not None:
+            self._count(previous, -1)
+        self._count(entry, 1)
+        self.entries[bin_id] = entry
+
+        overflow, fill_level, _, routable = entry
+        if routable and fill_level >= self.threshold:
+            self.due[bin_id] = None
+        else:
+            self.due.pop(bin_id, None)
+        if previous is not None and previous[:2] == entry[:2] and previous[3] == routable:
+            return
+        if routable:
+            self.queue.push(bin_id, (overflow, -fill_level))
+        else:
+            self.queue.discard(bin_id)
+
+    def remove(self, bin_id: str):
+        previous = self.entries.pop(bin_id, None)
+        if previous is not None:
+            self._count(previous, -1)
+        self.queue.discard(bin_id)
+        self.due.pop(bin_id, None)
+
+    def most_urgent(self, k: int, before: float = math.inf) -> List[str]:
+        """Up to k routable bins expected to overflow before a timestamp, soonest first"""
+        return self.queue.smallest(k, before)
+
+    def due_for_collection(self) -> List[str]:
+        """Routable bins at or above the threshold, soonest to overflow first"""
+        return sorted(self.due, key=lambda bin_id: (self.entries[bin_id][0], -self.entries[bin_id][1], bin_id))
+
+    def summary(self) -> Dict:
+        total = len(self.entries)
+        return {
+            "total_bins": total,
+            "critical_bins": self.status_counts["critical"],
+            "warning_bins": self.status_counts["warning"],
+            "normal_bins": self.status_counts["normal"],
+            "average_fill_level": round(self.fill_sum / total, 1) if total else 0.0,
+            "bins_needing_collection": self.needing_collection
+        }
@@ -0,0 +1,71 @@
+import base64
+import binascii
+import json
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, List, Optional, Tuple
+
+def normalize(text: str) -> str:
+    return " ".join(text.casefold().split())
+
+def encode_cursor(key: Tuple[str, str]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    try:
+        term, user_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(term, str) or not isinstance(user_id, str):
+            raise TypeError
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    return term, user_id
+
+class UserIndex:
+    """Sorted (term, user id) arrays for prefix search over user names and emails.
+
+    Each user is indexed under the full name, every later word of it (so
+    "ram" finds "Sita Ram") and the email. There is one array for all users
+    and one per role, so a role filter never skips over other roles. A query
+    is a binary search to the first matching term followed by a walk that
+    stops at the first term without the prefix.
+    """
+
+    def __init__(self):
+        self.by_role: Dict[Optional[str], List[Tuple[str, str]]] = {None: []}  # None holds every role
+        self.terms: Dict[str, List[str]] = {}  # user id -> its terms, full name first
+
+    def add(self, user: Dict):
+        words = normalize(user["name"]).split()
+        terms = list(dict.fromkeys([" ".join(words), *words[1:], normalize(user["email"])]))
+        self.terms[user["id"]] = terms
+        for role in (None, user["role"]):
+            keys = self.by_role.setdefault(role, [])
+            for term in terms:
+                insort(keys, (term, user["id"]))
+
+    def _first_match(self, user_id: str, prefix: str) -> str:
+        """The term a user is listed under: the full name when it matches, else the lowest matching term"""
+        terms = self.terms[user_id]
+        if terms[0].startswith(prefix):
+            return terms[0]
+        return min(t for t in terms if t.startswith(prefix))
+
+    def search(self, prefix: str, role: Optional[str], limit: int,
+               after: Optional[Tuple[str, str]] = None) -> Tuple[List[str], Optional[Tuple[str, str]]]:
+        """Up to limit user ids in term order, and the key to continue after when the page is full"""
+        keys = self.by_role.get(role, [])
+        prefix = normalize(prefix)
+        start = bisect_left(keys, (prefix,))
+        if after is not None:
+            start = max(start, bisect_right(keys, tuple(after)))
+        user_ids: List[str] = []
+        for index in range(start, len(keys)):
+            term, user_id = keys[index]
+            if not term.startswith(prefix):
+                break
+            # Users matching through several terms are listed once
+            if self._first_match(user_id, prefix) != term:
+                continue
+            user_ids.append(user_id)
+            if len(user_ids) == limit:
+                return user_ids, (term, user_id)
+        return user_ids, None
@@ -0,0 +1,66 @@
+import heapq
+import math
+from itertools import count
+from typing import Dict, List, Optional, Tuple
+
+class VersionedHeap:
+    """Min-heap of items whose priority changes, updated in O(log n).
+
+    Pushing an item again leaves its old entry in place but stale: entries
+    carry a version, and only the item's latest version is live. Stale
+    entries are skipped when they reach the top and dropped in bulk once
+    they outnumber the live ones.
+    """
+
+    def __init__(self):
+        self.heap: List[tuple] = []  # (key..., version, item id)
+        self.versions: Dict[str, int] = {}  # item id -> version of its live entry
+        # One counter for all items, so a removed and re-added item never revives an old entry
+        self._next_version = count(1)
+
+    def __len__(self) -> int:
+        return len(self.versions)
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self.versions
+
+    def push(self, item_id: str, key: Tuple):
+        version = next(self._next_version)
+        self.versions[item_id] = version
+        heapq.heappush(self.heap, (*key, version, item_id))
+        if len(self.heap) > 2 * len(self.versions) + 64:
+            self.heap[:] = [e for e in self.heap if self._live(e)]
+            heapq.heapify(self.heap)
+
+    def discard(self, item_id: str):
+        self.versions.pop(item_id, None)
+
+    def _live(self, entry: tuple) -> bool:
+        return self.versions.get(entry[-1]) == entry[-2]
+
+    def pop(self) -> Optional[str]:
+        """Remove and return the item with the smallest key"""
+        while self.heap:
+            entry = heapq.heappop(self.heap)
+            if self._live(entry):
+                del self.versions[entry[-1]]
+                return entry[-1]
+        return None
+
+    def smallest(self, k: int, max_first: float = math.inf) -> List[str]:
+        """Up to k items in key order whose first key part is at most max_first, left in the heap.
+
+        Only the returned entries and the stale ones in front of them are popped.
+        """
+        taken: List[tuple] = []
+        while self.heap and len(taken) < k:
+            entry = self.heap[0]
+            if not self._live(entry):
+                heapq.heappop(self.heap)
+                continue
+            if entry[0] > max_first:
+                break
+            taken.append(heapq.heappop(self.heap))
+        for entry in taken:
+            heapq.heappush(self.heap, entry)
+        return [entry[-1] for entry in taken]
@@ -1,5 +1,5 @@
 import React, { useState, useEffect, useCallback, useRef } from 'react';
-import { MapContainer, TileLayer, Marker, Popup, Polyline, useMapEvents } from 'react-leaflet';
+import { MapContainer, TileLayer, Marker, Popup, Polyline, useMap, useMapEvents } from 'react-leaflet';
 import { Card, CardContent, CardHeader, CardTitle } from './components/ui/card';
 import { Badge } from './components/ui/badge';
 import { Button } from './components/ui/button';
@@ -320,21 +320,6 @@ const AuthPage = ({ onLogin }) => {
                 />
               </div>
 
-              {!isLogin && (
-                <div>
-                  <Label htmlFor="role">Account Type</Label>
-                  <Select value={formData.role} onValueChange={(value) => setFormData({...formData, role: value})}>
-                    <SelectTrigger className="mt-1">
-                      <SelectValue />
-                    </SelectTrigger>
-                    <SelectContent>
-                      <SelectItem value="user">Regular User</SelectItem>
-                      <SelectItem value="admin">Administrator</SelectItem>
-                    </SelectContent>
-                  </Select>
-                </div>
-              )}
-
               <Button 
                 type="submit" 
                 className="w-full bg-gradient-to-r from-green-600 to-blue-600 hover:from-green-700 hover:to-blue-700"
@@ -466,6 +451,29 @@ const MapClickHandler = ({ isAddingBin, onMapClick, canAddBin }) => {
   return null;
 };
 
+// Decode an encoded polyline into [lat, lng] pairs
+const decodePolyline = (encoded, precision = 5) => {
+  const factor = Math.pow(10, precision);
+  const points = [];
+  let index = 0, lat = 0, lng = 0;
+  while (index < encoded.length) {
+    const deltas = [];
+    for (let i = 0; i < 2; i++) {
+      let shift = 0, result = 0, byte;
+      do {
+        byte = encoded.charCodeAt(index++) - 63;
+        result |= (byte & 0x1f) << shift;
+        shift += 5;
+      } while (byte >= 0x20);
+      deltas.push(result & 1 ? ~(result >> 1) : result >> 1);
+    }
+    lat += deltas[0];
+    lng += deltas[1];
+    points.push([lat / factor, lng / factor]);
+  }
+  return points;
+};
+
 // Custom bin icons with enhanced styling
 const createBinIcon = (fillLevel, status) => {
   let color = '#10B981';
@@ -506,6 +514,127 @@ const createBinIcon = (fillLevel, status) => {
   });
 };
 
+// Numbered marker for several bins drawn as one, colored by the worst of them
+const createClusterIcon = (count, status) => {
+  const color = { critical: '#EF4444', warning: '#F59E0B' }[status] || '#10B981';
+  const size = count < 10 ? 36 : count < 100 ? 42 : 48;
+  return L.divIcon({
+    html: `
+      <div style="
+        background: ${color};
+        border: 3px solid white;
+        border-radius: 50%;
+        width: ${size}px;
+        height: ${size}px;
+        display: flex;
+        align-items: center;
+        justify-content: center;
+        font-size: 12px;
+        font-weight: 700;
+        color: white;
+        box-shadow: 0 4px 12px rgba(0,0,0,0.25);
+      ">
+        ${count}
+      </div>
+    `,
+    className: 'custom-cluster-marker',
+    iconSize: [size, size],
+    iconAnchor: [size / 2, size / 2]
+  });
+};
+
+// Server tiles match Leaflet's 256px XYZ grid
+const TILE_SIZE = 256;
+// Live updates arrive several times a second; visible tiles are refetched at most this often
+const TILE_REFRESH_MS = 5000;
+
+// Bins drawn from the server's clustered tiles for the visible area, so the number of
+// markers stays bounded at any zoom however many bins there are. A bin's details are
+// fetched when its popup opens; the map never needs the full bin list.
+const BinTileLayer = ({ refreshKey, renderPopup }) => {
+  const map = useMap();
+  const [clusters, setClusters] = useState([]);
+  const [details, setDetails] = useState({});
+  const requestRef = useRef(0);
+  const refreshTimer = useRef(null);
+
+  const loadTiles = useCallback(async () => {
+    const request = ++requestRef.current;
+    const zoom = Math.round(map.getZoom());
+    const pixels = map.getPixelBounds();
+    const clamp = (tile) => Math.min(Math.max(tile, 0), Math.pow(2, zoom) - 1);
+    const paths = [];
+    for (let x = clamp(Math.floor(pixels.min.x / TILE_SIZE)); x <= clamp(Math.floor(pixels.max.x / TILE_SIZE)); x++) {
+      for (let y = clamp(Math.floor(pixels.min.y / TILE_SIZE)); y <= clamp(Math.floor(pixels.max.y / TILE_SIZE)); y++) {
+        paths.push(`${zoom}/${x}/${y}`);
+      }
+    }
+    try {
+      const tiles = await Promise.all(paths.map((path) => axios.get(`${API}/tiles/${path}`)));
+      // A later pan or zoom may have finished first
+      if (request === requestRef.current) {
+        setClusters(tiles.flatMap((response) => response.data.clusters));
+      }
+    } catch (error) {
+      console.error('Error fetching map tiles:', error);
+    }
+  }, [map]);
+
+  const loadDetails = async (binId) => {
+    try {
+      const response = await axios.get(`${API}/bins/${binId}`);
+      setDetails((prev) => ({ ...prev, [binId]: response.data }));
+    } catch (error) {
+      console.error('Error fetching bin details:', error);
+    }
+  };
+
+  useMapEvents({ moveend: loadTiles });
+
+  useEffect(() => {
+    loadTiles();
+  }, [loadTiles]);
+
+  useEffect(() => {
+    if (!refreshTimer.current) {
+      refreshTimer.current = setTimeout(() => {
+        refreshTimer.current = null;
+        loadTiles();
+      }, TILE_REFRESH_MS);
+    }
+  }, [refreshKey, loadTiles]);
+
+  useEffect(() => () => clearTimeout(refreshTimer.current), []);
+
+  return clusters.map((cluster) => {
+    if (cluster.bin_id) {
+      const bin = details[cluster.bin_id];
+      return (
+        <Marker
+          key={cluster.bin_id}
+          position={[cluster.latitude, cluster.longitude]}
+          icon={createBinIcon(cluster.average_fill_level, cluster.worst_status)}
+          eventHandlers={{ popupopen: () => loadDetails(cluster.bin_id) }}
+        >
+          <Popup className="custom-popup">
+            {bin ? renderPopup(bin) : <div className="p-3 text-sm text-gray-600">Loading...</div>}
+          </Popup>
+        </Marker>
+      );
+    }
+    return (
+      <Marker
+        key={`${cluster.latitude},${cluster.longitude}`}
+        position={[cluster.latitude, cluster.longitude]}
+        icon={createClusterIcon(cluster.count, cluster.worst_status)}
+        eventHandlers={{
+          click: () => map.setView([cluster.latitude, cluster.longitude], map.getZoom() + 2)
+        }}
+      />
+    );
+  });
+};
+
 // Loading Spinner Component
 const LoadingSpinner = () => (
   <div className="flex items-center justify-center h-96">
@@ -1059,13 +1188,13 @@ const RequestsTab = ({ user }) => {
 };
 
 // Presentation Mode Component
-const PresentationMode = ({ isActive, onClose, stats, bins }) => {
+const PresentationMode = ({ isActive, onClose, stats }) => {
   if (!isActive) return null;
 
   const environmentalImpact = {
-    co2Saved: Math.round(bins.length * 2.5),
+    co2Saved: Math.round((stats.total_bins || 0) * 2.5),
     routeOptimization: '35%',
-    costSavings: '$' + Math.round(bins.length * 15),
+    costSavings: '$' + Math.round((stats.total_bins || 0) * 15),
     recyclingRate: '68%'
   };
 
@@ -1194,7 +1323,8 @@ function App() {
   const [loading, setLoading] = useState(true);
 
   // App state
-  const [bins, setBins] = useState([]);
+  // The full bin list, only downloaded once a list view needs it; the map reads tiles
+  const [bins, setBins] = useState(null);
   const [alerts, setAlerts] = useState([]);
   const [stats, setStats] = useState({});
   const [route, setRoute] = useState(null);
@@ -1207,6 +1337,8 @@ function App() {
   const [showRequestModal, setShowRequestModal] = useState(false);
   const [clickPosition, setClickPosition] = useState(null);
   const [presentationMode, setPresentationMode] = useState(false);
+  // Last change feed sequence number seen, so reconnects only replay the gap
+  const lastSeqRef = useRef(null);
 
   // Check for existing user session on load
   useEffect(() => {
@@ -1242,7 +1374,8 @@ function App() {
     try {
       setDataLoading(true);
       await axios.post(`${API}/initialize-demo-data`);
-      await Promise.all([fetchBins(), fetchAlerts(), fetchStats()]);
+      setBins(null);
+      await Promise.all([fetchAlerts(), fetchStats()]);
     } catch (error) {
       console.error('Failed to initialize demo data:', error);
     } finally {
@@ -1281,8 +1414,9 @@ function App() {
   const optimizeRoute = async () => {
     try {
       setDataLoading(true);
-      const response = await axios.get(`${API}/route/optimize`);
-      setRoute(response.data);
+      const response = await axios.get(`${API}/route/optimize`, { params: { geometry: 'polyline' } });
+      const { polyline, polyline_precision: precision } = response.data;
+      setRoute({ ...response.data, coordinates: polyline ? decodePolyline(polyline, precision) : response.data.coordinates });
     } catch (error) {
       console.error('Failed to optimize route:', error);
     } finally {
@@ -1303,7 +1437,6 @@ function App() {
   const addBin = async (binData) => {
     try {
       const response = await axios.post(`${API}/bins`, binData);
-      await fetchBins();
       await fetchStats();
       return response.data;
     } catch (error) {
@@ -1314,10 +1447,18 @@ function App() {
   // Request new bin (User only)
   const requestBin = async (requestData) => {
     try {
-      // In a real app, this would be sent to the backend
-      console.log('Bin request submitted:', requestData);
+      const response = await axios.post(`${API}/reports`, {
+        type: 'bin_request',
+        description: requestData.description,
+        latitude: requestData.latitude,
+        longitude: requestData.longitude,
+        priority: requestData.urgency,
+        location_type: requestData.location_type,
+        reporter_name: requestData.requested_by,
+        reporter_email: requestData.email
+      });
       alert('Your bin request has been submitted and will be reviewed by an administrator.');
-      return requestData;
+      return response.data;
     } catch (error) {
       console.error('Failed to submit bin request:', error);
     }
@@ -1341,9 +1482,26 @@ function App() {
     setPresentationMode(true);
   };
 
+  // Apply one change feed entry; entities carry their own seq so stale or repeated changes are ignored
+  const applyChange = (change) => {
+    const upsert = (items) => {
+      const existing = items.find(item => item.id === change.data.id);
+      if (!existing) return [change.data, ...items];
+      if ((existing.seq || 0) >= change.seq) return items;
+      return items.map(item => item.id === change.data.id ? change.data : item);
+    };
+    if (change.change.startsWith('bin_')) {
+      setBins(prev => prev && upsert(prev));
+    } else if (change.change.startsWith('alert_')) {
+      setAlerts(prev => upsert(prev));
+    }
+    lastSeqRef.current = Math.max(lastSeqRef.current || 0, change.seq);
+  };
+
   // WebSocket connection
   const connectWebSocket = useCallback(() => {
-    const ws = new WebSocket(`${BACKEND_URL.replace('https://', 'wss://').replace('http://', 'ws://')}/ws`);
+    const since = lastSeqRef.current !== null ? `?since=${lastSeqRef.current}` : '';
+    const ws = new WebSocket(`${BACKEND_URL.replace('https://', 'wss://').replace('http://', 'ws://')}/ws${since}`);
     
     ws.onopen = () => {
       setWsConnected(true);
@@ -1353,12 +1511,29 @@ function App() {
     ws.onmessage = (event) => {
       try {
         const data = JSON.parse(event.data);
-        if (data.type === 'bin_update') {
-          setBins(data.bins);
-          if (data.alerts && data.alerts.length > 0) {
-            setAlerts(prev => [...data.alerts, ...prev]);
+        if (data.type === 'sync') {
+          lastSeqRef.current = data.latest_seq;
+        } else if (data.type === 'replay') {
+          if (data.reset) {
+            // The gap is no longer available on the server
+            setBins(null);
+            Promise.all([fetchAlerts(), fetchStats()]);
+          } else {
+            data.changes.forEach(applyChange);
+            if (!data.more) {
+              fetchStats();
+            }
+          }
+          // Further replay pages follow while 'more' is set; applyChange tracks their seq
+          if (!data.more) {
+            lastSeqRef.current = data.latest_seq;
+          }
+        } else if (data.type === 'delta') {
+          // One merged frame per server tick: latest state of each changed entity plus fresh stats
+          data.changes.forEach(applyChange);
+          if (data.stats) {
+            setStats(data.stats);
           }
-          fetchStats();
         }
       } catch (error) {
         console.error('WebSocket message error:', error);
@@ -1382,9 +1557,9 @@ function App() {
     if (user) {
       const loadInitialData = async () => {
         try {
-          await fetchBins();
-          const currentBins = await axios.get(`${API}/bins`);
-          if (currentBins.data.length === 0) {
+          // The dashboard counts say whether there is any data without downloading every bin
+          const currentStats = await axios.get(`${API}/dashboard/stats`);
+          if (currentStats.data.total_bins === 0) {
             await initializeDemoData();
           }
           await Promise.all([fetchAlerts(), fetchStats()]);
@@ -1406,6 +1581,13 @@ function App() {
     }
   }, [user, connectWebSocket]);
 
+  // The bin and route lists show every bin, so the list is fetched when one of them is opened
+  useEffect(() => {
+    if (user && bins === null && (activeTab === 'bins' || activeTab === 'route')) {
+      fetchBins();
+    }
+  }, [user, bins, activeTab]);
+
   const getBinStatusColor = (status) => {
     switch (status) {
       case 'critical': return 'bg-red-500';
@@ -1434,7 +1616,6 @@ function App() {
         isActive={presentationMode}
         onClose={() => setPresentationMode(false)}
         stats={stats}
-        bins={bins}
       />
 
       {/* User Header */}
@@ -1563,38 +1744,33 @@ function App() {
                       attribution='&copy; <a href="https://www.openstreetmap.org/copyright">OpenStreetMap</a> contributors'
                     />
                     
-                    {bins.map((bin) => (
-                      <Marker
-                        key={bin.id}
-                        position={[bin.latitude, bin.longitude]}
-                        icon={createBinIcon(bin.fill_level, bin.status)}
-                      >
-                        <Popup className="custom-popup">
-                          <div className="p-3 min-w-[200px]">
-                            <div className="flex items-center justify-between mb-2">
-                              <h3 className="font-bold text-lg">{bin.name}</h3>
-                              <Badge className={getBinStatusColor(bin.status)}>
-                                {bin.status}
-                              </Badge>
+                    <BinTileLayer
+                      refreshKey={stats}
+                      renderPopup={(bin) => (
+                        <div className="p-3 min-w-[200px]">
+                          <div className="flex items-center justify-between mb-2">
+                            <h3 className="font-bold text-lg">{bin.name}</h3>
+                            <Badge className={getBinStatusColor(bin.status)}>
+                              {bin.status}
+                            </Badge>
+                          </div>
+                          <div className="space-y-2">
+                            <div className="flex justify-between">
+                              <span className="text-sm text-gray-600">Fill Level:</span>
+                              <span className="font-semibold">{bin.fill_level.toFixed(1)}%</span>
                             </div>
-                            <div className="space-y-2">
-                              <div className="flex justify-between">
-                                <span className="text-sm text-gray-600">Fill Level:</span>
-                                <span className="font-semibold">{bin.fill_level.toFixed(1)}%</span>
-                              </div>
-                              <Progress value={bin.fill_level} className="h-2" />
-                              <div className="flex justify-between">
-                                <span className="text-sm text-gray-600">Capacity:</span>
-                                <span className="font-semibold">{bin.capacity}L</span>
-                              </div>
-                              <div className="text-xs text-gray-500 border-t pt-2">
-                                Last Updated: {new Date(bin.last_updated).toLocaleTimeString()}
-                              </div>
+                            <Progress value={bin.fill_level} className="h-2" />
+                            <div className="flex justify-between">
+                              <span className="text-sm text-gray-600">Capacity:</span>
+                              <span className="font-semibold">{bin.capacity}L</span>
+                            </div>
+                            <div className="text-xs text-gray-500 border-t pt-2">
+                              Last Updated: {new Date(bin.last_updated).toLocaleTimeString()}
                             </div>
                           </div>
-                        </Popup>
-                      </Marker>
-                    ))}
+                        </div>
+                      )}
+                    />
                     
                     {route && route.coordinates && (
                       <Polyline
@@ -1619,13 +1795,13 @@ function App() {
                   <Activity className="w-6 h-6 text-primary" />
                   Waste Bins Status
                   <Badge variant="outline" className="ml-auto">
-                    {bins.length} Active Bins
+                    {stats.total_bins || 0} Active Bins
                   </Badge>
                 </CardTitle>
               </CardHeader>
               <CardContent>
                 <div className="grid gap-4 max-h-[600px] overflow-y-auto custom-scrollbar">
-                  {bins.map((bin, index) => (
+                  {(bins || []).map((bin, index) => (
                     <Card 
                       key={bin.id} 
                       className="group hover:shadow-lg transition-all duration-300 hover:scale-[1.02] border border-border/50 bg-background/80 backdrop-blur-sm"
@@ -1723,7 +1899,7 @@ function App() {
                       <CardContent>
                         <div className="space-y-3 max-h-80 overflow-y-auto custom-scrollbar">
                           {route.bin_ids.map((binId, index) => {
-                            const bin = bins.find(b => b.id === binId);
+                            const bin = bins?.find(b => b.id === binId);
                             return (
                               <div 
                                 key={binId} 